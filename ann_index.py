@@ -0,0 +1,283 @@
+import json
+import os
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+from typing import Dict, Optional, Tuple
+from similarity_engine import SimilarityEngine, top_k_indices
+from config import ANN_CONFIG
+
+
+class AnnIndex:
+    """فهرس IVF-PQ تقريبي فوق إسقاط كثيف (TruncatedSVD) لمصفوفة TF-IDF"""
+
+    FORMAT_VERSION = 1
+    META_FILE = 'meta.json'
+    # أجزاء النموذج المدرب، ثم ترميز الكتالوج الحالي بها
+    MODEL_FILES = ('components', 'centroids', 'codebooks')
+    DATA_FILES = ('codes', 'list_rows', 'list_offsets')
+    ENCODE_BLOCK = 8192
+
+    def __init__(self, components: np.ndarray, centroids: np.ndarray, codebooks: np.ndarray,
+                 codes: np.ndarray = None, list_rows: np.ndarray = None,
+                 list_offsets: np.ndarray = None, source_hash: str = None):
+        self.components = components  # (الأبعاد الكثيفة، المفردات)
+        self.centroids = centroids    # مراكز القوائم المقلوبة (القوائم، الأبعاد)
+        self.codebooks = codebooks    # قواميس التكميم لكل جزء (الأجزاء، الرموز، أبعاد الجزء)
+        self.codes = codes            # رموز البواقي مرتبة حسب القائمة (الصفوف، الأجزاء)
+        self.list_rows = list_rows    # موقع الصف الأصلي لكل رمز
+        self.list_offsets = list_offsets
+        self.source_hash = source_hash
+        self._centroid_norms = (self.centroids ** 2).sum(axis=1)
+        self._codebook_norms = (self.codebooks ** 2).sum(axis=2)
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @property
+    def n_subvectors(self) -> int:
+        return self.codebooks.shape[0]
+
+    def __len__(self) -> int:
+        return 0 if self.list_rows is None else self.list_rows.shape[0]
+
+    @classmethod
+    def train(cls, feature_matrix, params: Dict = None, source_hash: str = None) -> 'AnnIndex':
+        """تدريب الإسقاط والمراكز وقواميس التكميم على عينة ثم ترميز الكتالوج كاملاً"""
+        params = {**ANN_CONFIG, **(params or {})}
+        feature_matrix = sparse.csr_matrix(feature_matrix)
+        n_rows, n_features = feature_matrix.shape
+        rng = np.random.default_rng(0)
+
+        # عدد الأبعاد يقبل القسمة على عدد الأجزاء ولا يتجاوز ما تسمح به المصفوفة
+        n_subvectors = params['n_subvectors']
+        limit = min(params['n_components'], n_features - 1, n_rows - 1)
+        n_components = max(limit // n_subvectors, 1) * n_subvectors
+        n_subvectors = min(n_subvectors, n_components)
+
+        sample = feature_matrix
+        if n_rows > params['train_rows']:
+            sample = feature_matrix[np.sort(rng.choice(n_rows, params['train_rows'], replace=False))]
+
+        svd = TruncatedSVD(n_components=n_components, random_state=0).fit(sample)
+        components = svd.components_.astype(np.float32)
+        embeddings = normalize(np.asarray(sample @ components.T, dtype=np.float32))
+
+        # المستوى الأول: تقسيم الفضاء إلى قوائم بعدد جذر حجم الكتالوج تقريباً
+        n_lists = min(params['n_lists'] or max(int(np.sqrt(n_rows)), 1), len(embeddings))
+        coarse = MiniBatchKMeans(n_clusters=n_lists, random_state=0, n_init=3, batch_size=4096)
+        centroids = coarse.fit(embeddings).cluster_centers_.astype(np.float32)
+
+        # المستوى الثاني: تكميم البواقي جزءاً جزءاً بقاموس من 256 رمزاً على الأكثر
+        residuals = embeddings - centroids[coarse.labels_]
+        sub_dim = n_components // n_subvectors
+        n_codes = min(256, len(residuals))
+        codebooks = np.empty((n_subvectors, n_codes, sub_dim), dtype=np.float32)
+        for j in range(n_subvectors):
+            part = residuals[:, j * sub_dim:(j + 1) * sub_dim]
+            codebooks[j] = KMeans(n_clusters=n_codes, random_state=0, n_init=1, max_iter=25).fit(part).cluster_centers_
+
+        index = cls(components, centroids, codebooks, source_hash=source_hash)
+        return index.encode(feature_matrix)
+
+    def embed(self, matrix) -> np.ndarray:
+        """إسقاط صفوف TF-IDF إلى الفضاء الكثيف مع تطبيعها"""
+        embeddings = np.asarray(matrix @ self.components.T, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def _nearest(self, vectors: np.ndarray, centers: np.ndarray, center_norms: np.ndarray) -> np.ndarray:
+        # أقرب مركز بالمسافة الإقليدية: ||c||² - 2 x·c (مع إهمال ||x||² الثابت للصف)
+        return np.argmin(center_norms - 2 * vectors @ centers.T, axis=1)
+
+    def encode(self, feature_matrix) -> 'AnnIndex':
+        """ترميز كتالوج بالنموذج المدرب دون إعادة تدريب"""
+        assignments, codes = self._encode_rows(feature_matrix)
+        list_rows = np.argsort(assignments, kind='stable').astype(np.int32)
+        return self._with_lists(assignments[list_rows], list_rows, codes[list_rows])
+
+    def update(self, feature_matrix, changed=None, removed=None) -> 'AnnIndex':
+        """ترقيع الترميز بعد تعديل الكتالوج بترميز الصفوف المتغيرة فقط
+
+        removed مواقع الصفوف المحذوفة قبل الحذف، و changed مواقع الصفوف الجديدة أو المعدلة في
+        feature_matrix بعده. تُزال مدخلاتها من القوائم المقلوبة وتُدرج رموزها الجديدة في مواضعها،
+        فالنتيجة مطابقة لـ encode على الكتالوج كاملاً دون إعادة إسقاطه.
+        """
+        entry_lists = np.repeat(np.arange(self.n_lists, dtype=np.int32), np.diff(self.list_offsets))
+        list_rows = np.asarray(self.list_rows)
+        codes = np.asarray(self.codes)
+
+        if removed is not None and len(removed):
+            removed = np.sort(np.asarray(removed, dtype=np.int64))
+            keep = ~np.isin(list_rows, removed)
+            entry_lists, list_rows, codes = entry_lists[keep], list_rows[keep], codes[keep]
+            # إزاحة المواقع بعد الحذف مع بقاء ترتيبها داخل كل قائمة
+            list_rows = (list_rows - np.searchsorted(removed, list_rows)).astype(np.int32)
+
+        changed = np.unique(np.asarray(changed if changed is not None else [], dtype=np.int64))
+        if len(changed):
+            keep = ~np.isin(list_rows, changed)
+            entry_lists, list_rows, codes = entry_lists[keep], list_rows[keep], codes[keep]
+            new_lists, new_codes = self._encode_rows(sparse.csr_matrix(feature_matrix)[changed])
+
+            # المدخلات مرتبة حسب (القائمة، الصف) كما في encode، فالإدراج بالبحث الثنائي يحفظ الترتيب
+            n_rows = feature_matrix.shape[0]
+            new_keys = new_lists.astype(np.int64) * n_rows + changed
+            order = np.argsort(new_keys, kind='stable')
+            at = np.searchsorted(entry_lists.astype(np.int64) * n_rows + list_rows, new_keys[order])
+            entry_lists = np.insert(entry_lists, at, new_lists[order])
+            list_rows = np.insert(list_rows, at, changed[order].astype(np.int32))
+            codes = np.insert(codes, at, new_codes[order], axis=0)
+
+        return self._with_lists(entry_lists, list_rows, codes)
+
+    def _encode_rows(self, feature_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """القائمة الأقرب لكل صف ورموز باقيه بترتيب الصفوف"""
+        feature_matrix = sparse.csr_matrix(feature_matrix)
+        n_rows = feature_matrix.shape[0]
+        sub_dim = self.codebooks.shape[2]
+        assignments = np.empty(n_rows, dtype=np.int32)
+        codes = np.empty((n_rows, self.n_subvectors), dtype=np.uint8)
+
+        # الترميز على دفعات حتى تبقى مصفوفات المسافات محدودة الحجم
+        for start in range(0, n_rows, self.ENCODE_BLOCK):
+            embeddings = self.embed(feature_matrix[start:start + self.ENCODE_BLOCK])
+            lists = self._nearest(embeddings, self.centroids, self._centroid_norms)
+            residuals = embeddings - self.centroids[lists]
+            assignments[start:start + len(lists)] = lists
+            for j in range(self.n_subvectors):
+                part = residuals[:, j * sub_dim:(j + 1) * sub_dim]
+                codes[start:start + len(lists), j] = self._nearest(part, self.codebooks[j], self._codebook_norms[j])
+        return assignments, codes
+
+    def _with_lists(self, entry_lists: np.ndarray, list_rows: np.ndarray, codes: np.ndarray) -> 'AnnIndex':
+        """فهرس بالنموذج نفسه ومدخلات مرتبة حسب القائمة"""
+        list_offsets = np.zeros(self.n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(entry_lists, minlength=self.n_lists), out=list_offsets[1:])
+        return AnnIndex(self.components, self.centroids, self.codebooks,
+                        codes, list_rows, list_offsets, self.source_hash)
+
+    def candidates(self, query: np.ndarray, n_probe: int, count: int) -> np.ndarray:
+        """أقرب count صفاً تقريبياً لمتجه كثيف من القوائم n_probe الأقرب فقط"""
+        coarse = self._centroid_norms - 2 * self.centroids @ query
+        n_probe = min(n_probe, self.n_lists)
+        probe = np.argpartition(coarse, n_probe - 1)[:n_probe]
+
+        # جداول المسافات من باقي الاستعلام في كل قائمة إلى كل رمز: ||r||² - 2 r·c + ||c||²
+        sub_dim = self.codebooks.shape[2]
+        residuals = (query - self.centroids[probe]).reshape(n_probe, self.n_subvectors, 1, sub_dim)
+        tables = self._codebook_norms - 2 * (residuals @ self.codebooks.transpose(0, 2, 1))[:, :, 0]
+        base = (residuals ** 2).sum(axis=(1, 2, 3))
+
+        subvectors = np.arange(self.n_subvectors)
+        rows, distances = [], []
+        for i, lst in enumerate(probe.tolist()):
+            lo, hi = self.list_offsets[lst], self.list_offsets[lst + 1]
+            if lo == hi:
+                continue
+            # مجموع قيم الجدول لرموز كل صف يقارب المسافة دون فك الترميز
+            distances.append(base[i] + tables[i][subvectors, self.codes[lo:hi]].sum(axis=1))
+            rows.append(self.list_rows[lo:hi])
+
+        if not rows:
+            return np.empty(0, dtype=np.int64)
+        rows = np.concatenate(rows)
+        distances = np.concatenate(distances)
+        return rows[top_k_indices(-distances, count)].astype(np.int64)
+
+    def save(self, directory: str):
+        """حفظ النموذج والترميز كملفات npy بجانب نموذج TF-IDF"""
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, self.META_FILE)
+
+        # حذف البيانات الوصفية أولاً حتى لا يُقرأ فهرس نصف مكتوب على أنه صالح
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        for name in self.MODEL_FILES + self.DATA_FILES:
+            tmp_path = os.path.join(directory, f'{name}.tmp.npy')
+            np.save(tmp_path, np.ascontiguousarray(getattr(self, name)))
+            os.replace(tmp_path, os.path.join(directory, f'{name}.npy'))
+
+        meta = {
+            'version': self.FORMAT_VERSION,
+            'source_hash': self.source_hash,
+            'size': len(self)
+        }
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory: str, source_hash: str = None, size: int = None,
+             mmap: bool = True) -> Optional['AnnIndex']:
+        """تحميل الفهرس إذا كان صالحاً ومطابقاً للنموذج الحالي"""
+        try:
+            with open(os.path.join(directory, cls.META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+
+            if meta.get('version') != cls.FORMAT_VERSION:
+                return None
+            if source_hash is not None and meta.get('source_hash') != source_hash:
+                return None
+            if size is not None and meta.get('size') != size:
+                return None
+
+            mmap_mode = 'r' if mmap else None
+            arrays = {
+                name: np.load(os.path.join(directory, f'{name}.npy'),
+                              mmap_mode=mmap_mode if name in cls.DATA_FILES else None)
+                for name in cls.MODEL_FILES + cls.DATA_FILES
+            }
+            index = cls(**arrays, source_hash=meta.get('source_hash'))
+            return index if len(index) == meta.get('size') else None
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+class AnnSimilarityEngine(SimilarityEngine):
+    """محرك تشابه بنفس واجهة SimilarityEngine يسترجع المرشحين من AnnIndex ويعيد ترتيبهم بالتشابه الدقيق"""
+
+    def __init__(self, feature_matrix, ann_index: AnnIndex, n_probe: int = None, rerank: int = None):
+        super().__init__(feature_matrix)
+        self.ann_index = ann_index
+        self.n_probe = n_probe or ANN_CONFIG['n_probe']
+        self.rerank = rerank or ANN_CONFIG['rerank']
+
+    def top_k(self, row_indices, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """أعلى k جيران لكل صف: مرشحون تقريبيون ثم جيب تمام دقيق على TF-IDF"""
+        row_indices = np.asarray(row_indices, dtype=np.int64)
+        k = min(k, self.n_rows)
+        neighbor_ids = np.empty((len(row_indices), k), dtype=np.int64)
+        neighbor_scores = np.empty((len(row_indices), k), dtype=np.float64)
+        queries = self.ann_index.embed(self.feature_matrix[row_indices])
+
+        for i, row in enumerate(row_indices.tolist()):
+            candidates = self.ann_index.candidates(queries[i], self.n_probe, k * self.rerank)
+            # مرتبة تصاعدياً حتى يطابق حل التعادل ترتيب المسار الدقيق
+            candidates = np.unique(np.append(candidates, row))
+            if len(candidates) < k:
+                # قوائم القرب لم تعطِ مرشحين كافين: حساب كامل لهذا الصف فقط
+                candidates = np.arange(self.n_rows)
+
+            query_row = self.feature_matrix[row].toarray().ravel()
+            scores = self.feature_matrix[candidates] @ query_row
+            top = top_k_indices(scores, k)
+            neighbor_ids[i] = candidates[top]
+            neighbor_scores[i] = scores[top]
+
+        return neighbor_ids, neighbor_scores
+
+
+if __name__ == "__main__":
+    # بناء فهرس ANN وحفظه بجانب النموذج: python ann_index.py [مسار ملف البيانات]
+    import sys
+    from data_manager import DataManager
+    from recommender import BookRecommender
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'programming_books_dataset.csv'
+    recommender = BookRecommender(DataManager(csv_path))
+    index = recommender.build_ann_index(force=True)
+    print(f"تم بناء فهرس ANN: {len(index)} كتاب، {index.n_lists} قائمة، {index.n_subvectors} جزء")
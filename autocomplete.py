@@ -0,0 +1,190 @@
+import heapq
+import math
+import re
+import numpy as np
+import pandas as pd
+from bisect import bisect_left
+from typing import Dict, List
+
+SEPARATOR_PATTERN = re.compile(r'[\W_]+')
+TAG_SEPARATOR = ','
+
+
+def normalize(text: str) -> str:
+    """توحيد النص للمطابقة: حروف صغيرة ومسافة واحدة بدل الرموز والفواصل"""
+    return SEPARATOR_PATTERN.sub(' ', str(text).casefold()).strip()
+
+
+class RangeMax:
+    """أعلى قيمة في مدى من مصفوفة ثابتة: جدول متناثر على كتل بدل العناصر لتقليل الذاكرة"""
+
+    def __init__(self, values: np.ndarray, block: int = 64):
+        self.values = values
+        self.block = block
+        n_blocks = max((len(values) + block - 1) // block, 1)
+
+        # موقع أعلى قيمة في كل كتلة
+        padded = np.full(n_blocks * block, -np.inf)
+        padded[:len(values)] = values
+        self._block_best = padded.reshape(n_blocks, block).argmax(axis=1) + np.arange(n_blocks) * block
+
+        # table[k][i] موقع أعلى قيمة في الكتل من i إلى i + 2^k - 1
+        self._table = [self._block_best]
+        width = 1
+        while width * 2 <= n_blocks:
+            previous = self._table[-1]
+            left, right = previous[:-width], previous[width:]
+            self._table.append(np.where(values[left] >= values[right], left, right))
+            width *= 2
+
+    def _best(self, a: int, b: int) -> int:
+        return a if self.values[a] >= self.values[b] else b
+
+    def _blocks_max(self, first: int, last: int) -> int:
+        """أعلى قيمة في الكتل من first إلى last شاملة"""
+        level = (last - first + 1).bit_length() - 1
+        table = self._table[level]
+        return self._best(int(table[first]), int(table[last - (1 << level) + 1]))
+
+    def argmax(self, lo: int, hi: int) -> int:
+        """موقع أعلى قيمة في المدى [lo, hi)"""
+        first, last = lo // self.block, (hi - 1) // self.block
+        if first == last:
+            return lo + int(self.values[lo:hi].argmax())
+
+        # طرفا المدى جزئيان يفحصان مباشرة، والكتل الكاملة بينهما من الجدول
+        first_end = (first + 1) * self.block
+        last_start = last * self.block
+        best = self._best(lo + int(self.values[lo:first_end].argmax()),
+                          last_start + int(self.values[last_start:hi].argmax()))
+        if first + 1 <= last - 1:
+            best = self._best(best, self._blocks_max(first + 1, last - 1))
+        return best
+
+
+class AutocompleteIndex:
+    """فهرس بادئات مرتب للإكمال التلقائي على العناوين والمؤلفين والفئات والعلامات"""
+
+    KINDS = ('title', 'author', 'category', 'tag')
+    POPULARITY_WEIGHT = 0.5   # وزن عدد الكتب (لوغاريتمياً) مقارنة بمتوسط التقييم
+    WORD_PENALTY = 0.25       # مطابقة بداية كلمة داخلية أضعف من مطابقة بداية النص
+
+    def __init__(self, df: pd.DataFrame):
+        self.entries: List[tuple] = []  # (النص المعروض، النوع، معرف الكتاب أو None)
+        keys: List[tuple] = []  # (المفتاح الموحد، رقم المدخل، الدرجة)
+
+        for kind, groups in self._group_entries(df):
+            for key, text, count, rating, book_id in groups:
+                entry = len(self.entries)
+                self.entries.append((text, kind, book_id if kind == 'title' else None))
+                score = rating + self.POPULARITY_WEIGHT * math.log(count)
+
+                # مفتاح لبداية النص ومفتاح لبداية كل كلمة بعدها ('learning' تكمل 'Machine Learning')
+                keys.append((key, entry, score))
+                start = key.find(' ') + 1
+                while start:
+                    keys.append((key[start:], entry, score - self.WORD_PENALTY))
+                    start = key.find(' ', start) + 1
+
+        keys.sort(key=lambda k: k[0])
+        self.keys = [k[0] for k in keys]
+        self._entry_ids = np.array([k[1] for k in keys], dtype=np.int32)
+        self._scores = np.array([k[2] for k in keys], dtype=np.float64)
+        self._range_max = RangeMax(self._scores)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _group_entries(df: pd.DataFrame):
+        """تجميع كل نوع حسب نصه الموحد: عدد الكتب ومتوسط التقييم ومعرف أعلاها تقييماً"""
+        ratings = np.round(df['rating'].to_numpy(dtype=np.float64), 6)
+        frame = pd.DataFrame({'rating': ratings, 'book_id': df['book_id'].to_numpy()}, index=df.index)
+
+        tags = df['tags'].astype(str).str.split(TAG_SEPARATOR)
+        sources = {
+            'title': df['title'].astype(str),
+            'author': df['author'].astype(str),
+            'category': df['category'].astype(str),
+            'tag': tags.explode().str.strip()
+        }
+
+        for kind in AutocompleteIndex.KINDS:
+            values = sources[kind]
+            rows = frame.loc[values.index].reset_index(drop=True)
+            rows['text'] = values.to_numpy()
+            # النصوص المكررة (خاصة العلامات والفئات) توحد مرة واحدة
+            unique = pd.unique(rows['text'])
+            rows['key'] = rows['text'].map(dict(zip(unique, map(normalize, unique))))
+            rows = rows[rows['key'] != ''].sort_values('rating', ascending=False, kind='stable')
+
+            grouped = rows.groupby('key', sort=False).agg(
+                text=('text', 'first'),
+                count=('rating', 'size'),
+                rating=('rating', 'mean'),
+                book_id=('book_id', 'first')
+            )
+            yield kind, zip(grouped.index.tolist(), grouped['text'].tolist(), grouped['count'].tolist(),
+                            grouped['rating'].tolist(), grouped['book_id'].tolist())
+
+    def _prefix_range(self, prefix: str) -> tuple:
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + '\U0010ffff', lo)
+        return lo, hi
+
+    def complete(self, text: str, limit: int = 8, kinds=None) -> List[Dict]:
+        """أفضل الإكمالات لبادئة مرتبة بالدرجة دون فحص كل المطابقات"""
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        # مسافة في نهاية النص تعني أن الكلمة الأخيرة مكتملة
+        if SEPARATOR_PATTERN.fullmatch(text[-1]):
+            prefix += ' '
+
+        lo, hi = self._prefix_range(prefix)
+        if lo >= hi:
+            return []
+
+        # أفضل عنصر في المدى ثم تقسيمه حوله: m نتائج بتكلفة O(m log m) مهما كان عدد المطابقات
+        heap = []
+
+        def push(a, b):
+            if a < b:
+                best = self._range_max.argmax(a, b)
+                heapq.heappush(heap, (-self._scores[best], best, a, b))
+
+        push(lo, hi)
+        results, seen = [], set()
+        while heap and len(results) < limit:
+            score, best, a, b = heapq.heappop(heap)
+            push(a, best)
+            push(best + 1, b)
+
+            entry = int(self._entry_ids[best])
+            if entry in seen:
+                continue
+            seen.add(entry)
+            display, kind, book_id = self.entries[entry]
+            if kinds and kind not in kinds:
+                continue
+            results.append({'text': display, 'kind': kind, 'book_id': book_id, 'score': -float(score)})
+
+        return results
+
+
+if __name__ == "__main__":
+    # تجربة سريعة: python autocomplete.py [بادئة]
+    import sys
+    import time
+    from data_manager import DataManager
+
+    data_manager = DataManager('programming_books_dataset.csv')
+    index = data_manager.autocomplete
+    prefix = sys.argv[1] if len(sys.argv) > 1 else 'py'
+
+    start = time.perf_counter()
+    completions = index.complete(prefix)
+    elapsed = (time.perf_counter() - start) * 1e6
+    for completion in completions:
+        print(f"{completion['kind']:<9} {completion['score']:.2f}  {completion['text']}")
+    print(f"{len(index)} مدخل، {len(index.keys)} مفتاح، {elapsed:.0f} ميكروثانية")
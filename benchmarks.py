@@ -0,0 +1,333 @@
+import io
+import os
+import time
+import tempfile
+import contextlib
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List
+
+
+def make_synthetic_catalog(source_csv: str, n_rows: int, output_csv: str) -> str:
+    """إنشاء ملف بيانات اصطناعي كبير بتكرار الكتب الأصلية مع عناوين مختلفة"""
+    source = pd.read_csv(source_csv)
+    repeats = -(-n_rows // len(source))
+    df = pd.concat([source] * repeats, ignore_index=True).iloc[:n_rows].copy()
+
+    edition = np.arange(n_rows) // len(source)
+    df['book_id'] = np.arange(1, n_rows + 1)
+    df['title'] = df['title'] + np.where(edition > 0, ' Vol. ' + edition.astype(str), '')
+    df.to_csv(output_csv, index=False)
+    return output_csv
+
+
+def measure(fn: Callable, inputs: List, repeat: int = 1) -> Dict:
+    """قياس زمن الاستدعاء لكل مدخل وإرجاع المئينات بالمللي ثانية"""
+    samples = []
+    for _ in range(repeat):
+        for item in inputs:
+            start = time.perf_counter()
+            fn(item)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    samples = np.asarray(samples)
+    return {
+        'calls': len(samples),
+        'p50_ms': float(np.percentile(samples, 50)),
+        'p99_ms': float(np.percentile(samples, 99)),
+        'max_ms': float(samples.max())
+    }
+
+
+def load_recommender(csv_path: str):
+    """تحميل مدير البيانات ونظام التوصية بدون رسائل الطباعة"""
+    from data_manager import DataManager
+    from recommender import BookRecommender
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        data_manager = DataManager(csv_path)
+        recommender = BookRecommender(data_manager)
+    return data_manager, recommender
+
+
+def bench_recommend(recommender, queries: List[str] = None, repeat: int = 3) -> Dict:
+    """زمن recommend_books لاستعلامات بعدد مطابقات مختلف للعناوين"""
+    queries = queries or ['python', 'the', 'data', 'learning', 'a', 'clean code', 'design']
+
+    def recommend(query):
+        # تفريغ الذاكرة المؤقتة حتى يقاس المسار الكامل في كل تكرار
+        recommender.query_cache.clear()
+        recommender.recommend_books(query, max_results=12)
+
+    return measure(recommend, queries, repeat)
+
+
+def bench_query_cache(recommender, queries: List[str] = None, repeat: int = 3) -> Dict:
+    """زمن recommend_books للاستعلامات المتكررة (من الذاكرة المؤقتة) مقارنة بأول تنفيذ"""
+    queries = queries or ['python', 'the', 'data', 'learning', 'a', 'clean code', 'design']
+    recommender.query_cache.clear()
+    before = dict(recommender.query_cache.stats)
+    cold = measure(lambda q: recommender.recommend_books(q, max_results=12), queries)
+    warm = measure(lambda q: recommender.recommend_books(q, max_results=12), queries, repeat)
+    hits, misses = (recommender.query_cache.stats[k] - before[k] for k in ('hits', 'misses'))
+    return {
+        'cold_p50_ms': cold['p50_ms'],
+        'warm_p50_ms': warm['p50_ms'],
+        'hit_rate': hits / (hits + misses)
+    }
+
+
+def bench_similar(recommender, repeat: int = 3) -> Dict:
+    """زمن get_similar_books لعينة من الكتب"""
+    book_ids = recommender.df['book_id'].sample(min(50, len(recommender.df)), random_state=0).tolist()
+    return measure(lambda b: recommender.get_similar_books(b, 5), book_ids, repeat)
+
+
+def bench_batch(recommender, n_queries: int = 1000) -> Dict:
+    """الإنتاجية (استعلام/ثانية) لواجهات الدفعات مقارنة باستدعاء الدالة المفردة في حلقة"""
+    sample = recommender.df.sample(n_queries, replace=True, random_state=0)
+    book_ids = sample['book_id'].tolist()
+    # أول كلمتين من العنوان كاستعلامات محفوظة (بلا رموز التعابير النمطية)
+    queries = sample['title'].str.replace(r'[^\w ]', '', regex=True).str.split().str[:2].str.join(' ').tolist()
+
+    def throughput(fn) -> float:
+        start = time.perf_counter()
+        fn()
+        return n_queries / (time.perf_counter() - start)
+
+    recommender.query_cache.clear()
+    return {
+        'recommend_loop_qps': throughput(lambda: [recommender._recommend_books(q, None, None, None, 0.0, 10)
+                                                  for q in queries]),
+        'recommend_batch_qps': throughput(lambda: list(recommender.recommend_books_batch(queries))),
+        'similar_loop_qps': throughput(lambda: [recommender.get_similar_books(b) for b in book_ids]),
+        'similar_batch_qps': throughput(lambda: list(recommender.get_similar_books_batch(book_ids)))
+    }
+
+
+def bench_fuzzy_titles(recommender, n_queries: int = 100, repeat: int = 3) -> Dict:
+    """زمن المطابقة الغامضة لعناوين بها أخطاء إملائية عشوائية"""
+    rng = np.random.default_rng(0)
+    titles = recommender.df['title'].sample(min(n_queries, len(recommender.df)), random_state=0)
+
+    queries = []
+    for title in titles:
+        chars = list(title.lower())
+        for pos in rng.choice(len(chars), size=min(2, len(chars)), replace=False):
+            chars[pos] = 'x'
+        queries.append(''.join(chars))
+
+    return measure(lambda q: recommender.fuzzy_matcher.match(q), queries, repeat)
+
+
+def bench_fuzzy_matcher(source_titles, n_titles: int = 100_000, n_queries: int = 100, n_checked: int = 5,
+                        repeat: int = 3) -> Dict:
+    """زمن المطابقة الغامضة على n_titles عنوان اصطناعي، ونسبة تطابق نتائجها مع المسح الكامل بـ fuzz.ratio"""
+    from fuzzywuzzy import fuzz
+    from fuzzy_matcher import FuzzyTitleMatcher
+
+    source = pd.Series(source_titles, dtype=object).reset_index(drop=True)
+    repeats = -(-n_titles // len(source))
+    edition = np.arange(n_titles) // len(source)
+    titles = (pd.concat([source] * repeats, ignore_index=True).iloc[:n_titles] +
+              np.where(edition > 0, ' Vol. ' + edition.astype(str), '')).tolist()
+
+    start = time.perf_counter()
+    matcher = FuzzyTitleMatcher(titles)
+    build_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    queries = []
+    for row in rng.choice(n_titles, size=n_queries, replace=False):
+        chars = list(titles[row].lower())
+        for pos in rng.choice(len(chars), size=min(2, len(chars)), replace=False):
+            chars[pos] = 'x'
+        queries.append(''.join(chars))
+
+    # المسح الكامل بطيء لذا يُفحص عدد قليل من الاستعلامات فقط
+    agreed = 0
+    for query in queries[:n_checked]:
+        scores = [(row, fuzz.ratio(query, title)) for row, title in enumerate(matcher.titles)]
+        expected = sorted([x for x in scores if x[1] > 70], key=lambda x: x[1], reverse=True)[:5]
+        agreed += matcher.match(query) == [row for row, _ in expected]
+
+    return {
+        'titles': n_titles,
+        'build_seconds': build_seconds,
+        'bounds_p50_ms': measure(lambda query: matcher._bounds(query.lower(), 70), queries, repeat)['p50_ms'],
+        'match_p50_ms': measure(matcher.match, queries, repeat)['p50_ms'],
+        'match_p99_ms': measure(matcher.match, queries, repeat)['p99_ms'],
+        'exact_agreement': agreed / max(n_checked, 1)
+    }
+
+
+def bench_search(data_manager, queries: List[str] = None, repeat: int = 3) -> Dict:
+    """زمن search_books عبر الفهرس المقلوب مقارنة بالمسح الكامل"""
+    queries = queries or ['python', 'machine learning', 'robert', 'security', 'zzz', 'web dev']
+    return {
+        'index': measure(data_manager.search_books, queries, repeat)['p50_ms'],
+        'scan': measure(data_manager._scan_books, queries, repeat)['p50_ms']
+    }
+
+
+def bench_autocomplete(data_manager, repeat: int = 20) -> Dict:
+    """زمن بناء فهرس الإكمال التلقائي وزمن الإكمال لبادئات بأطوال مختلفة بالميكروثانية"""
+    from autocomplete import AutocompleteIndex
+
+    start = time.perf_counter()
+    index = AutocompleteIndex(data_manager.df)
+    build_seconds = time.perf_counter() - start
+
+    prefixes = ['p', 'py', 'pyth', 'machine l', 'a', 'data ', 'zzz']
+    result = measure(index.complete, prefixes, repeat)
+    return {
+        'keys': len(index.keys),
+        'build_seconds': build_seconds,
+        'p50_us': result['p50_ms'] * 1000,
+        'p99_us': result['p99_ms'] * 1000
+    }
+
+
+def bench_ann(recommender, k: int = 10, n_queries: int = 100, fractions=(0.125, 0.25, 0.5, 1.0)) -> Dict:
+    """الاستدعاء (recall@k) وزمن الاستعلام لفهرس ANN مقارنة بالتشابه الدقيق على أحجام كتالوج متزايدة"""
+    from ann_index import AnnIndex, AnnSimilarityEngine
+    from similarity_engine import SimilarityEngine, drop_self
+
+    rng = np.random.default_rng(0)
+    feature_matrix = recommender.feature_matrix
+    results = {}
+    for fraction in fractions:
+        n_rows = max(int(feature_matrix.shape[0] * fraction), k + 2)
+        matrix = feature_matrix[:n_rows]
+        exact = SimilarityEngine(matrix)
+        start = time.perf_counter()
+        approximate = AnnSimilarityEngine(matrix, AnnIndex.train(matrix))
+        build_seconds = time.perf_counter() - start
+
+        queries = rng.choice(n_rows, min(n_queries, n_rows), replace=False).tolist()
+        # الصف نفسه بين النتائج في المسارين لذا يقارن ما عداه فقط
+        truth = drop_self(queries, *exact.top_k(queries, k + 1))[0]
+        found = drop_self(queries, *approximate.top_k(queries, k + 1))[0]
+        recall = np.mean([len(set(t) & set(f)) / k for t, f in zip(truth.tolist(), found.tolist())])
+
+        results[n_rows] = {
+            'recall': float(recall),
+            'exact_p50_ms': measure(lambda q: exact.top_k([q], k + 1), queries)['p50_ms'],
+            'ann_p50_ms': measure(lambda q: approximate.top_k([q], k + 1), queries)['p50_ms'],
+            'build_seconds': build_seconds
+        }
+    return results
+
+
+def bench_parallel_build(recommender, max_workers: int = None) -> Dict:
+    """منحنى تسريع بناء الجيران الدقيق من عملية واحدة حتى عدد الأنوية"""
+    from parallel_build import speedup_curve
+
+    curve = speedup_curve(recommender.feature_matrix, recommender._neighbors_k() + 1, max_workers, report=None)
+    return {point['workers']: round(point['speedup'], 2) for point in curve}
+
+
+def bench_memory(data_manager, csv_path: str) -> Dict:
+    """حجم الجدول في الذاكرة قبل ضغط الأعمدة وبعده بالميجابايت"""
+    raw = pd.read_csv(csv_path, dtype={c: object for c in data_manager.STRING_COLUMNS})
+    return {
+        'raw_mb': raw.memory_usage(deep=True).sum() / 2 ** 20,
+        'compact_mb': data_manager.memory_report()['total'] / 2 ** 20
+    }
+
+
+def bench_library(n_books: int = 1000, repeat: int = 3) -> Dict:
+    """زمن عمليات المكتبة الشخصية على قاعدة بيانات مؤقتة باتصال دائم"""
+    from library_manager import LibraryManager
+    queries = ['Book 12345', 'Author 7', 'zzz', 'auth']
+
+    with tempfile.TemporaryDirectory() as directory:
+        library = LibraryManager(os.path.join(directory, 'bench_library.db'))
+        start = time.perf_counter()
+        library.add_books_bulk({'title': f'Book {i}', 'author': f'Author {i % 50}', 'tags': 'bench'}
+                               for i in range(n_books))
+        bulk_seconds = time.perf_counter() - start
+        book_ids = [book['id'] for book in library.get_all_books()]
+        result = {
+            'bulk_insert_rows_per_s': n_books / bulk_seconds,
+            'get_book_by_id_p50_ms': measure(library.get_book_by_id, book_ids[:200], repeat)['p50_ms'],
+            'update_book_p50_ms': measure(lambda b: library.update_book(b, personal_rating=4), book_ids[:200])['p50_ms'],
+            'search_books_p50_ms': measure(lambda q: library.search_books(q, limit=200), queries, repeat)['p50_ms'],
+            'search_like_p50_ms': measure(library._search_like, queries, repeat)['p50_ms']
+        }
+        library.close()
+    return result
+
+
+def _reference_difficulty(row) -> str:
+    """القاعدة الأصلية لتحديد الصعوبة صفاً بصف (مرجع للمقارنة)"""
+    pages = row['pages']
+    tags = str(row['tags']).lower()
+    if pages < 300:
+        return 'مبتدئ' if any(w in tags for w in ['beginner', 'introduction', 'basics', 'مبتدئ']) else 'متوسط'
+    elif pages < 600:
+        return 'متقدم' if any(w in tags for w in ['advanced', 'deep', 'comprehensive', 'متقدم']) else 'متوسط'
+    return 'متقدم'
+
+
+def _reference_rating_category(rating) -> str:
+    """القاعدة الأصلية لفئة التقييم عنصراً بعنصر (مرجع للمقارنة)"""
+    for limit, label in [(4.7, 'ممتاز'), (4.3, 'جيد جداً'), (4.0, 'جيد'), (3.5, 'متوسط')]:
+        if rating >= limit:
+            return label
+    return 'ضعيف'
+
+
+def bench_derived_columns(data_manager, csv_path: str) -> Dict:
+    """زمن حساب عمودي الصعوبة وفئة التقييم بالطريقة المتجهة مقارنة بـ apply"""
+    df = pd.read_csv(csv_path)
+    df['tags'] = df['tags'].fillna('')
+
+    start = time.perf_counter()
+    data_manager._add_difficulty_level(df)
+    data_manager._add_rating_category(df)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    difficulty = df.apply(_reference_difficulty, axis=1)
+    rating_category = df['rating'].apply(_reference_rating_category)
+    row_wise = time.perf_counter() - start
+
+    identical = (difficulty.tolist() == df['difficulty'].tolist() and
+                 rating_category.tolist() == df['rating_category'].tolist())
+    return {'vectorized_s': vectorized, 'apply_s': row_wise, 'identical': identical}
+
+
+def _print_result(name: str, result: Dict):
+    details = ', '.join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items())
+    print(f"{name}: {details}")
+
+
+def main(csv_path: str = 'programming_books_dataset.csv', n_rows: int = None):
+    """تشغيل مجموعة القياسات على ملف البيانات (أو نسخة اصطناعية بحجم n_rows)"""
+    if n_rows:
+        output = os.path.join(tempfile.gettempdir(), f'synthetic_books_{n_rows}.csv')
+        csv_path = make_synthetic_catalog(csv_path, n_rows, output)
+
+    start = time.perf_counter()
+    data_manager, recommender = load_recommender(csv_path)
+    _print_result('load', {'rows': len(data_manager.df), 'seconds': time.perf_counter() - start})
+
+    _print_result('recommend_books', bench_recommend(recommender))
+    _print_result('query_cache', bench_query_cache(recommender))
+    _print_result('get_similar_books', bench_similar(recommender))
+    _print_result('batch', bench_batch(recommender))
+    _print_result('ann', bench_ann(recommender))
+    _print_result('parallel_build_speedup', bench_parallel_build(recommender))
+    _print_result('fuzzy_titles', bench_fuzzy_titles(recommender))
+    _print_result('fuzzy_titles_100k', bench_fuzzy_matcher(data_manager.df['title']))
+    _print_result('search_books_p50_ms', bench_search(data_manager))
+    _print_result('autocomplete', bench_autocomplete(data_manager))
+    _print_result('derived_columns', bench_derived_columns(data_manager, csv_path))
+    _print_result('library', bench_library())
+    _print_result('memory', bench_memory(data_manager, csv_path))
+
+
+if __name__ == "__main__":
+    import sys
+    main(*sys.argv[1:2], *(int(a) for a in sys.argv[2:3]))
@@ -6,13 +6,16 @@ from config import COLORS, FONTS, ICONS, CARD_CONFIG
 
 class BookCard(ctk.CTkFrame):
     
-    def __init__(self, parent, book_data: Dict, on_click: Callable = None, **kwargs):
+    def __init__(self, parent, book_data: Dict = None, on_click: Callable = None, **kwargs):
         super().__init__(parent, **kwargs)
         
         self.book_data = book_data
         self.on_click = on_click
         self.colors = COLORS['dark']  # استخدام الوضع الداكن
         self.setup_ui()
+        # البطاقة قد تنشأ فارغة لتملأ لاحقاً من قائمة افتراضية
+        if book_data is not None:
+            self.update_data(book_data)
         
         # ربط الحدث النقر
         self.bind("<Button-1>", self._on_card_click)
@@ -49,7 +52,7 @@ class BookCard(ctk.CTkFrame):
         # عنوان الكتاب
         self.title_label = ctk.CTkLabel(
             self,
-            text=self.truncate_text(self.book_data['title'], 35),
+            text="",
             font=FONTS['subtitle'],
             text_color=self.colors['text'],
             anchor="w"
@@ -65,7 +68,7 @@ class BookCard(ctk.CTkFrame):
         # المؤلف
         self.author_label = ctk.CTkLabel(
             info_frame,
-            text=f"{ICONS['author']} {self.truncate_text(self.book_data['author'], 25)}",
+            text="",
             font=FONTS['small'],
             text_color=self.colors['text_secondary'],
             anchor="w"
@@ -75,7 +78,7 @@ class BookCard(ctk.CTkFrame):
         # الفئة
         self.category_label = ctk.CTkLabel(
             info_frame,
-            text=f"{ICONS['category']} {self.book_data['category']}",
+            text="",
             font=FONTS['small'],
             text_color=self.colors['secondary'],
             anchor="w"
@@ -87,10 +90,9 @@ class BookCard(ctk.CTkFrame):
         rating_frame.grid(row=1, column=0, columnspan=2, pady=5, sticky="ew")
         
         # النجوم
-        stars = "⭐" * int(self.book_data['rating'])
         self.rating_label = ctk.CTkLabel(
             rating_frame,
-            text=f"{stars} {self.book_data['rating']:.1f} ({self.book_data['rating_category']})",
+            text="",
             font=FONTS['small'],
             text_color=self.colors['warning'],
             anchor="w"
@@ -100,7 +102,7 @@ class BookCard(ctk.CTkFrame):
         # السنة
         self.year_label = ctk.CTkLabel(
             rating_frame,
-            text=f"{ICONS['year']} {self.book_data['year']}",
+            text="",
             font=FONTS['small'],
             text_color=self.colors['text_secondary'],
             anchor="e"
@@ -108,43 +110,67 @@ class BookCard(ctk.CTkFrame):
         self.year_label.pack(side="right")
         
         # الوصف (مختصر)
-        if self.book_data['description'] and self.book_data['description'] != 'لا يوجد وصف':
-            self.description_label = ctk.CTkLabel(
-                self,
-                text=self.truncate_text(self.book_data['description'], 80),
-                font=FONTS['small'],
-                text_color=self.colors['text_secondary'],
-                anchor="w",
-                wraplength=280
-            )
-            self.description_label.grid(row=2, column=0, columnspan=3, padx=15, pady=5, sticky="ew")
+        self.description_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=FONTS['small'],
+            text_color=self.colors['text_secondary'],
+            anchor="w",
+            wraplength=280
+        )
+        self.description_label.grid(row=2, column=0, columnspan=3, padx=15, pady=5, sticky="ew")
         
         # علامات الصعوبة والتقييم
         bottom_frame = ctk.CTkFrame(self, fg_color="transparent")
         bottom_frame.grid(row=3, column=0, columnspan=3, padx=15, pady=(5, 15), sticky="ew")
         
         # مستوى الصعوبة
-        difficulty_color = self._get_difficulty_color(self.book_data['difficulty'])
         self.difficulty_label = ctk.CTkLabel(
             bottom_frame,
-            text=f"{ICONS['difficulty']} {self.book_data['difficulty']}",
+            text="",
             font=FONTS['small'],
-            text_color=difficulty_color,
             anchor="w"
         )
         self.difficulty_label.pack(side="left")
         
         # عدد الصفحات
-        pages_color = self._get_pages_color(self.book_data['pages'])
         self.pages_label = ctk.CTkLabel(
             bottom_frame,
-            text=f"{ICONS['pages']} {self.book_data['pages']} صفحة",
+            text="",
             font=FONTS['small'],
-            text_color=pages_color,
             anchor="e"
         )
         self.pages_label.pack(side="right")
     
+    def update_data(self, book_data: Dict):
+        """عرض كتاب آخر في نفس البطاقة دون إعادة إنشاء عناصرها"""
+        self.book_data = book_data
+        
+        self.title_label.configure(text=self.truncate_text(book_data['title'], 35))
+        self.author_label.configure(text=f"{ICONS['author']} {self.truncate_text(book_data['author'], 25)}")
+        self.category_label.configure(text=f"{ICONS['category']} {book_data['category']}")
+        
+        stars = "⭐" * int(book_data['rating'])
+        self.rating_label.configure(
+            text=f"{stars} {book_data['rating']:.1f} ({book_data['rating_category']})"
+        )
+        self.year_label.configure(text=f"{ICONS['year']} {book_data['year']}")
+        
+        if book_data['description'] and book_data['description'] != 'لا يوجد وصف':
+            self.description_label.configure(text=self.truncate_text(book_data['description'], 80))
+            self.description_label.grid()
+        else:
+            self.description_label.grid_remove()
+        
+        self.difficulty_label.configure(
+            text=f"{ICONS['difficulty']} {book_data['difficulty']}",
+            text_color=self._get_difficulty_color(book_data['difficulty'])
+        )
+        self.pages_label.configure(
+            text=f"{ICONS['pages']} {book_data['pages']} صفحة",
+            text_color=self._get_pages_color(book_data['pages'])
+        )
+    
     def truncate_text(self, text: str, max_length: int) -> str:
         """تقصير النص إذا كان طويلاً"""
         if len(text) <= max_length:
@@ -0,0 +1,27 @@
+from typing import Dict, List
+
+# تنسيق صفوف الكتب للعرض والاستجابات؛ وحدة خفيفة يستوردها سطر الأوامر والخادم دون نموذج التوصية
+
+
+def format_book_results(books_df) -> List[Dict]:
+    """تنسيق نتائج الكتب"""
+    results = []
+    
+    for row in books_df.to_dict('records'):
+        result = {
+            'id': row['book_id'],
+            'title': row['title'],
+            'author': row['author'],
+            'category': row['category'],
+            'language': row['language'],
+            'rating': round(float(row['rating']), 6),  # التقييم مخزن كـ float32
+            'year': row['year'],
+            'pages': row['pages'],
+            'description': row['description'][:200] + '...' if len(str(row['description'])) > 200 else row['description'],
+            'tags': row['tags'],
+            'difficulty': row['difficulty'],
+            'rating_category': row['rating_category']
+        }
+        results.append(result)
+    
+    return results
@@ -0,0 +1,14 @@
+import pandas as pd
+
+# النص الموزون لكل كتاب الذي تُبنى منه ميزات TF-IDF؛ يستخدمه نموذج التوصية والقراءة المجزأة للكتالوج
+
+
+def weighted_text(df: pd.DataFrame) -> pd.Series:
+    """النص الموزون لمجموعة صفوف"""
+    return (
+        df['title'].astype(str) * 3 + ' ' +  # وزن أعلى للعنوان
+        df['category'].astype(str) * 2 + ' ' +  # وزن متوسط للفئة
+        df['tags'].astype(str) * 2 + ' ' +  # وزن متوسط للعلامات
+        df['author'].astype(str) + ' ' +  # وزن عادي للمؤلف
+        df['description'].astype(str)  # وزن عادي للوصف
+    ).str.replace('nan', '')
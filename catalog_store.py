@@ -0,0 +1,158 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+from typing import Iterator, List, Optional
+from config import INGEST_CONFIG, RECOMMENDER_CONFIG
+
+try:
+    import pyarrow  # noqa: F401
+    PART_FORMAT = 'parquet'
+except ImportError:
+    PART_FORMAT = 'pickle'
+
+
+class CatalogStore:
+    """مخزن عمودي على القرص لكتالوج مقسم إلى أجزاء مع ميزات مجزأة لكل جزء"""
+
+    FORMAT_VERSION = 1
+    META_FILE = 'meta.json'
+    DOCUMENT_FREQUENCY_FILE = 'document_frequency.npy'
+
+    def __init__(self, directory: str, n_features: int = None):
+        self.directory = directory
+        self.n_features = n_features or INGEST_CONFIG['n_features']
+        self.part_format = PART_FORMAT
+        self.parts: List[str] = []
+        self.rows = 0
+        self.source_hash = None
+        self.document_frequency = np.zeros(self.n_features, dtype=np.int64)
+
+        # المتجه المجزأ بلا حالة، لذا تحول كل دفعة دون رؤية بقية الكتالوج
+        params = RECOMMENDER_CONFIG['tfidf_params']
+        self.vectorizer = HashingVectorizer(
+            n_features=self.n_features,
+            stop_words=params['stop_words'],
+            ngram_range=params['ngram_range'],
+            alternate_sign=False,
+            norm=None
+        )
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def _frame_path(self, part: str) -> str:
+        extension = 'parquet' if self.part_format == 'parquet' else 'pkl'
+        return os.path.join(self.directory, f'{part}.{extension}')
+
+    def _features_path(self, part: str) -> str:
+        return os.path.join(self.directory, f'{part}.npz')
+
+    def reset(self):
+        """تفريغ المخزن قبل قراءة جديدة"""
+        os.makedirs(self.directory, exist_ok=True)
+        # حذف البيانات الوصفية أولاً حتى لا يُقرأ مخزن نصف مكتوب على أنه صالح
+        meta_path = os.path.join(self.directory, self.META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        for name in os.listdir(self.directory):
+            if name.startswith('part-'):
+                os.remove(os.path.join(self.directory, name))
+
+        self.parts = []
+        self.rows = 0
+        self.document_frequency[:] = 0
+
+    def append(self, frame: pd.DataFrame, texts: pd.Series):
+        """كتابة دفعة منظفة مع عدد مصطلحاتها المجزأة وتحديث تكرار المستندات"""
+        part = f'part-{len(self.parts):05d}'
+        if self.part_format == 'parquet':
+            frame.to_parquet(self._frame_path(part), index=False)
+        else:
+            frame.reset_index(drop=True).to_pickle(self._frame_path(part))
+
+        counts = self.vectorizer.transform(texts).tocsr()
+        sparse.save_npz(self._features_path(part), counts)
+        # كل مصطلح يظهر مرة واحدة في فهارس الصف، فعدّ الفهارس يعطي تكرار المستندات
+        self.document_frequency += np.bincount(counts.indices, minlength=self.n_features)
+
+        self.parts.append(part)
+        self.rows += len(frame)
+
+    def finalize(self, source_hash: str = None):
+        """حفظ تكرار المستندات والبيانات الوصفية بعد آخر دفعة"""
+        self.source_hash = source_hash
+        np.save(os.path.join(self.directory, self.DOCUMENT_FREQUENCY_FILE), self.document_frequency)
+        meta = {
+            'version': self.FORMAT_VERSION,
+            'source_hash': source_hash,
+            'format': self.part_format,
+            'n_features': self.n_features,
+            'rows': self.rows,
+            'parts': self.parts
+        }
+        with open(os.path.join(self.directory, self.META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory: str, source_hash: str = None) -> Optional['CatalogStore']:
+        """فتح مخزن مكتمل أو None إذا كان غير موجود أو لا يطابق ملف البيانات"""
+        try:
+            with open(os.path.join(directory, cls.META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+
+            if meta.get('version') != cls.FORMAT_VERSION:
+                return None
+            if source_hash is not None and meta.get('source_hash') != source_hash:
+                return None
+
+            store = cls(directory, meta['n_features'])
+            store.part_format = meta['format']
+            store.parts = meta['parts']
+            store.rows = meta['rows']
+            store.source_hash = meta['source_hash']
+            store.document_frequency = np.load(os.path.join(directory, cls.DOCUMENT_FREQUENCY_FILE))
+            return store
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def iter_frames(self, columns: List[str] = None) -> Iterator[pd.DataFrame]:
+        """قراءة الأجزاء واحداً تلو الآخر (الأعمدة المطلوبة فقط في parquet)"""
+        for part in self.parts:
+            if self.part_format == 'parquet':
+                yield pd.read_parquet(self._frame_path(part), columns=columns)
+            else:
+                frame = pd.read_pickle(self._frame_path(part))
+                yield frame if columns is None else frame[columns]
+
+    def read_frame(self, columns: List[str] = None) -> pd.DataFrame:
+        return pd.concat(self.iter_frames(columns), ignore_index=True)
+
+    @property
+    def idf(self) -> np.ndarray:
+        """أوزان idf من المرور الأول (نفس صيغة TfidfVectorizer مع smooth_idf)"""
+        return np.log((1 + self.rows) / (1 + self.document_frequency)) + 1
+
+    def iter_features(self) -> Iterator[sparse.csr_matrix]:
+        """المرور الثاني: مصفوفات TF-IDF مطبعة لكل جزء"""
+        idf = self.idf
+        for part in self.parts:
+            counts = sparse.load_npz(self._features_path(part))
+            yield normalize(counts.multiply(idf).tocsr())
+
+    def feature_matrix(self) -> sparse.csr_matrix:
+        return sparse.vstack(list(self.iter_features()), format='csr')
+
+
+if __name__ == "__main__":
+    # قراءة ملف كبير على دفعات: python catalog_store.py [مسار ملف البيانات] [حجم الدفعة]
+    import sys
+    from data_manager import DataManager
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'programming_books_dataset.csv'
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    store = DataManager(csv_path, chunk_size=chunk_size or INGEST_CONFIG['chunk_size']).catalog_store
+    print(f"تم حفظ {len(store)} كتاب في {len(store.parts)} جزء داخل {store.directory}")
@@ -0,0 +1,164 @@
+import argparse
+import contextlib
+import os
+import sys
+import time
+from typing import Iterator, List
+
+# واجهة سطر أوامر بلا واجهة رسومية: لا تستورد customtkinter، والوحدات الخلفية تُستورد داخل كل أمر
+# حتى لا يدفع الأمر زمن استيراد ما لا يحتاجه (python -m cli recommend python)
+DEFAULT_DATA = 'programming_books_dataset.csv'
+
+
+def read_inputs(values: List[str]) -> Iterator[str]:
+    """القيم من المعاملات، أو من الدخل القياسي سطراً سطراً إن لم تُعط أو أُعطيت '-'"""
+    if values and values != ['-']:
+        yield from values
+        return
+    for line in sys.stdin:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def load_recommender(csv_path: str):
+    """تحميل البيانات والنموذج من التخزين المؤقت؛ رسائل التحميل تذهب إلى stderr حتى يبقى stdout للنتائج"""
+    from data_manager import DataManager
+    from recommender import BookRecommender
+
+    with contextlib.redirect_stdout(sys.stderr):
+        data_manager = DataManager(csv_path)
+        recommender = BookRecommender(data_manager)
+    return data_manager, recommender
+
+
+def print_results(key, results: List, output_format: str):
+    if output_format == 'json':
+        from server import dumps
+        sys.stdout.write(dumps({'query': key, 'results': results}).decode('utf-8') + '\n')
+        return
+    print(f"# {key} ({len(results)})")
+    for book in results:
+        print(f"{book['id']}\t{book['rating']:.1f}\t{book['title']} — {book['author']}")
+
+
+def cmd_recommend(args):
+    _, recommender = load_recommender(args.data)
+    filters = {
+        'category': args.category,
+        'language': args.language,
+        'difficulty': args.difficulty,
+        'min_rating': args.min_rating
+    }
+    # الاستعلامات تُقرأ دفعة دفعة وتمر عبر واجهة الدفعات بدل استدعاء لكل سطر
+    for query, results in recommender.recommend_books_batch(read_inputs(args.queries), filters, args.limit):
+        print_results(query, results, args.format)
+
+
+def cmd_similar(args):
+    _, recommender = load_recommender(args.data)
+
+    def book_ids():
+        for value in read_inputs(args.book_ids):
+            try:
+                yield int(value)
+            except ValueError:
+                print(f"معرف كتاب غير صالح: {value}", file=sys.stderr)
+
+    for book_id, results in recommender.get_similar_books_batch(book_ids(), args.k):
+        print_results(book_id, results, args.format)
+
+
+def cmd_search(args):
+    # البحث لا يحتاج نموذج التوصية: الجدول وفهرس البحث فقط
+    from book_format import format_book_results
+    from data_manager import DataManager
+
+    with contextlib.redirect_stdout(sys.stderr):
+        data_manager = DataManager(args.data)
+    for query in read_inputs(args.queries):
+        matches = data_manager.search_books(query)
+        top = matches.nlargest(args.limit, 'rating') if not matches.empty else matches
+        results = format_book_results(top) if not top.empty else []
+        print_results(query, results, args.format)
+
+
+def cmd_build_index(args):
+    """بناء النموذج وفهرس الجيران (وفهرس ANN اختيارياً) وحفظها حتى تبدأ الأوامر التالية من التخزين المؤقت"""
+    start = time.perf_counter()
+    _, recommender = load_recommender(args.data)
+    print(f"النموذج: {recommender.feature_matrix.shape[0]} كتاب × {recommender.feature_matrix.shape[1]} ميزة "
+          f"({time.perf_counter() - start:.2f} ثانية)")
+
+    start = time.perf_counter()
+    index = recommender.build_neighbor_index(force=True, workers=args.workers)
+    print(f"فهرس الجيران: {len(index)} كتاب × {index.k} جار ({time.perf_counter() - start:.2f} ثانية)")
+
+    if args.ann:
+        start = time.perf_counter()
+        recommender.build_ann_index(force=True)
+        print(f"فهرس ANN ({time.perf_counter() - start:.2f} ثانية)")
+
+
+def cmd_bench(args):
+    import benchmarks
+    benchmarks.main(args.data, args.rows)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m cli', description="نظام توصية الكتب من سطر الأوامر")
+    parser.add_argument('--data', default=DEFAULT_DATA, help="مسار ملف البيانات")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_output_options(command, limit_default=None):
+        command.add_argument('--format', choices=('text', 'json'), default='text',
+                             help="نص مقروء أو سطر JSON لكل استعلام")
+        if limit_default is not None:
+            command.add_argument('--limit', type=int, default=limit_default, help="أقصى عدد للنتائج")
+
+    recommend = commands.add_parser('recommend', help="توصيات لاستعلام أو أكثر (من stdin إن لم تُعط)")
+    recommend.add_argument('queries', nargs='*', help="الاستعلامات، أو '-' للقراءة من stdin")
+    recommend.add_argument('--category')
+    recommend.add_argument('--language')
+    recommend.add_argument('--difficulty')
+    recommend.add_argument('--min-rating', type=float, default=0.0)
+    add_output_options(recommend, 10)
+    recommend.set_defaults(handler=cmd_recommend)
+
+    similar = commands.add_parser('similar', help="الكتب المشابهة لمعرف أو أكثر (من stdin إن لم تُعط)")
+    similar.add_argument('book_ids', nargs='*', help="معرفات الكتب، أو '-' للقراءة من stdin")
+    similar.add_argument('-k', type=int, default=5, help="عدد الكتب المشابهة")
+    add_output_options(similar)
+    similar.set_defaults(handler=cmd_similar)
+
+    search = commands.add_parser('search', help="بحث نصي في العناوين والمؤلفين والفئات والعلامات")
+    search.add_argument('queries', nargs='*', help="نصوص البحث، أو '-' للقراءة من stdin")
+    add_output_options(search, 10)
+    search.set_defaults(handler=cmd_search)
+
+    build_index = commands.add_parser('build-index', help="بناء النموذج والفهارس وحفظها في التخزين المؤقت")
+    build_index.add_argument('--workers', type=int, default=None, help="عدد عمليات بناء فهرس الجيران")
+    build_index.add_argument('--ann', action='store_true', help="بناء فهرس ANN أيضاً")
+    build_index.set_defaults(handler=cmd_build_index)
+
+    bench = commands.add_parser('bench', help="تشغيل مجموعة القياسات")
+    bench.add_argument('--rows', type=int, default=None, help="حجم كتالوج اصطناعي للقياس")
+    bench.set_defaults(handler=cmd_bench)
+
+    return parser
+
+
+def main(argv: List[str] = None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.handler(args)
+    except BrokenPipeError:
+        # المخرجات موجهة إلى head وما شابه: إسكات ما تبقى بدل طباعة خطأ عند الإغلاق
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except KeyboardInterrupt:
+        sys.exit(130)
+
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,76 @@ APP_CONFIG = {
     'theme': 'dark'     # 'dark' أو 'light'
 }
 
+# إعدادات البحث التلقائي أثناء الكتابة
+SEARCH_CONFIG = {
+    'debounce_ms': 250,         # انتظار توقف الكتابة قبل تنفيذ البحث
+    'min_chars': 3,             # أقل عدد أحرف للبحث التلقائي
+    'suggestions': 8,           # عدد اقتراحات الإكمال التلقائي أسفل حقل البحث
+    'max_results': 12
+}
+
+# إعدادات قاعدة بيانات المكتبة الشخصية
+DATABASE_CONFIG = {
+    'journal_mode': 'WAL',      # القراءة لا تنتظر الكتابة
+    'synchronous': 'NORMAL',    # آمن مع WAL وأسرع من FULL
+    'cache_size_kb': 8192,      # ذاكرة صفحات SQLite لكل اتصال
+    'cached_statements': 128,   # عدد الاستعلامات المجهزة المحفوظة لكل اتصال
+    'busy_timeout': 5.0,        # ثوانٍ انتظار القفل قبل الخطأ
+    'page_size': 50             # عدد الكتب في كل صفحة من نافذة المكتبة
+}
+
+# إعدادات التخزين المؤقت للفهارس
+CACHE_CONFIG = {
+    'cache_dir': '.cache',      # بجانب ملف البيانات
+    'neighbors_k': 50,          # عدد الجيران المحفوظين لكل كتاب
+    'auto_build': True,         # إعادة البناء تلقائياً عند تغير ملف البيانات
+    'build_workers': 1,         # عدد العمليات لبناء فهرس الجيران (أكثر من 1 = بناء متوازٍ)
+    'query_cache_size': 256,    # عدد نتائج التوصية المحفوظة في الذاكرة
+    'query_cache_ttl': 600      # ثوانٍ قبل انتهاء صلاحية النتيجة (None بلا حد)
+}
+
+# إعدادات القراءة المجزأة للملفات الكبيرة
+INGEST_CONFIG = {
+    'chunk_size': 50000,        # عدد الصفوف المقروءة في كل دفعة
+    'store_dir': 'catalog',     # داخل مجلد التخزين المؤقت
+    'n_features': 2 ** 18       # حجم فضاء ميزات HashingVectorizer
+}
+
+# إعدادات التوصية
+RECOMMENDER_CONFIG = {
+    'max_seed_books': 64,       # الحد الأعلى للكتب المطابقة للعنوان المستخدمة كبذور
+    'candidates_per_seed': 19,  # عدد الجيران المفحوصين لكل كتاب مطابق
+    'refit_drift_threshold': 0.1,  # زيادة نسبة المصطلحات خارج المفردات التي تستدعي إعادة التدريب
+    'refit_min_rows': 20,       # الحد الأدنى للكتب المضافة/المعدلة قبل تقييم الانحراف
+    'tfidf_params': {
+        'stop_words': 'english',
+        'max_features': 1000,
+        'ngram_range': (1, 2)   # استخدام 1-2 كلمة
+    }
+}
+
+# إعدادات الاسترجاع التقريبي (IVF-PQ فوق إسقاط SVD)
+ANN_CONFIG = {
+    'backend': 'auto',          # 'exact' أو 'ann' أو 'auto' (تقريبي للكتالوجات الكبيرة فقط)
+    'min_rows': 50000,          # حجم الكتالوج الذي يبدأ عنده الوضع التلقائي باستخدام ANN
+    'n_components': 128,        # أبعاد الإسقاط الكثيف
+    'n_lists': None,            # عدد القوائم المقلوبة (None = جذر عدد الكتب)
+    'n_subvectors': 16,         # أجزاء تكميم المنتج لكل متجه (بايت لكل جزء)
+    'n_probe': 8,               # عدد القوائم المفحوصة لكل استعلام
+    'rerank': 4,                # مضاعف المرشحين المعاد ترتيبهم بالتشابه الدقيق
+    'train_rows': 50000         # حجم عينة التدريب
+}
+
+# إعدادات خادم التوصيات (HTTP/JSON)
+SERVER_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8080,
+    'workers': 1,               # عمليات متفرعة تتقاسم مقبس الاستماع
+    'threads': 4,               # خيوط الحساب لكل عملية
+    'backlog': 512,             # طابور الاتصالات المنتظرة
+    'max_limit': 100            # أقصى عدد نتائج لكل طلب
+}
+
 # قوائم الخيارات
 FILTER_OPTIONS = {
     'categories': ['الكل'],
@@ -67,6 +137,7 @@ FILTER_OPTIONS = {
 CARD_CONFIG = {
     'width': 350,
     'height': 200,
+    'library_height': 280,      # ارتفاع ثابت لبطاقات المكتبة في القائمة الافتراضية
     'padding': 15,
     'border_radius': 10,
     'shadow_offset': (2, 2)
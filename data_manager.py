@@ -1,68 +1,301 @@
+import hashlib
+import os
+import re
+import sys
+import time
+import numpy as np
 import pandas as pd
 from typing import List, Dict
+from search_index import SearchIndex
+from autocomplete import AutocompleteIndex
+from book_text import weighted_text
+from config import CACHE_CONFIG, INGEST_CONFIG
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = None
 
 class DataManager:
     
-    def __init__(self, csv_path: str):
+    # أعمدة منخفضة التنوع تخزن كفئات، وأعمدة نصية تخزن بـ Arrow أو كنصوص مشتركة
+    CATEGORY_COLUMNS = ('category', 'language', 'difficulty', 'rating_category')
+    STRING_COLUMNS = ('title', 'author', 'description', 'tags')
+    INTEGER_COLUMNS = {'book_id': np.int32, 'year': np.int16, 'pages': np.int16}
+    
+    # كلمات العلامات لتحديد الصعوبة ومجالات فئات التقييم
+    BEGINNER_TAGS = re.compile('beginner|introduction|basics|مبتدئ')
+    ADVANCED_TAGS = re.compile('advanced|deep|comprehensive|متقدم')
+    RATING_BINS = [-np.inf, 3.5, 4.0, 4.3, 4.7, np.inf]
+    RATING_LABELS = ['ضعيف', 'متوسط', 'جيد', 'جيد جداً', 'ممتاز']
+    
+    def __init__(self, csv_path: str, chunk_size: int = None):
         self.csv_path = csv_path
+        self.chunk_size = chunk_size
         self.df = None
+        self.search_index = None
+        self._autocomplete = None
+        self.catalog_store = None
         self.load_data()
     
     def load_data(self):
         try:
-            self.df = pd.read_csv(self.csv_path)
-            self._clean_data()
+            if self.chunk_size:
+                # الوضع المجزأ: القراءة والتنظيف والميزات على دفعات إلى مخزن على القرص، ثم يُحمل الجدول
+                # منه جزءاً جزءاً بأنواعه المضغوطة، فلا يوجد الملف كاملاً بأعمدته النصية في الذاكرة
+                self.catalog_store = self.ingest(chunk_size=self.chunk_size)
+                self.df = self._read_store(self.catalog_store)
+            else:
+                self.df = pd.read_csv(self.csv_path)
+                self._clean_data()
+                self.df = self._compact_frame(self.df)
+            self.search_index = SearchIndex(self.df)
+            # فهرس الإكمال التلقائي يُبنى عند أول طلب: الواجهة تبنيه في خيط التحميل وسطر الأوامر لا يحتاجه
+            self._autocomplete = None
             print(f"تم تحميل {len(self.df)} كتاب بنجاح")
         except Exception as e:
             print(f"خطأ في تحميل البيانات: {e}")
     
-    def _clean_data(self):
+    @property
+    def autocomplete(self) -> AutocompleteIndex:
+        """فهرس الإكمال التلقائي (يُبنى عند أول طلب ويعاد بناؤه بعد تعديل الكتالوج)"""
+        if self._autocomplete is None and self.df is not None:
+            self._autocomplete = AutocompleteIndex(self.df)
+        return self._autocomplete
+    
+    def ingest(self, store_dir: str = None, chunk_size: int = None, report=print, force: bool = False):
+        """قراءة ملف البيانات على دفعات محدودة الحجم وكتابتها منظفة إلى مخزن عمودي على القرص
+        
+        المخزن المكتمل المطابق لبصمة الملف الحالي يعاد استخدامه دون قراءة الملف، إلا مع force.
+        """
+        from catalog_store import CatalogStore
+        
+        if store_dir is None:
+            data_dir = os.path.dirname(os.path.abspath(self.csv_path))
+            store_dir = os.path.join(data_dir, CACHE_CONFIG['cache_dir'], INGEST_CONFIG['store_dir'])
+        source_hash = self.get_source_hash()
+        
+        if not force:
+            store = CatalogStore.load(store_dir, source_hash)
+            if store is not None and store.n_features == INGEST_CONFIG['n_features']:
+                if report:
+                    report(f"استخدام المخزن المحفوظ: {store.rows} كتاب")
+                return store
+        
+        store = CatalogStore(store_dir)
+        store.reset()
+        
+        start = time.perf_counter()
+        for chunk in pd.read_csv(self.csv_path, chunksize=chunk_size or INGEST_CONFIG['chunk_size']):
+            # الذاكرة القصوى تتبع حجم الدفعة لا حجم الكتالوج
+            chunk = self._clean_data(chunk.reset_index(drop=True))
+            store.append(chunk, weighted_text(chunk))
+            
+            elapsed = time.perf_counter() - start
+            if report:
+                report(f"تمت معالجة {store.rows} كتاب ({store.rows / max(elapsed, 1e-9):.0f} كتاب/ثانية)")
+        
+        store.finalize(source_hash)
+        return store
+    
+    def _read_store(self, store) -> pd.DataFrame:
+        """تحميل الجدول من المخزن جزءاً جزءاً مع ضغط كل جزء قبل قراءة التالي"""
+        parts = [self._compact_frame(frame) for frame in store.iter_frames()]
+        if not parts:
+            return pd.DataFrame()
+        
+        # لكل جزء فئاته الخاصة، فتوحد قبل الدمج حتى تبقى الأعمدة فئوية كما في التحميل الكامل
+        for column in self.CATEGORY_COLUMNS:
+            categories = sorted(set().union(*(part[column].cat.categories for part in parts)))
+            for part in parts:
+                part[column] = part[column].cat.set_categories(categories)
+        return pd.concat(parts, ignore_index=True)
+    
+    def _clean_data(self, df: pd.DataFrame = None) -> pd.DataFrame:
+        # التنظيف يطبق على الجدول الكامل أو على دفعة كتب جديدة
+        df = self.df if df is None else df
+        
         # ملء القيم الفارغة
-        self.df['description'] = self.df['description'].fillna('لا يوجد وصف')
-        self.df['tags'] = self.df['tags'].fillna('')
-        self.df['author'] = self.df['author'].fillna('مؤلف غير معروف')
+        df['title'] = df['title'].fillna('')
+        df['category'] = df['category'].fillna('')
+        df['description'] = df['description'].fillna('لا يوجد وصف')
+        df['tags'] = df['tags'].fillna('')
+        df['author'] = df['author'].fillna('مؤلف غير معروف')
         
         # إضافة عمود الصعوبة
-        self._add_difficulty_level()
+        self._add_difficulty_level(df)
         
         # إضافة عمود مستوى التقييم
-        self._add_rating_category()
+        self._add_rating_category(df)
+        return df
     
-    def _add_difficulty_level(self):
-        def get_difficulty(row):
-            pages = row['pages']
-            tags = str(row['tags']).lower()
-            
-            # قواعد بسيطة لتحديد الصعوبة
-            if pages < 300:
-                if any(word in tags for word in ['beginner', 'introduction', 'basics', 'مبتدئ']):
-                    return 'مبتدئ'
-                else:
-                    return 'متوسط'
-            elif pages < 600:
-                if any(word in tags for word in ['advanced', 'deep', 'comprehensive', 'متقدم']):
-                    return 'متقدم'
-                else:
-                    return 'متوسط'
-            else:
-                return 'متقدم'
-        
-        self.df['difficulty'] = self.df.apply(get_difficulty, axis=1)
-    
-    def _add_rating_category(self):
-        def get_rating_category(rating):
-            if rating >= 4.7:
-                return 'ممتاز'
-            elif rating >= 4.3:
-                return 'جيد جداً'
-            elif rating >= 4.0:
-                return 'جيد'
-            elif rating >= 3.5:
-                return 'متوسط'
-            else:
-                return 'ضعيف'
+    def _add_difficulty_level(self, df: pd.DataFrame = None):
+        df = self.df if df is None else df
+        
+        # قواعد بسيطة لتحديد الصعوبة محسوبة على كامل العمود دفعة واحدة
+        pages = df['pages'].to_numpy(dtype=np.float64, na_value=np.nan)
+        tags = df['tags'].astype(str).str.lower()
+        beginner = tags.str.contains(self.BEGINNER_TAGS, regex=True).to_numpy(dtype=bool)
+        advanced = tags.str.contains(self.ADVANCED_TAGS, regex=True).to_numpy(dtype=bool)
         
-        self.df['rating_category'] = self.df['rating'].apply(get_rating_category)
+        # الصفحات الفارغة لا تحقق أي شرط فتصنف متقدم كما في القاعدة الأصلية
+        df['difficulty'] = np.select(
+            [(pages < 300) & beginner, pages < 300, (pages < 600) & advanced, pages < 600],
+            ['مبتدئ', 'متوسط', 'متقدم', 'متوسط'],
+            default='متقدم'
+        )
+    
+    def _add_rating_category(self, df: pd.DataFrame = None):
+        df = self.df if df is None else df
+        
+        ratings = df['rating']
+        if ratings.dtype == np.float32:
+            # استعادة القيم العشرية الأصلية من تخزين float32
+            ratings = ratings.astype(np.float64).round(6)
+        
+        # التقييم الفارغ لا يقع في أي فئة فيصنف ضعيف
+        categories = pd.cut(ratings, bins=self.RATING_BINS, labels=self.RATING_LABELS, right=False)
+        df['rating_category'] = categories.astype(object).fillna('ضعيف').to_numpy()
+    
+    def _compact_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """تحويل أعمدة الجدول إلى أنواع بيانات مضغوطة"""
+        for column in self.CATEGORY_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].astype('category')
+        
+        for column, dtype in self.INTEGER_COLUMNS.items():
+            if column in df.columns:
+                values = df[column]
+                limits = np.iinfo(dtype)
+                if values.notna().all() and values.between(limits.min, limits.max).all():
+                    df[column] = values.astype(dtype)
+        
+        if 'rating' in df.columns:
+            df['rating'] = df['rating'].astype(np.float32)
+        
+        for column in self.STRING_COLUMNS:
+            if column in df.columns:
+                df[column] = self._compact_strings(df[column])
+        return df
+    
+    @staticmethod
+    def _compact_strings(values: pd.Series) -> pd.Series:
+        """تخزين النصوص في Arrow إن توفر، وإلا مشاركة النصوص المتكررة عبر sys.intern"""
+        if STRING_DTYPE:
+            return values.astype(STRING_DTYPE)
+        interned = [sys.intern(v) if isinstance(v, str) else v for v in values]
+        return pd.Series(interned, index=values.index, dtype=values.dtype, name=values.name)
+    
+    def _align_categories(self, rows: pd.DataFrame) -> pd.DataFrame:
+        """توحيد فئات الأعمدة الفئوية بين الجدول وصفوف جديدة قبل الدمج"""
+        for column in self.CATEGORY_COLUMNS:
+            if column in rows.columns and isinstance(self.df[column].dtype, pd.CategoricalDtype):
+                new_values = pd.Index(rows[column].dropna().unique()).difference(self.df[column].cat.categories)
+                if len(new_values):
+                    self.df[column] = self.df[column].cat.add_categories(new_values)
+                rows[column] = pd.Categorical(rows[column], categories=self.df[column].cat.categories)
+        return rows
+    
+    def memory_report(self) -> Dict[str, int]:
+        """حجم كل عمود في الذاكرة بالبايت مع الإجمالي"""
+        usage = self.df.memory_usage(deep=True)
+        report = {column: int(size) for column, size in usage.items()}
+        report['total'] = int(usage.sum())
+        return report
+    
+    def add_books(self, records) -> pd.DataFrame:
+        """إضافة كتب جديدة إلى الكتالوج في الذاكرة دون إعادة قراءة الملف"""
+        new_books = pd.DataFrame(records).reset_index(drop=True)
+        if new_books.empty:
+            return new_books
+        
+        for column in self.df.columns:
+            if column not in new_books.columns:
+                new_books[column] = np.nan
+        
+        # ترقيم تلقائي للكتب التي لا تحمل معرفاً
+        missing_ids = new_books['book_id'].isna()
+        if missing_ids.any():
+            next_id = int(self.df['book_id'].max()) + 1 if len(self.df) else 1
+            new_books.loc[missing_ids, 'book_id'] = np.arange(next_id, next_id + missing_ids.sum())
+        new_books['book_id'] = new_books['book_id'].astype(self.df['book_id'].dtype)
+        
+        if new_books['book_id'].duplicated().any() or new_books['book_id'].isin(self.df['book_id']).any():
+            raise ValueError("معرفات الكتب الجديدة مكررة أو موجودة مسبقاً")
+        
+        new_books = self._clean_data(new_books)[self.df.columns]
+        new_books = self._align_categories(self._compact_frame(new_books))
+        
+        start = len(self.df)
+        self.df = pd.concat([self.df, new_books], ignore_index=True)
+        if self.search_index:
+            self.search_index.add_rows(self.df.iloc[start:], start)
+        self._autocomplete = None
+        return self.df.iloc[start:]
+    
+    def update_books(self, records) -> np.ndarray:
+        """تعديل حقول كتب موجودة (حسب book_id) وإعادة حساب الأعمدة المشتقة"""
+        updates = pd.DataFrame(records).reset_index(drop=True)
+        if updates.empty:
+            return np.empty(0, dtype=np.int64)
+        
+        positions = self._positions_for(updates['book_id'])
+        if (positions < 0).any():
+            raise KeyError("بعض الكتب المطلوب تعديلها غير موجودة")
+        
+        rows = self.df.iloc[positions].copy()
+        for column in self.CATEGORY_COLUMNS:
+            rows[column] = rows[column].astype(object)
+        # الأعمدة الرقمية المضغوطة (int16/float32) ترفض القيم الجديدة، فتعدل بدقة كاملة ثم تضغط من جديد
+        for column in (*self.INTEGER_COLUMNS, 'rating'):
+            if column in rows.columns:
+                rows[column] = rows[column].astype(np.float64)
+        
+        derived = ('book_id', 'difficulty', 'rating_category')
+        for field in updates.columns:
+            if field in rows.columns and field not in derived:
+                # القيم غير المحددة في سجل ما تبقى كما هي
+                values = updates[field]
+                given = values.notna().to_numpy()
+                rows.loc[rows.index[given], field] = values[given].to_numpy()
+        
+        rows = self._align_categories(self._compact_frame(self._clean_data(rows)))
+        for column in (*self.INTEGER_COLUMNS, 'rating'):
+            if column in rows.columns and rows[column].dtype != self.df[column].dtype:
+                # قيمة لا تتسع في النوع المضغوط للعمود (مثل 70000 صفحة) توسع العمود كله
+                self.df[column] = self.df[column].astype(np.result_type(self.df[column].dtype, rows[column].dtype))
+        old_rows = self.df.iloc[positions]
+        self.df.loc[rows.index, rows.columns] = rows
+        if self.search_index:
+            self.search_index.update_rows(positions, old_rows, rows)
+        self._autocomplete = None
+        return positions
+    
+    def remove_books(self, book_ids) -> np.ndarray:
+        """حذف كتب من الكتالوج وإرجاع مواقعها السابقة"""
+        positions = self._positions_for(book_ids)
+        positions = np.unique(positions[positions >= 0])
+        if not len(positions):
+            return positions
+        
+        self.df = self.df.drop(index=self.df.index[positions]).reset_index(drop=True)
+        if self.search_index:
+            self.search_index.remove_rows(positions)
+        self._autocomplete = None
+        return positions
+    
+    def _positions_for(self, book_ids) -> np.ndarray:
+        """مواقع الصفوف لمجموعة معرفات (-1 للمعرف غير الموجود)"""
+        return pd.Index(self.df['book_id']).get_indexer(pd.Index(book_ids))
+    
+    def get_source_hash(self) -> str:
+        """بصمة محتوى ملف البيانات للتحقق من صلاحية الفهارس المحفوظة"""
+        digest = hashlib.sha256()
+        with open(self.csv_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
     
     def get_books_by_category(self, category: str) -> pd.DataFrame:
         return self.df[self.df['category'].str.contains(category, case=False, na=False)]
@@ -78,18 +311,44 @@ class DataManager:
             'total_books': len(self.df),
             'categories': self.df['category'].nunique(),
             'languages': self.df['language'].nunique(),
-            'avg_rating': self.df['rating'].mean(),
-            'top_categories': self.df['category'].value_counts().head(5).to_dict(),
-            'top_languages': self.df['language'].value_counts().head(3).to_dict(),
-            'difficulty_distribution': self.df['difficulty'].value_counts().to_dict(),
+            'avg_rating': self.df['rating'].astype(np.float64).round(6).mean(),
+            'top_categories': self._value_counts('category').head(5).to_dict(),
+            'top_languages': self._value_counts('language').head(3).to_dict(),
+            'difficulty_distribution': self._value_counts('difficulty').to_dict(),
             'year_range': f"{self.df['year'].min()} - {self.df['year'].max()}"
         }
         return stats
     
+    def _value_counts(self, column: str) -> pd.Series:
+        # الأعمدة الفئوية تعيد الفئات غير المستخدمة بعدد صفر
+        counts = self.df[column].value_counts()
+        return counts[counts > 0]
+    
     def search_books(self, query: str) -> pd.DataFrame:
         if not query:
             return pd.DataFrame()
         
+        # المرشحون من الفهرس المقلوب ثم التحقق من المطابقة الجزئية عليهم فقط
+        candidates = self.search_index.candidates(query) if self.search_index else None
+        if candidates is None:
+            return self._scan_books(query)
+        
+        matched = []
+        for field, rows in candidates.items():
+            if len(rows):
+                values = self.df[field].iloc[rows]
+                matched.append(rows[values.str.contains(query, case=False, na=False).to_numpy(dtype=bool)])
+        
+        rows = np.unique(np.concatenate(matched)) if matched else np.empty(0, dtype=np.int64)
+        return self.df.iloc[rows]
+    
+    def query_books(self, expression: str, fields: List[str] = None) -> pd.DataFrame:
+        """بحث بالكلمات مع AND/OR والبادئات (مثل 'python AND web OR rust*')"""
+        if not expression.strip() or self.search_index is None:
+            return pd.DataFrame()
+        return self.df.iloc[self.search_index.search(expression, fields)]
+    
+    def _scan_books(self, query: str) -> pd.DataFrame:
         # البحث في العنوان، المؤلف، الفئة، الوصف، والعلامات
         mask = (
             self.df['title'].str.contains(query, case=False, na=False) |
@@ -0,0 +1,258 @@
+import bisect
+import numpy as np
+from collections import Counter
+from difflib import SequenceMatcher
+from fuzzywuzzy import fuzz
+from typing import Dict, List, Optional, Tuple
+from similarity_engine import top_k_indices
+
+
+class FuzzyTitleMatcher:
+    """مطابقة غامضة سريعة للعناوين مطابقة لمسح كامل بـ fuzz.ratio
+
+    افتراضياً تُرتب العناوين بحد أعلى دقيق لنسبتها (الحروف المشتركة ثم أطول تتابع مشترك، انظر _bounds) ولا يُحسب
+    fuzz.ratio إلا لما قد يدخل النتائج، فالنتيجة مطابقة للمسح الكامل. مع max_candidates يُستخدم بدلاً من
+    ذلك فهرس الثلاثيات الحرفية وأفضل max_candidates حسب معامل Dice، وهو تقريب موثق في _candidates.
+    """
+
+    # عدد خانات عد الحروف: ord(c) % CHAR_BUCKETS؛ دمج حروف في خانة واحدة يبقي الحد أعلى صحيحاً
+    CHAR_BUCKETS = 128
+    # طول بداية العنوان المحفوظة لحساب أطول تتابع مشترك بالتوازي على البتات (بت لكل حرف من الاستعلام)
+    PREFIX_LENGTH = 64
+    PADDING = 255
+
+    def __init__(self, titles, max_candidates: Optional[int] = None):
+        self.max_candidates = max_candidates
+        self.titles = [str(t).lower() for t in titles]
+        self.lengths = np.array([len(t) for t in self.titles], dtype=np.int32)
+        self.char_counts = self._count_chars(self.titles)
+        self.prefixes = self._encode_prefixes(self.titles)
+        self._build_index()
+
+    @classmethod
+    def _count_chars(cls, titles: List[str]) -> np.ndarray:
+        """عدد كل حرف في كل عنوان (حتى 255)، صف لكل خانة حتى تُقرأ قيم حرف واحد متصلة"""
+        counts = np.zeros((cls.CHAR_BUCKETS, len(titles)), dtype=np.uint8)
+        for row, title in enumerate(titles):
+            for char, count in Counter(ord(c) % cls.CHAR_BUCKETS for c in title).items():
+                counts[char, row] = min(count, 255)
+        return counts
+
+    @classmethod
+    def _encode_prefixes(cls, titles: List[str]) -> np.ndarray:
+        """رموز خانات أول PREFIX_LENGTH حرفاً من كل عنوان، والباقي حشو لا يطابق أي حرف"""
+        prefixes = np.full((len(titles), cls.PREFIX_LENGTH), cls.PADDING, dtype=np.uint8)
+        for row, title in enumerate(titles):
+            codes = [ord(c) % cls.CHAR_BUCKETS for c in title[:cls.PREFIX_LENGTH]]
+            prefixes[row, :len(codes)] = codes
+        return prefixes
+
+    @staticmethod
+    def _trigrams(text: str) -> set:
+        padded = f"  {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def _build_index(self):
+        """بناء قوائم النشر لكل ثلاثية حرفية (مرة واحدة عند التحميل)"""
+        postings: Dict[str, List[int]] = {}
+        counts = np.empty(len(self.titles), dtype=np.int32)
+
+        for row, title in enumerate(self.titles):
+            grams = self._trigrams(title)
+            counts[row] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+
+        self.trigram_counts = counts
+        self.postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def add_titles(self, titles):
+        """إضافة عناوين جديدة في نهاية الفهرس"""
+        titles = [str(t).lower() for t in titles]
+        start = len(self.titles)
+        self.titles.extend(titles)
+        self.lengths = np.concatenate([self.lengths, np.array([len(t) for t in titles], dtype=np.int32)])
+        self.char_counts = np.concatenate([self.char_counts, self._count_chars(titles)], axis=1)
+        self.prefixes = np.concatenate([self.prefixes, self._encode_prefixes(titles)])
+        self.trigram_counts = np.concatenate([self.trigram_counts, np.zeros(len(titles), dtype=np.int32)])
+        self._insert(range(start, start + len(titles)))
+
+    def update_titles(self, positions, titles):
+        """استبدال عناوين موجودة في مواقعها"""
+        positions = np.asarray(positions)
+        self._discard(positions)
+        for row, title in zip(positions.tolist(), titles):
+            self.titles[row] = str(title).lower()
+            self.lengths[row] = len(self.titles[row])
+        titles = [self.titles[row] for row in positions.tolist()]
+        self.char_counts[:, positions] = self._count_chars(titles)
+        self.prefixes[positions] = self._encode_prefixes(titles)
+        self._insert(positions.tolist())
+
+    def remove_titles(self, positions):
+        """حذف عناوين وإعادة ترقيم المواقع التالية لها"""
+        drop = np.zeros(len(self.titles), dtype=bool)
+        drop[np.asarray(positions)] = True
+        self._discard(np.flatnonzero(drop), remap=np.cumsum(~drop) - 1)
+        self.titles = [t for t, d in zip(self.titles, drop) if not d]
+        self.lengths = self.lengths[~drop]
+        self.char_counts = self.char_counts[:, ~drop]
+        self.prefixes = self.prefixes[~drop]
+        self.trigram_counts = self.trigram_counts[~drop]
+
+    def _insert(self, rows):
+        added: Dict[str, List[int]] = {}
+        for row in rows:
+            grams = self._trigrams(self.titles[row])
+            self.trigram_counts[row] = len(grams)
+            for gram in grams:
+                added.setdefault(gram, []).append(row)
+
+        for gram, gram_rows in added.items():
+            gram_rows = np.array(gram_rows, dtype=np.int32)
+            if gram in self.postings:
+                gram_rows = np.sort(np.concatenate([self.postings[gram], gram_rows]))
+            self.postings[gram] = gram_rows
+
+    def _discard(self, positions, remap: np.ndarray = None):
+        """إزالة صفوف من قوائم النشر (مع إعادة الترقيم عند الحذف)"""
+        drop = np.zeros(len(self.titles), dtype=bool)
+        drop[positions] = True
+        grams = set()
+        for row in positions.tolist():
+            grams.update(self._trigrams(self.titles[row]))
+
+        for gram in (grams if remap is None else list(self.postings)):
+            rows = self.postings.get(gram)
+            if rows is None:
+                continue
+            kept = rows[~drop[rows]]
+            if not len(kept):
+                del self.postings[gram]
+            else:
+                self.postings[gram] = kept if remap is None else remap[kept].astype(np.int32)
+
+    def _candidates(self, query: str) -> np.ndarray:
+        """المرشحون الأكثر اشتراكاً في الثلاثيات مع استبعاد ما يمنعه فرق الطول
+
+        العد يجري على قوائم نشر ثلاثيات الاستعلام فقط (np.unique) فتتبع التكلفة طول هذه القوائم لا عدد العناوين،
+        إلا إذا تجاوز طولها عدد العناوين فيكون bincount أرخص.
+        استبعاد الطول حد أعلى دقيق، أما الإبقاء على أفضل max_candidates حسب معامل Dice فتقريب:
+        لا يوجد حد يضمن بقاء كل عنوان تتجاوز نسبته 70، فعنوان يشارك الاستعلام حروفه متفرقة لا ثلاثياته
+        قد يُستبعد إن وُجد أكثر من max_candidates عنواناً أعلى منه في Dice، وقد لا يشارك عنوان مطابق الاستعلام
+        أي ثلاثية أصلاً. لذلك لا يُستخدم هذا المسار إلا إذا طُلب max_candidates صراحة.
+        """
+        grams = self._trigrams(query)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+
+        postings = np.concatenate(lists)
+        if len(postings) < len(self.titles):
+            rows, shared = np.unique(postings, return_counts=True)
+        else:
+            # قوائم أطول من الكتالوج (ثلاثيات شائعة): العد المباشر أرخص من الترتيب
+            counts = np.bincount(postings, minlength=len(self.titles))
+            rows = np.flatnonzero(counts)
+            shared = counts[rows]
+
+        # حد أعلى دقيق لنسبة SequenceMatcher: 2 * min(len) / (len1 + len2)
+        lengths = self.lengths[rows]
+        upper = 200.0 * np.minimum(lengths, len(query)) / (lengths + len(query))
+        possible = np.round(upper) > 70
+        rows, shared = rows[possible], shared[possible]
+
+        # ترتيب المرشحين حسب معامل Dice للثلاثيات
+        if self.max_candidates is not None and len(rows) > self.max_candidates:
+            dice = 2.0 * shared / (self.trigram_counts[rows] + len(grams))
+            # التعادل عند حد القطع يُحل بترتيب الصفوف كما يحل المسح الكامل تعادل النسب
+            rows = np.sort(rows[top_k_indices(dice, self.max_candidates)])
+        return rows.astype(np.int64)
+
+    def _bounds(self, query: str, threshold: int) -> Tuple[np.ndarray, np.ndarray]:
+        """العناوين التي قد تتجاوز نسبتها الحد مع حد أعلى دقيق لـ fuzz.ratio لكل منها
+
+        الحروف التي تطابقها SequenceMatcher كتل مشتركة بالترتيب نفسه في النصين، فعددها لا يتجاوز
+        مجموع min(عدد الحرف في الاستعلام، عدده في العنوان) (حد quick_ratio، يحسب لكل العناوين خانة حرف
+        في كل مرة)، ولا طول أطول تتابع مشترك (يحسب لما بقي فقط في _lcs_bounds).
+        """
+        shared = np.zeros(len(self.titles), dtype=np.int32)
+        for char, count in Counter(ord(c) % self.CHAR_BUCKETS for c in query).items():
+            column = self.char_counts[char]
+            if count < 255:
+                shared += np.minimum(column, count)
+            else:
+                # العدد المخزن 255 يعني 255 أو أكثر، فيبقى عدد الاستعلام حداً أعلى له
+                shared += np.where(column == 255, count, column)
+
+        rows = np.flatnonzero(self._ratio_bounds(shared, self.lengths, len(query)) > threshold)
+        shared = np.minimum(shared[rows], self._lcs_bounds(query, rows))
+        bounds = self._ratio_bounds(shared, self.lengths[rows], len(query))
+        keep = bounds > threshold
+        return rows[keep], bounds[keep]
+
+    @staticmethod
+    def _ratio_bounds(matched: np.ndarray, lengths: np.ndarray, query_length: int) -> np.ndarray:
+        # نفس حساب difflib ثم التقريب في fuzz.ratio حتى لا يقل الحد عن النسبة في حالات التعادل
+        total = np.maximum(lengths + query_length, 1)
+        return np.round(100 * (2.0 * matched / total)).astype(np.int32)
+
+    def _lcs_bounds(self, query: str, rows: np.ndarray) -> np.ndarray:
+        """طول أطول تتابع مشترك بين الاستعلام وكل عنوان (خوارزمية البتات المتوازية لـ Hyyrö)
+
+        تحسب على أول PREFIX_LENGTH حرفاً من الطرفين ويضاف ما بعدها كاملاً، فتبقى حداً أعلى.
+        """
+        head = query[:self.PREFIX_LENGTH]
+        masks = np.zeros(self.PADDING + 1, dtype=np.uint64)
+        for i, char in enumerate(head):
+            masks[ord(char) % self.CHAR_BUCKETS] |= np.uint64(1 << i)
+
+        width = int(min(self.lengths[rows].max(initial=0), self.PREFIX_LENGTH))
+        # صف لكل موضع في العناوين حتى تكون قيم كل خطوة متصلة في الذاكرة
+        matches = masks[np.ascontiguousarray(self.prefixes[rows, :width].T)]
+        state = np.full(len(rows), np.uint64(2 ** 64 - 1))
+        for column in matches:
+            # الجمع قد يفيض خارج بتات الاستعلام ويُهمل ذلك بالقناع في النهاية
+            carry = state & column
+            state = (state + carry) | (state - carry)
+
+        unmatched = np.bitwise_count(state & np.uint64((1 << len(head)) - 1)).astype(np.int32)
+        remainder = len(query) - len(head) + np.maximum(self.lengths[rows] - self.PREFIX_LENGTH, 0)
+        return len(head) - unmatched + remainder
+
+    def match(self, query: str, limit: int = 5, threshold: int = 70) -> List[int]:
+        """مواقع أفضل العناوين التي تتجاوز نسبة تشابهها الحد (نفس دلالة fuzz.ratio)"""
+        query = query.lower()
+        if self.max_candidates is not None:
+            return self._match_candidates(query, limit, threshold)
+
+        rows, bounds = self._bounds(query, threshold)
+        # الأعلى حداً أولاً؛ التوقف عندما لا يبلغ حد العنوان التالي أضعف النتائج الحالية.
+        # الحد المساوي لها يُحسب لأن التعادل يُحل بترتيب الصفوف كما في المسح الكامل
+        order = np.lexsort((rows, -bounds))
+        best = []  # (-النسبة، الصف) مرتبة، بطول limit على الأكثر
+        for row, bound in zip(rows[order].tolist(), bounds[order].tolist()):
+            if len(best) == limit and bound < -best[-1][0]:
+                break
+            similarity = fuzz.ratio(query, self.titles[row])
+            if similarity > threshold:
+                bisect.insort(best, (-similarity, row))
+                del best[limit:]
+
+        return [row for _, row in best]
+
+    def _match_candidates(self, query: str, limit: int, threshold: int) -> List[int]:
+        """المطابقة على مرشحي فهرس الثلاثيات فقط (تقريبية، انظر _candidates)"""
+        scored = []
+
+        for row in self._candidates(query).tolist():
+            title = self.titles[row]
+            # استبعاد سريع بالحد الأعلى قبل الحساب الكامل
+            if round(100 * SequenceMatcher(None, query, title).quick_ratio()) <= threshold:
+                continue
+            similarity = fuzz.ratio(query, title)
+            if similarity > threshold:
+                scored.append((row, similarity))
+
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return [row for row, _ in scored[:limit]]
@@ -1,205 +1,466 @@
+import csv
+import json
+import os
+import re
 import sqlite3
-from typing import List, Dict, Optional
+import threading
+import weakref
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import DATABASE_CONFIG
 
-class LibraryManager:    
+
+class _ThreadConnection:
+    """حامل اتصال خيط واحد؛ يُحرر مع بيانات الخيط المحلية عند انتهائه فيُغلق الاتصال"""
+    __slots__ = ('conn', '__weakref__')
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+class LibraryManager:
+    # ترتيب أعمدة الاستعلامات ومفاتيح القواميس المعادة
+    BOOK_COLUMNS = ('id', 'title', 'author', 'category', 'description',
+                    'personal_rating', 'reading_status', 'tags', 'date_added')
+    
+    # الحقول القابلة للتعديل مع قيمها الافتراضية عند الإضافة
+    BOOK_DEFAULTS = {
+        'title': '',
+        'author': '',
+        'category': '',
+        'description': '',
+        'personal_rating': 0,
+        'reading_status': 'لم أقرأ بعد',
+        'tags': ''
+    }
+    CONFLICT_POLICIES = ('update', 'skip')
+    
+    # ترحيلات المخطط بالترتيب؛ رقم الإصدار في PRAGMA user_version هو عدد المطبق منها
+    MIGRATIONS = ('_migration_add_indexes',)
+    
+    # فهرس النص الكامل يعكس جدول المكتبة وتحدثه المشغلات تلقائياً
+    FTS_SCHEMA = (
+        """
+        CREATE VIRTUAL TABLE my_library_fts USING fts5(
+            title, author, tags,
+            content='my_library', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS my_library_fts_insert AFTER INSERT ON my_library BEGIN
+            INSERT INTO my_library_fts(rowid, title, author, tags)
+            VALUES (new.id, new.title, new.author, new.tags);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS my_library_fts_delete AFTER DELETE ON my_library BEGIN
+            INSERT INTO my_library_fts(my_library_fts, rowid, title, author, tags)
+            VALUES ('delete', old.id, old.title, old.author, old.tags);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS my_library_fts_update AFTER UPDATE OF title, author, tags ON my_library BEGIN
+            INSERT INTO my_library_fts(my_library_fts, rowid, title, author, tags)
+            VALUES ('delete', old.id, old.title, old.author, old.tags);
+            INSERT INTO my_library_fts(rowid, title, author, tags)
+            VALUES (new.id, new.title, new.author, new.tags);
+        END
+        """
+    )
+    FTS_TOKEN_PATTERN = re.compile(r'\w+')
+    
     def __init__(self, db_path: str = "my_library.db"):
         self.db_path = db_path
+        # اتصال دائم لكل خيط بدلاً من فتح اتصال جديد لكل استدعاء
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._closed = False
+        self.fts_enabled = False
         self._create_database()
+        self._migrate()
+        self._create_fts_index()
     
-    def _create_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # إنشاء جدول المكتبة الشخصية
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS my_library (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                author TEXT NOT NULL,
-                category TEXT,
-                description TEXT,
-                personal_rating REAL,
-                reading_status TEXT DEFAULT 'لم أقرأ بعد',
-                tags TEXT,
-                date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
+    def _connect(self) -> sqlite3.Connection:
+        """فتح اتصال جديد مع إعدادات الأداء"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DATABASE_CONFIG['busy_timeout'],
+            cached_statements=DATABASE_CONFIG['cached_statements'],
+            # كل اتصال يستخدمه خيطه فقط، والتعطيل يسمح لـ close() بإغلاقه من خيط آخر
+            check_same_thread=False
+        )
+        conn.execute(f"PRAGMA journal_mode = {DATABASE_CONFIG['journal_mode']}")
+        conn.execute(f"PRAGMA synchronous = {DATABASE_CONFIG['synchronous']}")
+        # القيمة السالبة تعني الحجم بالكيلوبايت بدلاً من عدد الصفحات
+        conn.execute(f"PRAGMA cache_size = -{int(DATABASE_CONFIG['cache_size_kb'])}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
     
-    def add_book(self, title: str, author: str, category: str = "", 
-                 description: str = "", personal_rating: float = 0, 
-                 reading_status: str = "لم أقرأ بعد", tags: str = "") -> int:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _connection(self) -> sqlite3.Connection:
+        """اتصال الخيط الحالي (يُفتح مرة واحدة ثم يعاد استخدامه)"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("تم إغلاق مدير المكتبة")
         
-        cursor.execute("""
-            INSERT INTO my_library (title, author, category, description, 
-                                  personal_rating, reading_status, tags)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (title, author, category, description, personal_rating, 
-              reading_status, tags))
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = _ThreadConnection(self._connect())
+            self._local.holder = holder
+            with self._connections_lock:
+                self._connections.append(holder.conn)
+            # الخيوط قصيرة العمر لا تترك اتصالاً مفتوحاً حتى close()؛ مرجع ضعيف حتى لا يبقى المدير حياً بسببه
+            weakref.finalize(holder, self._release, weakref.ref(self), holder.conn)
+        return holder.conn
+    
+    @staticmethod
+    def _release(manager_ref, conn: sqlite3.Connection):
+        """إغلاق اتصال خيط انتهى (أو تركه إن أغلقه close() مسبقاً)"""
+        manager = manager_ref()
+        if manager is not None:
+            with manager._connections_lock:
+                if conn not in manager._connections:
+                    return
+                manager._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    @contextmanager
+    def _transaction(self):
+        """تنفيذ العمليات في معاملة واحدة مع التراجع عند الخطأ"""
+        conn = self._connection()
+        with conn:
+            yield conn.cursor()
+    
+    def close(self):
+        """إغلاق جميع الاتصالات المفتوحة من كل الخيوط"""
+        with self._connections_lock:
+            self._closed = True
+            connections, self._connections = self._connections, []
         
-        book_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+    
+    def _row_to_book(self, row) -> Dict:
+        return dict(zip(self.BOOK_COLUMNS, row))
+    
+    def _create_database(self):
+        with self._transaction() as cursor:
+            # إنشاء جدول المكتبة الشخصية
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS my_library (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    author TEXT NOT NULL,
+                    category TEXT,
+                    description TEXT,
+                    personal_rating REAL,
+                    reading_status TEXT DEFAULT 'لم أقرأ بعد',
+                    tags TEXT,
+                    date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+    
+    def _migrate(self):
+        """تطبيق ترحيلات المخطط التي لم تطبق بعد على قاعدة البيانات"""
+        conn = self._connection()
+        while True:
+            # كل ترحيل مع رقم إصداره في معاملة واحدة، فلا يبقى مخطط نصف مرحل.
+            # القفل الفوري يمنع عمليتين من تطبيق الترحيل نفسه في الوقت ذاته
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version >= len(self.MIGRATIONS):
+                    break
+                getattr(self, self.MIGRATIONS[version])(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+    
+    def _migration_add_indexes(self, cursor):
+        """فهارس الترتيب والإحصائيات وفهرس فريد للعنوان والمؤلف"""
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_my_library_date_added ON my_library(date_added)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_my_library_reading_status ON my_library(reading_status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_my_library_category ON my_library(category)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_my_library_personal_rating ON my_library(personal_rating)")
         
-        return book_id
+        try:
+            cursor.execute("SAVEPOINT unique_title_author")
+            cursor.execute("""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_my_library_title_author
+                ON my_library(lower(trim(title)), lower(trim(author)))
+            """)
+            cursor.execute("RELEASE unique_title_author")
+        except sqlite3.IntegrityError:
+            # مكتبة قديمة بها كتب مكررة: فهرس عادي بدلاً من إيقاف الترحيل
+            cursor.execute("ROLLBACK TO unique_title_author")
+            cursor.execute("RELEASE unique_title_author")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_my_library_title_author
+                ON my_library(lower(trim(title)), lower(trim(author)))
+            """)
+            print("تحذير: توجد كتب مكررة بنفس العنوان والمؤلف، لذا الفهرس غير فريد")
+    
+    def _create_fts_index(self):
+        """إنشاء فهرس FTS5 ومشغلاته، والبقاء على بحث LIKE إذا لم يكن FTS5 متاحاً"""
+        try:
+            with self._transaction() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'my_library_fts'"
+                )
+                exists = cursor.fetchone() is not None
+                
+                if not exists:
+                    cursor.execute(self.FTS_SCHEMA[0])
+                for statement in self.FTS_SCHEMA[1:]:
+                    cursor.execute(statement)
+                
+                if not exists:
+                    # ترتيب bm25 بأوزان للحقول: العنوان ثم المؤلف ثم العلامات
+                    cursor.execute(
+                        "INSERT INTO my_library_fts(my_library_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')"
+                    )
+                    # قاعدة بيانات قديمة: فهرسة الكتب الموجودة مرة واحدة
+                    cursor.execute("INSERT INTO my_library_fts(my_library_fts) VALUES ('rebuild')")
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"البحث النصي الكامل غير متاح، سيتم استخدام LIKE: {e}")
+            self.fts_enabled = False
+    
+    def add_book(self, title: str, author: str, category: str = "",
+                 description: str = "", personal_rating: float = 0,
+                 reading_status: str = "لم أقرأ بعد", tags: str = "") -> int:
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    INSERT INTO my_library (title, author, category, description,
+                                          personal_rating, reading_status, tags)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (title, author, category, description, personal_rating,
+                      reading_status, tags))
+                
+                return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            raise ValueError(f"الكتاب \"{title}\" للمؤلف {author} موجود بالفعل في مكتبتك")
     
     def get_all_books(self) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, title, author, category, description, 
+        cursor = self._connection().execute("""
+            SELECT id, title, author, category, description,
                    personal_rating, reading_status, tags, date_added
-            FROM my_library 
+            FROM my_library
             ORDER BY date_added DESC
         """)
         
+        return [self._row_to_book(row) for row in cursor.fetchall()]
+    
+    def _filter_clause(self, filters: Dict = None):
+        """شروط WHERE ومعاملاتها للمرشحات: query و category و reading_status و min_rating"""
+        filters = filters or {}
+        conditions, params = [], []
+        
+        query = (filters.get('query') or '').strip()
+        if query:
+            match = self._match_expression(query)
+            if match is not None:
+                conditions.append("id IN (SELECT rowid FROM my_library_fts WHERE my_library_fts MATCH ?)")
+                params.append(match)
+            else:
+                conditions.append("(title LIKE ? OR author LIKE ? OR tags LIKE ?)")
+                params.extend([f"%{query}%"] * 3)
+        
+        for field in ('category', 'reading_status'):
+            if filters.get(field):
+                conditions.append(f"{field} = ?")
+                params.append(filters[field])
+        
+        if filters.get('min_rating'):
+            conditions.append("personal_rating >= ?")
+            params.append(filters['min_rating'])
+        
+        return conditions, params
+    
+    def _match_expression(self, query: str) -> Optional[str]:
+        """تعبير MATCH لفهرس FTS5، أو None إن لم يكن الفهرس متاحاً أو لم يحو النص كلمات"""
+        words = self.FTS_TOKEN_PATTERN.findall(query or '')
+        if not self.fts_enabled or not words:
+            return None
+        # كل كلمة تطابق كبادئة وجميع الكلمات مطلوبة، مثل: "rob"* "mar"*
+        return ' '.join('"' + word + '"*' for word in words)
+    
+    def get_books_page(self, after: Optional[Tuple] = None, limit: int = 50,
+                       filters: Dict = None) -> List[Dict]:
+        """صفحة من الكتب تبدأ بعد مؤشر آخر كتاب في الصفحة السابقة (انظر page_cursor)
+        
+        بلا نص بحث تُرتب الكتب الأحدث أولاً والمؤشر (date_added, id). مع نص بحث وفهرس FTS5 تُرتب
+        حسب الصلة bm25 كما في search_books والمؤشر (rank, id)؛ الرتبة تُحسب لكل المطابقات في كل صفحة،
+        وإضافة كتب أو تعديلها بين صفحتين تغير الرتب فقد يتكرر كتاب أو يُفقد عند حد الصفحة.
+        """
+        match = self._match_expression((filters or {}).get('query'))
+        if match is not None:
+            return self._search_page(match, after, limit, filters)
+        
+        conditions, params = self._filter_clause(filters)
+        if after is not None:
+            # ترقيم بالمفتاح: البحث في الفهرس يبدأ من المؤشر مباشرة دون OFFSET
+            conditions.append("(date_added, id) < (?, ?)")
+            params.extend(after)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self._connection().execute(f"""
+            SELECT {', '.join(self.BOOK_COLUMNS)}
+            FROM my_library
+            {where}
+            ORDER BY date_added DESC, id DESC
+            LIMIT ?
+        """, params + [limit])
+        
+        return [self._row_to_book(row) for row in cursor.fetchall()]
+    
+    def _search_page(self, match: str, after: Optional[Tuple[float, int]], limit: int,
+                     filters: Dict) -> List[Dict]:
+        """صفحة من نتائج البحث مرتبة حسب الصلة ثم المعرف، مع بقية المرشحات"""
+        conditions, params = self._filter_clause({**filters, 'query': None})
+        if after is not None:
+            conditions.append("(search_rank, id) > (?, ?)")
+            params.extend(after)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self._connection().execute(f"""
+            SELECT {', '.join(self.BOOK_COLUMNS)}, search_rank
+            FROM (
+                SELECT b.*, my_library_fts.rank AS search_rank
+                FROM my_library_fts
+                JOIN my_library AS b ON b.id = my_library_fts.rowid
+                WHERE my_library_fts MATCH ?
+            )
+            {where}
+            ORDER BY search_rank, id
+            LIMIT ?
+        """, [match] + params + [limit])
+        
         books = []
         for row in cursor.fetchall():
-            books.append({
-                'id': row[0],
-                'title': row[1],
-                'author': row[2],
-                'category': row[3],
-                'description': row[4],
-                'personal_rating': row[5],
-                'reading_status': row[6],
-                'tags': row[7],
-                'date_added': row[8]
-            })
-        
-        conn.close()
+            book = self._row_to_book(row)
+            book['search_rank'] = row[-1]
+            books.append(book)
         return books
     
-    def search_books(self, query: str) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    @staticmethod
+    def page_cursor(book: Dict) -> Tuple:
+        """مؤشر الصفحة التالية من آخر كتاب معروض: (rank, id) لنتائج البحث و (date_added, id) لغيرها"""
+        if 'search_rank' in book:
+            return book['search_rank'], book['id']
+        return book['date_added'], book['id']
+    
+    def count_books(self, filters: Dict = None) -> int:
+        """عدد الكتب المطابقة للمرشحات دون جلبها"""
+        conditions, params = self._filter_clause(filters)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._connection().execute(f"SELECT COUNT(*) FROM my_library {where}", params).fetchone()[0]
+    
+    def search_books(self, query: str, limit: int = None) -> List[Dict]:
+        """بحث في العنوان والمؤلف والعلامات مرتب حسب الصلة (بادئات الكلمات)
+        
+        لعرض النتائج على صفحات استخدم get_books_page مع {'query': ...}: يحافظ على الترتيب نفسه.
+        """
+        match = self._match_expression(query)
+        if match is None:
+            return self._search_like(query, limit)
         
+        # LIMIT -1 في SQLite تعني بلا حد
+        cursor = self._connection().execute("""
+            SELECT b.id, b.title, b.author, b.category, b.description,
+                   b.personal_rating, b.reading_status, b.tags, b.date_added
+            FROM my_library_fts
+            JOIN my_library AS b ON b.id = my_library_fts.rowid
+            WHERE my_library_fts MATCH ?
+            ORDER BY my_library_fts.rank
+            LIMIT ?
+        """, (match, -1 if limit is None else limit))
+        
+        return [self._row_to_book(row) for row in cursor.fetchall()]
+    
+    def _search_like(self, query: str, limit: int = None) -> List[Dict]:
+        """البحث بمطابقة جزئية عبر LIKE (مسح كامل للجدول)"""
         search_term = f"%{query}%"
-        cursor.execute("""
-            SELECT id, title, author, category, description, 
+        cursor = self._connection().execute("""
+            SELECT id, title, author, category, description,
                    personal_rating, reading_status, tags, date_added
-            FROM my_library 
+            FROM my_library
             WHERE title LIKE ? OR author LIKE ? OR tags LIKE ?
             ORDER BY date_added DESC
-        """, (search_term, search_term, search_term))
+            LIMIT ?
+        """, (search_term, search_term, search_term, -1 if limit is None else limit))
         
-        books = []
-        for row in cursor.fetchall():
-            books.append({
-                'id': row[0],
-                'title': row[1],
-                'author': row[2],
-                'category': row[3],
-                'description': row[4],
-                'personal_rating': row[5],
-                'reading_status': row[6],
-                'tags': row[7],
-                'date_added': row[8]
-            })
-        
-        conn.close()
-        return books
+        return [self._row_to_book(row) for row in cursor.fetchall()]
     
     def update_book(self, book_id: int, **kwargs) -> bool:
         if not kwargs:
             return False
-            
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         
         # بناء استعلام UPDATE ديناميكياً
         fields = []
         values = []
         
         for field, value in kwargs.items():
-            if field in ['title', 'author', 'category', 'description', 
+            if field in ['title', 'author', 'category', 'description',
                         'personal_rating', 'reading_status', 'tags']:
                 fields.append(f"{field} = ?")
                 values.append(value)
         
         if not fields:
-            conn.close()
             return False
         
         values.append(book_id)
         query = f"UPDATE my_library SET {', '.join(fields)} WHERE id = ?"
         
-        cursor.execute(query, values)
-        updated = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        
-        return updated
+        try:
+            with self._transaction() as cursor:
+                cursor.execute(query, values)
+                return cursor.rowcount > 0
+        except sqlite3.IntegrityError:
+            # العنوان والمؤلف الجديدان يطابقان كتاباً آخر
+            return False
     
     def delete_book(self, book_id: int) -> bool:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("DELETE FROM my_library WHERE id = ?", (book_id,))
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
-        
-        return deleted
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM my_library WHERE id = ?", (book_id,))
+            return cursor.rowcount > 0
     
     def get_book_by_id(self, book_id: int) -> Optional[Dict]:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT id, title, author, category, description, 
+        row = self._connection().execute("""
+            SELECT id, title, author, category, description,
                    personal_rating, reading_status, tags, date_added
-            FROM my_library 
+            FROM my_library
             WHERE id = ?
-        """, (book_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        """, (book_id,)).fetchone()
         
         if row:
-            return {
-                'id': row[0],
-                'title': row[1],
-                'author': row[2],
-                'category': row[3],
-                'description': row[4],
-                'personal_rating': row[5],
-                'reading_status': row[6],
-                'tags': row[7],
-                'date_added': row[8]
-            }
+            return self._row_to_book(row)
         return None
     
     def get_statistics(self) -> Dict:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        conn = self._connection()
         
         # إجمالي الكتب
-        cursor.execute("SELECT COUNT(*) FROM my_library")
-        total_books = cursor.fetchone()[0]
+        total_books = conn.execute("SELECT COUNT(*) FROM my_library").fetchone()[0]
         
         # حالة القراءة
-        cursor.execute("""
-            SELECT reading_status, COUNT(*) 
-            FROM my_library 
+        reading_stats = dict(conn.execute("""
+            SELECT reading_status, COUNT(*)
+            FROM my_library
             GROUP BY reading_status
-        """)
-        reading_stats = dict(cursor.fetchall())
+        """).fetchall())
         
         # متوسط التقييم
-        cursor.execute("""
-            SELECT AVG(personal_rating) 
-            FROM my_library 
+        avg_rating = conn.execute("""
+            SELECT AVG(personal_rating)
+            FROM my_library
             WHERE personal_rating > 0
-        """)
-        avg_rating = cursor.fetchone()[0] or 0
-        
-        conn.close()
+        """).fetchone()[0] or 0
         
         return {
             'total_books': total_books,
@@ -208,9 +469,228 @@ class LibraryManager:
         }
     
     def reset_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM my_library")
+    
+    # lower() في SQLite يوحد حالة أحرف ASCII فقط و trim() يزيل المسافات فقط
+    _ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+    
+    def _book_key(self, title, author) -> tuple:
+        """مفتاح التعارض: نفس تعبير الفهرس الفريد lower(trim(title)), lower(trim(author))"""
+        return (str(title or '').strip(' ').translate(self._ASCII_LOWER),
+                str(author or '').strip(' ').translate(self._ASCII_LOWER))
+    
+    def _find_keys(self, cursor, keys: List[tuple], chunk_size: int = 400) -> Dict[tuple, int]:
+        """معرفات الكتب الموجودة لمفاتيح دفعة واحدة فقط عبر فهرس العنوان والمؤلف"""
+        found: Dict[tuple, int] = {}
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            # الربط مع قائمة المفاتيح يبحث في الفهرس لكل مفتاح (IN على زوج القيم يمسح الجدول)
+            cursor.execute(f"""
+                SELECT b.id, k.column1, k.column2
+                FROM (VALUES {', '.join(['(?, ?)'] * len(chunk))}) AS k
+                JOIN my_library AS b
+                  ON lower(trim(b.title)) = k.column1 AND lower(trim(b.author)) = k.column2
+                ORDER BY b.id
+            """, [value for key in chunk for value in key])
+            for book_id, title, author in cursor.fetchall():
+                # مكتبة قديمة بفهرس غير فريد: أقدم نسخة هي التي تُحدَّث
+                found.setdefault((title, author), book_id)
+        return found
+    
+    def add_books_bulk(self, books: Iterable[Dict], on_conflict: str = 'update',
+                       batch_size: int = 1000, progress: Callable[[int], None] = None) -> Dict[str, int]:
+        """إضافة كتب كثيرة في معاملة واحدة؛ الكتاب الموجود بنفس العنوان والمؤلف يُحدَّث أو يُتجاهل
+        
+        كل سطر يُعد تحت نتيجة واحدة: inserted لكتاب جديد، updated أو skipped لكتاب كان موجوداً قبل
+        الاستيراد، و duplicates لتكرار كتاب سبق ظهوره في المدخلات نفسها (يُدمج فيه مع سياسة update).
+        """
+        if on_conflict not in self.CONFLICT_POLICIES:
+            raise ValueError(f"سياسة تعارض غير معروفة: {on_conflict}")
+        
+        counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'duplicates': 0}
+        processed = 0
+        books = iter(books)
+        # الكتب الموجودة قبل الاستيراد التي ظهرت فيه، لعد كل منها مرة واحدة
+        touched = set()
+        
+        with self._transaction() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM my_library")
+            last_existing_id = cursor.fetchone()[0]
+            
+            # قراءة المدخلات على دفعات حتى لا تُحمل كلها في الذاكرة
+            while True:
+                batch = list(islice(books, batch_size))
+                if not batch:
+                    break
+                
+                keyed = [(self._book_key(book.get('title'), book.get('author')), book) for book in batch]
+                # البحث عن مفاتيح الدفعة فقط بدل تحميل كل مفاتيح المكتبة
+                known = self._find_keys(cursor, list({key for key, _ in keyed}))
+                
+                inserts: Dict[tuple, Dict] = {}
+                updates = []
+                for key, book in keyed:
+                    fields = {f: book[f] for f in self.BOOK_DEFAULTS if f in book}
+                    book_id = known.get(key)
+                    if book_id is not None:
+                        if on_conflict == 'update':
+                            # تحديث الحقول الموجودة في المدخل فقط
+                            updates.append({'id': book_id, **fields})
+                        if book_id > last_existing_id or book_id in touched:
+                            counts['duplicates'] += 1
+                        else:
+                            touched.add(book_id)
+                            counts['updated' if on_conflict == 'update' else 'skipped'] += 1
+                    elif key in inserts:
+                        # تكرار داخل نفس الدفعة قبل إدراجه
+                        if on_conflict == 'update':
+                            inserts[key].update(fields)
+                        counts['duplicates'] += 1
+                    else:
+                        inserts[key] = {**self.BOOK_DEFAULTS, **fields}
+                        counts['inserted'] += 1
+                
+                if inserts:
+                    cursor.executemany(f"""
+                        INSERT INTO my_library ({', '.join(self.BOOK_DEFAULTS)})
+                        VALUES ({', '.join('?' * len(self.BOOK_DEFAULTS))})
+                    """, [tuple(book.values()) for book in inserts.values()])
+                
+                self._execute_updates(cursor, updates)
+                
+                processed += len(batch)
+                if progress:
+                    progress(processed)
+        
+        return counts
+    
+    def _execute_updates(self, cursor, changes: List[Dict]) -> int:
+        """تنفيذ تعديلات بـ executemany بعد تجميعها حسب الحقول المعدلة"""
+        # executemany يحتاج نفس الأعمدة في كل صف
+        groups: Dict[tuple, list] = {}
+        for change in changes:
+            fields = tuple(f for f in self.BOOK_DEFAULTS if f in change)
+            if fields:
+                groups.setdefault(fields, []).append(tuple(change[f] for f in fields) + (change['id'],))
+        
+        updated = 0
+        for fields, rows in groups.items():
+            cursor.executemany(
+                f"UPDATE my_library SET {', '.join(f'{field} = ?' for field in fields)} WHERE id = ?",
+                rows
+            )
+            updated += cursor.rowcount
+        return updated
+    
+    def update_books_bulk(self, updates: Iterable[Dict], batch_size: int = 1000,
+                          progress: Callable[[int], None] = None) -> int:
+        """تعديل كتب كثيرة في معاملة واحدة؛ كل قاموس يحتوي id والحقول المعدلة"""
+        updated = 0
+        processed = 0
+        updates = iter(updates)
+        
+        with self._transaction() as cursor:
+            while True:
+                batch = list(islice(updates, batch_size))
+                if not batch:
+                    break
+                
+                updated += self._execute_updates(cursor, batch)
+                
+                processed += len(batch)
+                if progress:
+                    progress(processed)
+        
+        return updated
+    
+    def _iter_books(self, batch_size: int = 1000) -> Iterator[Dict]:
+        """قراءة جميع الكتب على دفعات عبر fetchmany"""
+        cursor = self._connection().execute(f"""
+            SELECT {', '.join(self.BOOK_COLUMNS)}
+            FROM my_library
+            ORDER BY id
+        """)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield self._row_to_book(row)
+    
+    @staticmethod
+    def _file_format(path: str, file_format: str = None) -> str:
+        file_format = file_format or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise ValueError(f"صيغة ملف غير مدعومة: {file_format} (csv أو jsonl)")
+        return file_format
+    
+    def export_library(self, path: str, file_format: str = None, batch_size: int = 1000,
+                       progress: Callable[[int], None] = None) -> int:
+        """تصدير المكتبة إلى CSV أو JSON Lines صفاً بصف"""
+        file_format = self._file_format(path, file_format)
+        exported = 0
         
-        cursor.execute("DELETE FROM my_library")
-        conn.commit()
-        conn.close()
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.BOOK_COLUMNS) if file_format == 'csv' else None
+            if writer:
+                writer.writeheader()
+            
+            for book in self._iter_books(batch_size):
+                if writer:
+                    writer.writerow(book)
+                else:
+                    f.write(json.dumps(book, ensure_ascii=False) + '\n')
+                exported += 1
+                if progress and exported % batch_size == 0:
+                    progress(exported)
+        
+        if progress:
+            progress(exported)
+        return exported
+    
+    def import_library(self, path: str, file_format: str = None, on_conflict: str = 'update',
+                       batch_size: int = 1000, progress: Callable[[int], None] = None) -> Dict[str, int]:
+        """استيراد كتب من CSV أو JSON Lines دون تحميل الملف كاملاً في الذاكرة
+        
+        السطر غير الصالح (JSON تالف أو تقييم ليس رقماً بين 0 و5) يُتجاهل ويُبلغ عن رقمه ويُعد في invalid
+        بدل إيقاف الاستيراد كله.
+        """
+        file_format = self._file_format(path, file_format)
+        invalid = 0
+        
+        def read_books(f):
+            nonlocal invalid
+            if file_format == 'csv':
+                # السطر الأول للعناوين
+                rows = enumerate(csv.DictReader(f), start=2)
+            else:
+                rows = ((number, line) for number, line in enumerate(f, start=1) if line.strip())
+            
+            for number, row in rows:
+                try:
+                    if file_format == 'jsonl':
+                        row = json.loads(row)
+                        if not isinstance(row, dict):
+                            raise ValueError("السطر ليس كائن JSON")
+                    book = {field: row[field] for field in self.BOOK_DEFAULTS if row.get(field) not in (None, '')}
+                    # القيم في CSV نصوص، والتقييم يحفظ كرقم؛ غيابه لا يمسح تقييم الكتاب الموجود
+                    if 'personal_rating' in book:
+                        book['personal_rating'] = self._parse_rating(book['personal_rating'])
+                except (ValueError, TypeError) as e:
+                    invalid += 1
+                    print(f"تم تجاهل السطر {number} من {path}: {e}")
+                    continue
+                yield book
+        
+        with open(path, encoding='utf-8', newline='') as f:
+            counts = self.add_books_bulk(read_books(f), on_conflict, batch_size, progress)
+        counts['invalid'] = invalid
+        return counts
+    
+    @staticmethod
+    def _parse_rating(value) -> float:
+        rating = float(value)
+        if not 0 <= rating <= 5:
+            raise ValueError(f"التقييم {value} خارج المدى 0-5")
+        return rating
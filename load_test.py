@@ -0,0 +1,114 @@
+import asyncio
+import random
+import time
+import numpy as np
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+from config import SERVER_CONFIG
+
+# مزيج الطلبات الافتراضي: (الوزن، المسار، المعاملات)
+DEFAULT_MIX = [
+    (5, '/recommend', [{'q': q} for q in ('python', 'machine learning', 'clean code', 'web', 'data')]),
+    (3, '/similar', [{'book_id': i, 'k': 5} for i in range(1, 51)]),
+    (2, '/search', [{'q': q, 'limit': 10} for q in ('security', 'robert', 'rust', 'cloud')]),
+    (1, '/top_rated', [{'limit': 10}]),
+]
+
+
+class LoadTestClient:
+    """عميل اختبار حمل محلي: اتصالات متزامنة دائمة تقيس الإنتاجية ومئينات الزمن"""
+
+    def __init__(self, host: str = None, port: int = None, mix: List[Tuple] = None, seed: int = 0):
+        self.host = host or SERVER_CONFIG['host']
+        self.port = port or SERVER_CONFIG['port']
+        self.mix = mix or DEFAULT_MIX
+        self.random = random.Random(seed)
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors = 0
+
+    def _next_request(self) -> Tuple[str, bytes]:
+        weights = [weight for weight, _, _ in self.mix]
+        _, path, choices = self.random.choices(self.mix, weights)[0]
+        target = f"{path}?{urlencode(self.random.choice(choices))}"
+        request = f"GET {target} HTTP/1.1\r\nHost: {self.host}\r\nConnection: keep-alive\r\n\r\n"
+        return path, request.encode('utf-8')
+
+    async def _connection(self, deadline: float, remaining: List[int]):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while time.perf_counter() < deadline and remaining[0] > 0:
+                remaining[0] -= 1
+                path, request = self._next_request()
+                start = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+
+                head = await reader.readuntil(b'\r\n\r\n')
+                lines = head.decode('latin-1').split('\r\n')
+                status = int(lines[0].split(' ')[1])
+                length = next(int(line.split(':', 1)[1]) for line in lines
+                              if line.lower().startswith('content-length:'))
+                await reader.readexactly(length)
+
+                self.latencies.setdefault(path, []).append((time.perf_counter() - start) * 1000)
+                if status != 200:
+                    self.errors += 1
+        finally:
+            writer.close()
+
+    async def run(self, connections: int = 16, duration: float = 10.0, requests: int = None) -> Dict:
+        deadline = time.perf_counter() + duration
+        remaining = [requests if requests is not None else float('inf')]
+        start = time.perf_counter()
+        await asyncio.gather(*(self._connection(deadline, remaining) for _ in range(connections)))
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed: float) -> Dict:
+        """الإنتاجية الكلية ومئينات الزمن لكل مسار وللمجموع"""
+        def percentiles(samples):
+            samples = np.asarray(samples)
+            return {
+                'count': len(samples),
+                'p50_ms': float(np.percentile(samples, 50)),
+                'p90_ms': float(np.percentile(samples, 90)),
+                'p99_ms': float(np.percentile(samples, 99)),
+                'max_ms': float(samples.max())
+            }
+
+        all_samples = [x for samples in self.latencies.values() for x in samples]
+        if not all_samples:
+            return {'requests': 0, 'errors': self.errors, 'seconds': elapsed}
+        return {
+            'requests': len(all_samples),
+            'errors': self.errors,
+            'seconds': elapsed,
+            'throughput_rps': len(all_samples) / elapsed,
+            'overall': percentiles(all_samples),
+            'endpoints': {path: percentiles(samples) for path, samples in self.latencies.items()}
+        }
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="اختبار حمل لخادم التوصيات")
+    parser.add_argument('--host', default=SERVER_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=SERVER_CONFIG['port'])
+    parser.add_argument('--connections', type=int, default=16, help="عدد الاتصالات المتزامنة")
+    parser.add_argument('--duration', type=float, default=10.0, help="مدة الاختبار بالثواني")
+    parser.add_argument('--requests', type=int, default=None, help="إيقاف بعد هذا العدد من الطلبات")
+    args = parser.parse_args()
+
+    client = LoadTestClient(args.host, args.port)
+    result = asyncio.run(client.run(args.connections, args.duration, args.requests))
+
+    print(f"{result['requests']} طلب خلال {result['seconds']:.2f} ثانية، أخطاء: {result['errors']}")
+    if result['requests']:
+        print(f"الإنتاجية: {result['throughput_rps']:.0f} طلب/ثانية")
+        for name, stats in [('الكل', result['overall'])] + sorted(result['endpoints'].items()):
+            print(f"{name:<12} n={stats['count']:<6} p50={stats['p50_ms']:.2f} p90={stats['p90_ms']:.2f} "
+                  f"p99={stats['p99_ms']:.2f} max={stats['max_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,13 @@ from tkinter import messagebox
 from data_manager import DataManager
 from recommender import BookRecommender
 from book_card import BookCard, BookDetailsDialog
+from virtual_list import VirtualList
 from library_manager import LibraryManager
 from add_book_dialog import AddBookDialog
 from my_library_window import MyLibraryWindow
-from config import CARD_CONFIG, COLORS, FONTS, ICONS, APP_CONFIG, FILTER_OPTIONS, MESSAGES
+from search_scheduler import SearchScheduler
+from ui_dispatcher import UiDispatcher
+from config import CARD_CONFIG, COLORS, FONTS, ICONS, APP_CONFIG, FILTER_OPTIONS, MESSAGES, SEARCH_CONFIG
 from typing import List, Dict
 import threading
 
@@ -22,11 +25,29 @@ class MainApplication(ctk.CTk):
         # إعداد النافذة الرئيسية
         self.setup_main_window()
         
+        # الخيوط لا تلمس عناصر الواجهة مباشرة بل ترسل رسائل تعالج في الحلقة الرئيسية
+        self.ui = UiDispatcher(self)
+        self.ui.register('data_loaded', lambda _: self._on_data_loaded())
+        self.ui.register('results', self._on_results)
+        self.ui.register('search_results', self._show_search_results)
+        self.ui.register('search_error', self._show_search_error)
+        self.ui.register('error', self.show_error)
+        self.ui.register('loading', self.show_loading, coalesce=True)
+        
         # إعداد البيانات
         self.data_manager = None
         self.recommender = None
         self.current_recommendations = []
         
+        # بحث بخيط عمل واحد يتجاهل النتائج التي تجاوزتها كتابة أحدث
+        self.search_scheduler = SearchScheduler(
+            self._run_search,
+            on_result=lambda generation, params, results: self.ui.post(
+                'search_results', (generation, params['query'], tuple(results))),
+            on_error=lambda generation, params, e: self.ui.post('search_error', (generation, str(e))),
+            debounce_ms=SEARCH_CONFIG['debounce_ms']
+        )
+        
         # إعداد المكتبة الشخصية
         self.library_manager = LibraryManager()
         
@@ -84,6 +105,12 @@ class MainApplication(ctk.CTk):
             width=400
         )
         self.search_entry.grid(row=1, column=0, padx=20, pady=10, sticky="w")
+        self.search_entry.bind("<Down>", lambda e: self.move_suggestion(1))
+        self.search_entry.bind("<Up>", lambda e: self.move_suggestion(-1))
+        self.search_entry.bind("<Return>", self.on_search_return)
+        self.search_entry.bind("<Escape>", lambda e: self.hide_suggestions())
+        self.search_entry.bind("<FocusOut>", lambda e: self.after(200, self.hide_suggestions))
+        self.create_suggestions_box()
         
         # زر البحث
         self.search_btn = ctk.CTkButton(
@@ -197,8 +224,28 @@ class MainApplication(ctk.CTk):
     
     def create_results_frame(self):
         """إنشاء إطار النتائج"""
-        self.results_frame = ctk.CTkScrollableFrame(self, fg_color=self.colors['surface'])
+        self.results_frame = ctk.CTkFrame(self, fg_color=self.colors['surface'])
         self.results_frame.grid(row=1, column=0, sticky="nsew", padx=(20, 10), pady=10)
+        self.results_frame.grid_rowconfigure(1, weight=1)
+        self.results_frame.grid_columnconfigure(0, weight=1)
+        
+        self.results_title = ctk.CTkLabel(
+            self.results_frame,
+            text="",
+            font=FONTS['subtitle'],
+            text_color=self.colors['primary']
+        )
+        self.results_title.grid(row=0, column=0, pady=10)
+        
+        # قائمة افتراضية: بطاقات الجزء الظاهر فقط تنشأ ثم يعاد استخدامها أثناء التمرير
+        self.results_list = VirtualList(
+            self.results_frame,
+            create_row=lambda parent: BookCard(parent, on_click=self.show_book_details),
+            update_row=lambda card, book: card.update_data(book),
+            row_height=CARD_CONFIG['height'],
+            fg_color=self.colors['surface']
+        )
+        self.results_list.grid(row=1, column=0, sticky="nsew", padx=10, pady=(0, 10))
     
     def create_sidebar(self):
         """إنشاء الشريط الجانبي"""
@@ -296,24 +343,30 @@ class MainApplication(ctk.CTk):
         """تحميل البيانات"""
         def load_thread():
             try:
-                self.data_manager = DataManager('programming_books_dataset.csv')
+                data_manager = DataManager('programming_books_dataset.csv')
+                # بناء فهرس الإكمال هنا بدل أول حرف يكتبه المستخدم في الخيط الرئيسي
+                data_manager.autocomplete
+                self.data_manager = data_manager
                 self.recommender = BookRecommender(self.data_manager)
-                
-                # تحديث المرشحات
-                self.update_filters()
-                
-                # عرض الكتب الأعلى تقييماً
-                self.show_top_rated()
-                
-                # تحديث المعلومات السريعة
-                self.update_quick_info()
+                self.ui.post('data_loaded')
                 
             except Exception as e:
-                self.show_error(f"خطأ في تحميل البيانات: {str(e)}")
+                self.ui.post('error', f"خطأ في تحميل البيانات: {str(e)}")
         
         # تشغيل التحميل في خيط منفصل
         threading.Thread(target=load_thread, daemon=True).start()
     
+    def _on_data_loaded(self):
+        """تحديث الواجهة بعد انتهاء التحميل (في الخيط الرئيسي)"""
+        # تحديث المرشحات
+        self.update_filters()
+        
+        # عرض الكتب الأعلى تقييماً
+        self.show_top_rated()
+        
+        # تحديث المعلومات السريعة
+        self.update_quick_info()
+    
     def update_filters(self):
         """تحديث قيم المرشحات"""
         if self.data_manager:
@@ -345,7 +398,6 @@ class MainApplication(ctk.CTk):
             self.loading_label.configure(text=f"{ICONS['refresh']} جاري التحميل...")
         else:
             self.loading_label.configure(text="")
-        self.update()
     
     def update_status(self, message: str):
         """تحديث رسالة الحالة"""
@@ -360,6 +412,108 @@ class MainApplication(ctk.CTk):
             # في حالة عدم وجود بيئة رسومية، عرض الخطأ في Terminal
             print(f"❌ خطأ: {message}")
     
+    def create_suggestions_box(self):
+        """قائمة الإكمال التلقائي المنسدلة أسفل حقل البحث"""
+        self.suggestions_box = ctk.CTkFrame(
+            self,
+            fg_color=self.colors['surface'],
+            border_width=1,
+            border_color=self.colors['border']
+        )
+        self.suggestions = []
+        self.suggestion_index = -1
+        self._selecting_suggestion = False
+        
+        # أزرار ثابتة يعاد استخدامها بتغيير نصها فقط
+        self.suggestion_buttons = []
+        for i in range(SEARCH_CONFIG['suggestions']):
+            button = ctk.CTkButton(
+                self.suggestions_box,
+                text="",
+                anchor="w",
+                font=FONTS['body'],
+                fg_color="transparent",
+                text_color=self.colors['text'],
+                hover_color=self.colors['border'],
+                command=lambda i=i: self.select_suggestion(i)
+            )
+            self.suggestion_buttons.append(button)
+    
+    def update_suggestions(self, text: str):
+        """عرض الإكمالات المطابقة لبادئة النص (بحث في الفهرس المرتب دون خيط عمل)"""
+        autocomplete = self.data_manager.autocomplete if self.data_manager else None
+        self.suggestions = autocomplete.complete(text, SEARCH_CONFIG['suggestions']) if autocomplete else []
+        self.suggestion_index = -1
+        if not self.suggestions:
+            self.hide_suggestions()
+            return
+        
+        kind_icons = {'title': ICONS['book'], 'author': ICONS['author'],
+                      'category': ICONS['category'], 'tag': ICONS['filter']}
+        for i, button in enumerate(self.suggestion_buttons):
+            if i < len(self.suggestions):
+                suggestion = self.suggestions[i]
+                button.configure(text=f"{kind_icons[suggestion['kind']]} {suggestion['text']}", fg_color="transparent")
+                button.pack(fill="x", padx=2, pady=1)
+            else:
+                button.pack_forget()
+        
+        self.suggestions_box.place(in_=self.search_entry, x=0, rely=1.0, relwidth=1.0)
+        self.suggestions_box.lift()
+    
+    def hide_suggestions(self):
+        self.suggestions_box.place_forget()
+        self.suggestion_index = -1
+    
+    def move_suggestion(self, step: int):
+        """التنقل بين الاقتراحات بالأسهم"""
+        if not self.suggestions or not self.suggestions_box.winfo_ismapped():
+            return
+        if 0 <= self.suggestion_index < len(self.suggestions):
+            self.suggestion_buttons[self.suggestion_index].configure(fg_color="transparent")
+        self.suggestion_index = (self.suggestion_index + step) % len(self.suggestions)
+        self.suggestion_buttons[self.suggestion_index].configure(fg_color=self.colors['border'])
+    
+    def on_search_return(self, event=None):
+        if self.suggestions_box.winfo_ismapped() and self.suggestion_index >= 0:
+            self.select_suggestion(self.suggestion_index)
+        else:
+            self.hide_suggestions()
+            self.perform_search()
+    
+    def select_suggestion(self, index: int):
+        """اختيار اقتراح: الكتاب يعرض مباشرة مع مشابهاته، وغيره يبحث بالنص المختار"""
+        if index >= len(self.suggestions):
+            return
+        suggestion = self.suggestions[index]
+        self.hide_suggestions()
+        
+        # تغيير النص لا يعيد فتح القائمة ولا يجدول بحثاً مؤجلاً
+        self._selecting_suggestion = True
+        try:
+            self.search_var.set(suggestion['text'])
+        finally:
+            self._selecting_suggestion = False
+        self.search_entry.icursor("end")
+        
+        if suggestion['kind'] == 'title' and self.recommender:
+            self.show_selected_book(suggestion['book_id'], suggestion['text'])
+        else:
+            self.perform_search()
+    
+    def show_selected_book(self, book_id: int, title: str):
+        """عرض كتاب محدد مع أقرب الكتب إليه من فهرس الجيران دون مسار التوصية الكامل"""
+        self.search_scheduler.cancel()
+        book = self.recommender.get_book(book_id)
+        if book is None:
+            self.perform_search()
+            return
+        
+        results = [book] + self.recommender.get_similar_books(book_id, SEARCH_CONFIG['max_results'] - 1)
+        self.current_recommendations = results
+        self.display_results(results, title)
+        self.show_loading(False)
+    
     def show_info(self, message: str):
         """عرض رسالة معلومات"""
         try:
@@ -371,67 +525,75 @@ class MainApplication(ctk.CTk):
     
     def on_search_text_change(self, *args):
         """حدث تغيير النص في البحث"""
-        # بحث تلقائي عند كتابة 3 أحرف أو أكثر
+        if self._selecting_suggestion:
+            return
+        
+        # بحث تلقائي بعد توقف الكتابة عند 3 أحرف أو أكثر
         search_text = self.search_var.get()
-        if len(search_text) >= 3:
-            self.perform_search()
+        self.update_suggestions(search_text)
+        if len(search_text) >= SEARCH_CONFIG['min_chars']:
+            self.perform_search(debounce=True)
+        else:
+            # النص أقصر من الحد: نتيجة أي بحث جارٍ لم تعد مطلوبة
+            self.search_scheduler.cancel()
+            self.show_loading(False)
     
     def on_filter_change(self, *args):
         """حدث تغيير المرشحات"""
-        # تحديث النتائج عند تغيير المرشحات
+        # تحديث النتائج عند تغيير المرشحات (التغييرات المتتالية تدمج في بحث واحد)
         search_text = self.search_var.get()
         if search_text.strip():
-            self.perform_search()
+            self.perform_search(debounce=True)
     
-    def perform_search(self):
+    def perform_search(self, debounce: bool = False):
         """تنفيذ البحث"""
-        def search_thread():
-            try:
-                self.show_loading(True)
-                
-                search_text = self.search_var.get()
-                category = self.category_var.get()
-                language = self.language_var.get()
-                difficulty = self.difficulty_var.get()
-                min_rating = float(self.min_rating_var.get())
-                
-                # تنفيذ البحث
-                results = self.recommender.recommend_books(
-                    query=search_text,
-                    category=category if category != "الكل" else None,
-                    language=language if language != "الكل" else None,
-                    difficulty=difficulty if difficulty != "الكل" else None,
-                    min_rating=min_rating,
-                    max_results=12
-                )
-                
-                self.current_recommendations = results
-                
-                # تحديث الواجهة في الخيط الرئيسي
-                self.after(0, lambda: self.display_results(results, search_text))
-                
-            except Exception as e:
-                self.after(0, lambda: self.show_error(f"خطأ في البحث: {str(e)}"))
-            finally:
-                self.after(0, lambda: self.show_loading(False))
-        
-        threading.Thread(target=search_thread, daemon=True).start()
+        # قراءة المدخلات في الخيط الرئيسي ثم إرسالها لخيط البحث
+        category = self.category_var.get()
+        language = self.language_var.get()
+        difficulty = self.difficulty_var.get()
+        params = {
+            'query': self.search_var.get(),
+            'category': category if category != "الكل" else None,
+            'language': language if language != "الكل" else None,
+            'difficulty': difficulty if difficulty != "الكل" else None,
+            'min_rating': float(self.min_rating_var.get()),
+            'max_results': SEARCH_CONFIG['max_results']
+        }
+        
+        self.show_loading(True)
+        self.search_scheduler.submit(params, delay_ms=None if debounce else 0)
+    
+    def _run_search(self, params: Dict) -> List[Dict]:
+        """تنفيذ البحث في خيط العمل"""
+        return self.recommender.recommend_books(**params)
+    
+    def _show_search_results(self, message: tuple):
+        generation, query, results = message
+        # فحص ثانٍ في الخيط الرئيسي: ربما وصلت كتابة أحدث بعد انتهاء البحث
+        if not self.search_scheduler.is_current(generation):
+            return
+        self.current_recommendations = list(results)
+        self.display_results(self.current_recommendations, query)
+        self.show_loading(False)
+    
+    def _show_search_error(self, message: tuple):
+        generation, error = message
+        if not self.search_scheduler.is_current(generation):
+            return
+        self.show_loading(False)
+        self.show_error(f"خطأ في البحث: {error}")
+    
+    def _on_results(self, message: tuple):
+        """عرض نتائج جاهزة من خيط عمل (مثل الأعلى تقييماً)"""
+        search_text, results = message
+        self.display_results(list(results), search_text)
     
     def display_results(self, results: List[Dict], search_text: str):
         """عرض النتائج"""
-        # مسح النتائج السابقة
-        for widget in self.results_frame.winfo_children():
-            widget.destroy()
-        
         if not results:
-            # إنشاء رسالة عدم وجود نتائج
-            no_results_label = ctk.CTkLabel(
-                self.results_frame,
-                text=MESSAGES['no_results'],
-                font=FONTS['subtitle'],
-                text_color=self.colors['text_secondary']
-            )
-            no_results_label.pack(expand=True)
+            # رسالة عدم وجود نتائج
+            self.results_title.configure(text=MESSAGES['no_results'], text_color=self.colors['text_secondary'])
+            self.results_list.set_items([])
             return
         
         # عرض النتائج
@@ -440,24 +602,10 @@ class MainApplication(ctk.CTk):
         else:
             title = f"{ICONS['recommendations']} التوصيات ({len(results)} كتاب)"
         
-        results_title = ctk.CTkLabel(
-            self.results_frame,
-            text=title,
-            font=FONTS['subtitle'],
-            text_color=self.colors['primary']
-        )
-        results_title.pack(pady=10)
-        
-        # عرض البطاقات
-        for i, book in enumerate(results):
-            card = BookCard(
-                self.results_frame,
-                book,
-                on_click=self.show_book_details,
-                width=CARD_CONFIG['width'],
-                height=CARD_CONFIG['height']
-            )
-            card.pack(fill="x", padx=10, pady=5)
+        self.results_title.configure(text=title, text_color=self.colors['primary'])
+        
+        # تحديث البطاقات الموجودة بدلاً من إنشاء بطاقة لكل نتيجة
+        self.results_list.set_items(results)
     
     def show_book_details(self, book_data: Dict):
         """عرض تفاصيل الكتاب"""
@@ -466,9 +614,12 @@ class MainApplication(ctk.CTk):
     
     def show_top_rated(self):
         """عرض الكتب الأعلى تقييماً"""
+        # عرض الأعلى تقييماً يلغي أي بحث منتظر حتى لا يستبدل النتائج
+        self.search_scheduler.cancel()
+        self.show_loading(True)
+        
         def get_top_rated():
             try:
-                self.show_loading(True)
                 top_books = self.data_manager.get_top_rated_books(limit=12)
                 results = []
                 for _, book in top_books.iterrows():
@@ -487,12 +638,12 @@ class MainApplication(ctk.CTk):
                         'rating_category': book['rating_category']
                     })
                 
-                self.after(0, lambda: self.display_results(results, ""))
+                self.ui.post('results', ("", tuple(results)))
                 
             except Exception as e:
-                self.after(0, lambda: self.show_error(f"خطأ في جلب الكتب الأعلى تقييماً: {str(e)}"))
+                self.ui.post('error', f"خطأ في جلب الكتب الأعلى تقييماً: {str(e)}")
             finally:
-                self.after(0, lambda: self.show_loading(False))
+                self.ui.post('loading', False)
         
         threading.Thread(target=get_top_rated, daemon=True).start()
     
@@ -681,6 +832,9 @@ class MainApplication(ctk.CTk):
     def cleanup(self):
         """تنظيف الموارد قبل إغلاق التطبيق"""
         try:
+            self.search_scheduler.close()
+            self.ui.close()
+            
             # إغلاق اتصال قاعدة بيانات المكتبة الشخصية
             if hasattr(self, 'library_manager'):
                 self.library_manager.close()
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import shutil
+from scipy import sparse
+from typing import Dict, Optional
+
+
+class ModelCache:
+    """تخزين مؤقت لنموذج TF-IDF المدرب على القرص مع إبطال تلقائي"""
+
+    FORMAT_VERSION = 1
+    MODEL_FILE = 'model.pkl'
+    KEY_DIR_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+
+    def __init__(self, cache_root: str, source_hash: str, params: Dict):
+        self.cache_root = cache_root
+        # المفتاح يجمع بصمة ملف البيانات وإعدادات المتجه وإصدار التنسيق
+        fingerprint = json.dumps(
+            {'version': self.FORMAT_VERSION, 'source': source_hash, 'params': params},
+            sort_keys=True, default=str
+        )
+        self.key = hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+        self.directory = os.path.join(cache_root, self.key[:16])
+
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.directory, self.MODEL_FILE)
+
+    @property
+    def neighbors_dir(self) -> str:
+        return os.path.join(self.directory, 'neighbors')
+
+    @property
+    def ann_dir(self) -> str:
+        return os.path.join(self.directory, 'ann')
+
+    def load(self) -> Optional[Dict]:
+        """تحميل النموذج المحفوظ أو None إذا كان غير موجود أو تالفاً أو قديماً"""
+        if not os.path.exists(self.model_path):
+            return None
+        try:
+            with open(self.model_path, 'rb') as f:
+                payload = pickle.load(f)
+
+            if payload.get('version') != self.FORMAT_VERSION or payload.get('key') != self.key:
+                return None
+
+            data, indices, indptr = payload['matrix']
+            feature_matrix = sparse.csr_matrix((data, indices, indptr), shape=payload['shape'])
+            if feature_matrix.shape[1] != len(payload['vocabulary']):
+                return None
+
+            return {
+                'vocabulary': payload['vocabulary'],
+                'idf': payload['idf'],
+                'feature_matrix': feature_matrix
+            }
+        except Exception as e:
+            print(f"تعذر قراءة النموذج المحفوظ، ستتم إعادة البناء: {e}")
+            return None
+
+    def save(self, vocabulary: Dict[str, int], idf, feature_matrix):
+        """حفظ المفردات وأوزان idf والمصفوفة المتناثرة وحذف الإصدارات القديمة"""
+        os.makedirs(self.directory, exist_ok=True)
+        feature_matrix = sparse.csr_matrix(feature_matrix)
+        payload = {
+            'version': self.FORMAT_VERSION,
+            'key': self.key,
+            'vocabulary': vocabulary,
+            'idf': idf,
+            'matrix': (feature_matrix.data, feature_matrix.indices, feature_matrix.indptr),
+            'shape': feature_matrix.shape
+        }
+
+        tmp_path = self.model_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.model_path)
+
+        self._prune()
+
+    def _prune(self):
+        """حذف مجلدات النماذج التي لم تعد مطابقة لملف البيانات الحالي"""
+        for name in os.listdir(self.cache_root):
+            path = os.path.join(self.cache_root, name)
+            if path != self.directory and self.KEY_DIR_PATTERN.match(name) and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
@@ -1,7 +1,8 @@
 import customtkinter as ctk
 from tkinter import messagebox
 from library_manager import LibraryManager
-from config import COLORS, FONTS, ICONS
+from config import COLORS, FONTS, ICONS, DATABASE_CONFIG, CARD_CONFIG
+from virtual_list import VirtualList
 from typing import Dict
 
 class MyLibraryWindow(ctk.CTkToplevel):
@@ -12,8 +13,12 @@ class MyLibraryWindow(ctk.CTkToplevel):
         self.parent = parent
         self.library_manager = library_manager
         self.colors = colors
-        self.all_books = []
         self.filtered_books = []
+        # الكتب تحمل على صفحات عبر مؤشر آخر كتاب معروض
+        self.page_size = DATABASE_CONFIG['page_size']
+        self.next_cursor = None
+        self.total_books = 0
+        self.filtered_count = 0
         
         # إعداد النافذة
         self.setup_window()
@@ -39,7 +44,7 @@ class MyLibraryWindow(ctk.CTkToplevel):
     def create_widgets(self):
         """إنشاء عناصر النافذة"""
         # الإطار الرئيسي
-        main_frame = ctk.CTkScrollableFrame(self, fg_color="transparent")
+        main_frame = ctk.CTkFrame(self, fg_color="transparent")
         main_frame.pack(fill="both", expand=True, padx=20, pady=20)
         
         # عنوان النافذة
@@ -99,12 +104,21 @@ class MyLibraryWindow(ctk.CTkToplevel):
         )
         self.results_label.pack(anchor="w", pady=(0, 10))
         
-        # إطار الكتب
-        self.books_frame = ctk.CTkScrollableFrame(
+        # قائمة الكتب الافتراضية: الصفحة التالية تجلب عند الوصول إلى نهاية القائمة
+        self.books_list = VirtualList(
             main_frame,
+            create_row=lambda parent: LibraryBookCard(
+                parent, self.colors, self._adjust_color,
+                on_edit=self.edit_book,
+                on_details=self.show_book_details,
+                on_delete=self.delete_book
+            ),
+            update_row=lambda card, book: card.update_data(book),
+            row_height=CARD_CONFIG['library_height'],
+            on_end_reached=self.load_more_books,
             fg_color=self.colors['surface']
         )
-        self.books_frame.pack(fill="both", expand=True)
+        self.books_list.pack(fill="both", expand=True)
         
         # رسالة عدم وجود كتب
         self.no_books_label = ctk.CTkLabel(
@@ -117,27 +131,48 @@ class MyLibraryWindow(ctk.CTkToplevel):
     
     def refresh_books(self):
         """تحديث قائمة الكتب"""
-        self.all_books = self.library_manager.get_all_books()
-        self.filtered_books = self.all_books.copy()
-        self.display_books()
+        self.total_books = self.library_manager.count_books()
+        self.load_first_page()
     
     def on_search_change(self, event=None):
         """معالجة تغيير نص البحث"""
+        self.load_first_page()
+    
+    def _current_filters(self) -> Dict:
         query = self.search_entry.get().strip()
+        return {'query': query} if query else None
+    
+    def load_first_page(self):
+        """إعادة العرض من الصفحة الأولى للمرشحات الحالية"""
+        filters = self._current_filters()
+        self.filtered_count = self.library_manager.count_books(filters) if filters else self.total_books
+        self.filtered_books = []
+        self.next_cursor = None
         
-        if not query:
-            self.filtered_books = self.all_books.copy()
-        else:
-            self.filtered_books = self.library_manager.search_books(query)
-        
+        page = self._fetch_page()
         self.display_books()
+        self.books_list.set_items(page)
+    
+    def load_more_books(self):
+        """جلب الصفحة التالية وإضافتها إلى القائمة"""
+        if len(self.filtered_books) >= self.filtered_count:
+            return
+        page = self._fetch_page()
+        if page:
+            self.books_list.append_items(page)
+    
+    def _fetch_page(self):
+        page = self.library_manager.get_books_page(self.next_cursor, self.page_size, self._current_filters())
+        if page:
+            self.next_cursor = self.library_manager.page_cursor(page[-1])
+        else:
+            # المكتبة تغيرت منذ حساب العدد: لا مزيد من الصفحات
+            self.filtered_count = len(self.filtered_books)
+        self.filtered_books.extend(page)
+        return page
     
     def display_books(self):
-        """عرض قائمة الكتب"""
-        # مسح الكتب السابقة
-        for widget in self.books_frame.winfo_children():
-            widget.destroy()
-        
+        """تحديث رسالة عدم وجود كتب وعدد النتائج"""
         # عرض رسالة عدم وجود كتب
         if not self.filtered_books:
             if self.search_entry.get().strip():
@@ -148,155 +183,20 @@ class MyLibraryWindow(ctk.CTkToplevel):
                 self.no_books_label.configure(
                     text=f"{ICONS['info']} مكتبتك فارغة حالياً\nقم بإضافة كتب جديدة من النافذة الرئيسية"
                 )
+            self.books_list.pack_forget()
             self.no_books_label.pack(expand=True)
             self.results_label.configure(text="")
             return
         
         # إخفاء رسالة عدم وجود كتب
         self.no_books_label.pack_forget()
+        self.books_list.pack(fill="both", expand=True)
         
         # تحديث عدد النتائج
-        total_text = f"📚 عدد الكتب: {len(self.filtered_books)} من أصل {len(self.all_books)}"
+        total_text = f"📚 عدد الكتب: {self.filtered_count} من أصل {self.total_books}"
         if self.search_entry.get().strip():
             total_text += f" | 🔍 البحث: '{self.search_entry.get().strip()}'"
         self.results_label.configure(text=total_text)
-        
-        # عرض الكتب
-        for book in self.filtered_books:
-            self.create_book_card(book)
-    
-    def create_book_card(self, book: Dict):
-        """إنشاء بطاقة كتاب"""
-        book_frame = ctk.CTkFrame(
-            self.books_frame,
-            fg_color=self.colors['background'],
-            border_color=self.colors['border'],
-            border_width=1
-        )
-        book_frame.pack(fill="x", pady=5, padx=5)
-        
-        # الإطار الداخلي
-        inner_frame = ctk.CTkFrame(book_frame, fg_color="transparent")
-        inner_frame.pack(fill="both", expand=True, padx=15, pady=15)
-        
-        # عنوان الكتاب
-        title_label = ctk.CTkLabel(
-            inner_frame,
-            text=f"{ICONS['book']} {book['title']}",
-            font=("Helvetica", 16, "bold"),
-            text_color=self.colors['primary'],
-            anchor="w"
-        )
-        title_label.pack(fill="x", pady=(0, 5))
-        
-        # المؤلف
-        author_label = ctk.CTkLabel(
-            inner_frame,
-            text=f"{ICONS['author']} {book['author']}",
-            font=FONTS['body'],
-            text_color=self.colors['text'],
-            anchor="w"
-        )
-        author_label.pack(fill="x", pady=(0, 8))
-        
-        # معلومات إضافية
-        info_text = ""
-        if book['category']:
-            info_text += f"{ICONS['category']} {book['category']} | "
-        if book['personal_rating'] > 0:
-            stars = "⭐" * int(book['personal_rating'])
-            info_text += f"{ICONS['rating']} {stars} ({book['personal_rating']}/5) | "
-        if book['reading_status']:
-            status_icon = "📖" if book['reading_status'] == "أقرأ حالياً" else "✅" if book['reading_status'] == "مكتمل" else "⏳"
-            info_text += f"{status_icon} {book['reading_status']}"
-        
-        if info_text:
-            info_label = ctk.CTkLabel(
-                inner_frame,
-                text=info_text,
-                font=FONTS['body'],
-                text_color=self.colors['text_secondary'],
-                anchor="w",
-                wraplength=600
-            )
-            info_label.pack(fill="x", pady=(0, 10))
-        
-        # وصف الكتاب
-        if book['description']:
-            desc_label = ctk.CTkLabel(
-                inner_frame,
-                text=book['description'][:200] + ("..." if len(book['description']) > 200 else ""),
-                font=FONTS['body'],
-                text_color=self.colors['text_secondary'],
-                anchor="w",
-                wraplength=700
-            )
-            desc_label.pack(fill="x", pady=(0, 10))
-        
-        # العلامات
-        if book['tags']:
-            tags_label = ctk.CTkLabel(
-                inner_frame,
-                text=f"🏷️ {book['tags']}",
-                font=FONTS['body'],
-                text_color=self.colors['accent'],
-                anchor="w",
-                wraplength=700
-            )
-            tags_label.pack(fill="x", pady=(0, 10))
-        
-        # تاريخ الإضافة
-        date_label = ctk.CTkLabel(
-            inner_frame,
-            text=f"📅 تاريخ الإضافة: {book['date_added'][:10]}",
-            font=FONTS['body'],
-            text_color=self.colors['text_secondary'],
-            anchor="w"
-        )
-        date_label.pack(fill="x", pady=(0, 10))
-        
-        # أزرار التحكم
-        buttons_frame = ctk.CTkFrame(inner_frame, fg_color="transparent")
-        buttons_frame.pack(fill="x")
-        
-        # زر التعديل
-        edit_btn = ctk.CTkButton(
-            buttons_frame,
-            text=f"{ICONS['edit']} تعديل",
-            command=lambda: self.edit_book(book),
-            font=FONTS['button'],
-            fg_color=self.colors['warning'],
-            hover_color=self._adjust_color(self.colors['warning'], -0.2),
-            width=80,
-            height=30
-        )
-        edit_btn.pack(side="left", padx=(0, 10))
-        
-        # زر التفاصيل
-        details_btn = ctk.CTkButton(
-            buttons_frame,
-            text=f"{ICONS['info']} تفاصيل",
-            command=lambda: self.show_book_details(book),
-            font=FONTS['button'],
-            fg_color=self.colors['info'],
-            hover_color=self._adjust_color(self.colors['info'], -0.2),
-            width=80,
-            height=30
-        )
-        details_btn.pack(side="left", padx=(0, 10))
-        
-        # زر الحذف
-        delete_btn = ctk.CTkButton(
-            buttons_frame,
-            text=f"{ICONS['delete']} حذف",
-            command=lambda: self.delete_book(book),
-            font=FONTS['button'],
-            fg_color=self.colors['error'],
-            hover_color=self._adjust_color(self.colors['error'], -0.2),
-            width=80,
-            height=30
-        )
-        delete_btn.pack(side="right")
     
     def edit_book(self, book: Dict):
         """تعديل كتاب"""
@@ -454,6 +354,135 @@ class MyLibraryWindow(ctk.CTkToplevel):
         self.destroy()
 
 
+class LibraryBookCard(ctk.CTkFrame):
+    """بطاقة كتاب في المكتبة الشخصية قابلة لإعادة الاستخدام لعرض كتاب آخر"""
+    
+    def __init__(self, parent, colors: Dict, adjust_color, on_edit, on_details, on_delete):
+        super().__init__(
+            parent,
+            fg_color=colors['background'],
+            border_color=colors['border'],
+            border_width=1
+        )
+        self.colors = colors
+        self.book = None
+        
+        # الإطار الداخلي
+        inner_frame = ctk.CTkFrame(self, fg_color="transparent")
+        inner_frame.pack(fill="both", expand=True, padx=15, pady=15)
+        
+        # عنوان الكتاب
+        self.title_label = ctk.CTkLabel(
+            inner_frame,
+            text="",
+            font=("Helvetica", 16, "bold"),
+            text_color=colors['primary'],
+            anchor="w"
+        )
+        self.title_label.pack(fill="x", pady=(0, 5))
+        
+        # المؤلف
+        self.author_label = ctk.CTkLabel(
+            inner_frame,
+            text="",
+            font=FONTS['body'],
+            text_color=colors['text'],
+            anchor="w"
+        )
+        self.author_label.pack(fill="x", pady=(0, 8))
+        
+        # الحقول الاختيارية تعرض بالترتيب وتخفى عند عدم وجود قيمة
+        self.info_label = ctk.CTkLabel(
+            inner_frame,
+            text="",
+            font=FONTS['body'],
+            text_color=colors['text_secondary'],
+            anchor="w",
+            wraplength=600
+        )
+        self.desc_label = ctk.CTkLabel(
+            inner_frame,
+            text="",
+            font=FONTS['body'],
+            text_color=colors['text_secondary'],
+            anchor="w",
+            wraplength=700
+        )
+        self.tags_label = ctk.CTkLabel(
+            inner_frame,
+            text="",
+            font=FONTS['body'],
+            text_color=colors['accent'],
+            anchor="w",
+            wraplength=700
+        )
+        
+        # تاريخ الإضافة
+        self.date_label = ctk.CTkLabel(
+            inner_frame,
+            text="",
+            font=FONTS['body'],
+            text_color=colors['text_secondary'],
+            anchor="w"
+        )
+        self.optional_labels = [self.info_label, self.desc_label, self.tags_label]
+        
+        # أزرار التحكم (تستخدم الكتاب المعروض حالياً)
+        self.buttons_frame = ctk.CTkFrame(inner_frame, fg_color="transparent")
+        
+        for text, command, color, side, padx in (
+            (f"{ICONS['edit']} تعديل", on_edit, 'warning', "left", (0, 10)),
+            (f"{ICONS['info']} تفاصيل", on_details, 'info', "left", (0, 10)),
+            (f"{ICONS['delete']} حذف", on_delete, 'error', "right", 0)
+        ):
+            ctk.CTkButton(
+                self.buttons_frame,
+                text=text,
+                command=lambda c=command: c(self.book),
+                font=FONTS['button'],
+                fg_color=colors[color],
+                hover_color=adjust_color(colors[color], -0.2),
+                width=80,
+                height=30
+            ).pack(side=side, padx=padx)
+    
+    def update_data(self, book: Dict):
+        """عرض كتاب في البطاقة دون إعادة إنشاء عناصرها"""
+        self.book = book
+        self.title_label.configure(text=f"{ICONS['book']} {book['title']}")
+        self.author_label.configure(text=f"{ICONS['author']} {book['author']}")
+        
+        # معلومات إضافية
+        info_text = ""
+        if book['category']:
+            info_text += f"{ICONS['category']} {book['category']} | "
+        if book['personal_rating'] > 0:
+            stars = "⭐" * int(book['personal_rating'])
+            info_text += f"{ICONS['rating']} {stars} ({book['personal_rating']}/5) | "
+        if book['reading_status']:
+            status_icon = "📖" if book['reading_status'] == "أقرأ حالياً" else "✅" if book['reading_status'] == "مكتمل" else "⏳"
+            info_text += f"{status_icon} {book['reading_status']}"
+        
+        # وصف الكتاب
+        description = book['description'] or ""
+        if len(description) > 200:
+            description = description[:200] + "..."
+        
+        texts = [info_text, description, f"🏷️ {book['tags']}" if book['tags'] else ""]
+        
+        # إعادة ترتيب العناصر الظاهرة بحسب الحقول الموجودة في هذا الكتاب
+        for label in self.optional_labels + [self.date_label, self.buttons_frame]:
+            label.pack_forget()
+        for label, text in zip(self.optional_labels, texts):
+            if text:
+                label.configure(text=text)
+                label.pack(fill="x", pady=(0, 10))
+        
+        self.date_label.configure(text=f"📅 تاريخ الإضافة: {book['date_added'][:10]}")
+        self.date_label.pack(fill="x", pady=(0, 10))
+        self.buttons_frame.pack(fill="x")
+
+
 class EditBookDialog(ctk.CTkToplevel):
     """نافذة تعديل كتاب"""
     
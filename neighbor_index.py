@@ -0,0 +1,132 @@
+import json
+import os
+import numpy as np
+from typing import Optional, Tuple
+from similarity_engine import drop_self
+
+
+class NeighborIndex:
+    """فهرس أقرب الجيران المحسوب مسبقاً والمحفوظ على القرص"""
+
+    FORMAT_VERSION = 1
+    META_FILE = 'meta.json'
+    ARRAY_FILES = ('book_ids', 'neighbor_ids', 'scores')
+
+    def __init__(self, book_ids: np.ndarray, neighbor_ids: np.ndarray,
+                 scores: np.ndarray, source_hash: str = None):
+        # الصفوف مرتبة حسب book_id حتى يكون البحث عبر searchsorted دون بناء قاموس
+        self.book_ids = book_ids
+        self.neighbor_ids = neighbor_ids
+        self.scores = scores
+        self.source_hash = source_hash
+
+    @property
+    def k(self) -> int:
+        return self.neighbor_ids.shape[1]
+
+    def __len__(self) -> int:
+        return self.book_ids.shape[0]
+
+    @classmethod
+    def build(cls, similarity_engine, book_ids, k: int,
+              source_hash: str = None) -> 'NeighborIndex':
+        """بناء الفهرس من محرك التشابه (خطوة غير متصلة)"""
+        book_ids = np.asarray(book_ids)
+        # k + 1 لأن الكتاب نفسه من بين النتائج
+        rows = np.arange(len(book_ids))
+        positions, scores = drop_self(rows, *similarity_engine.top_k(rows, k + 1))
+        return cls.from_positions(book_ids, positions, scores, source_hash)
+
+    @classmethod
+    def from_positions(cls, book_ids, positions, scores,
+                       source_hash: str = None) -> 'NeighborIndex':
+        """تحويل مواقع الصفوف إلى معرفات كتب وترتيب الفهرس حسب book_id"""
+        book_ids = np.asarray(book_ids).astype(np.int32)
+        order = np.argsort(book_ids, kind='stable')
+        return cls(
+            book_ids[order],
+            book_ids[positions[order]].astype(np.int32),
+            np.asarray(scores)[order].astype(np.float32),
+            source_hash
+        )
+
+    def lookup(self, book_id: int, max_results: int = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """جيران كتاب معين كشريحة O(k) أو None إذا لم يكن مفهرساً"""
+        pos = np.searchsorted(self.book_ids, book_id)
+        if pos >= len(self.book_ids) or self.book_ids[pos] != book_id:
+            return None
+        end = self.k if max_results is None else max_results
+        return self.neighbor_ids[pos, :end], self.scores[pos, :end]
+
+    def lookup_many(self, book_ids, max_results: int = None) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """جيران مجموعة كتب دفعة واحدة أو None إذا كان أحدها غير مفهرس"""
+        book_ids = np.asarray(book_ids)
+        pos = np.searchsorted(self.book_ids, book_ids)
+        if len(pos) and (pos.max() >= len(self.book_ids) or
+                         np.any(self.book_ids[pos] != book_ids)):
+            return None
+        end = self.k if max_results is None else max_results
+        return self.neighbor_ids[pos, :end], self.scores[pos, :end]
+
+    def save(self, directory: str):
+        """حفظ الفهرس كملفات npy قابلة للربط بالذاكرة"""
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, self.META_FILE)
+
+        # حذف البيانات الوصفية أولاً حتى لا يُقرأ فهرس نصف مكتوب على أنه صالح
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        for name in self.ARRAY_FILES:
+            tmp_path = os.path.join(directory, f'{name}.tmp.npy')
+            np.save(tmp_path, np.ascontiguousarray(getattr(self, name)))
+            os.replace(tmp_path, os.path.join(directory, f'{name}.npy'))
+
+        meta = {
+            'version': self.FORMAT_VERSION,
+            'source_hash': self.source_hash,
+            'k': self.k,
+            'size': len(self)
+        }
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, directory: str, source_hash: str = None, min_k: int = 0,
+             mmap: bool = True) -> Optional['NeighborIndex']:
+        """تحميل الفهرس إذا كان صالحاً ومطابقاً لملف البيانات الحالي"""
+        try:
+            with open(os.path.join(directory, cls.META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+
+            if meta.get('version') != cls.FORMAT_VERSION:
+                return None
+            if source_hash is not None and meta.get('source_hash') != source_hash:
+                return None
+            if meta.get('k', 0) < min_k:
+                return None
+
+            mmap_mode = 'r' if mmap else None
+            arrays = [
+                np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+                for name in cls.ARRAY_FILES
+            ]
+            index = cls(*arrays, source_hash=meta.get('source_hash'))
+
+            if len(index) != meta.get('size') or index.k != meta.get('k'):
+                return None
+            return index
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+if __name__ == "__main__":
+    # خطوة البناء غير المتصلة: python neighbor_index.py [مسار ملف البيانات]
+    import sys
+    from data_manager import DataManager
+    from recommender import BookRecommender
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'programming_books_dataset.csv'
+    recommender = BookRecommender(DataManager(csv_path))
+    index = recommender.build_neighbor_index(force=True)
+    print(f"تم بناء فهرس الجيران: {len(index)} كتاب × {index.k} جار")
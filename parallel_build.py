@@ -0,0 +1,104 @@
+import os
+import tempfile
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from scipy import sparse
+from typing import Dict, List, Tuple
+from similarity_engine import SimilarityEngine
+
+CSR_PARTS = ('data', 'indices', 'indptr')
+
+# المحرك داخل كل عملية عاملة، يُنشأ مرة واحدة من الملفات المربوطة بالذاكرة
+_worker_engine = None
+
+
+def save_csr(matrix: sparse.csr_matrix, directory: str, name: str) -> Dict:
+    """حفظ مكونات مصفوفة CSR كملفات npy حتى تربطها العمليات العاملة بالذاكرة دون نسخ"""
+    for part in CSR_PARTS:
+        np.save(os.path.join(directory, f'{name}.{part}.npy'), getattr(matrix, part))
+    return {'directory': directory, 'name': name, 'shape': matrix.shape}
+
+
+def load_csr(spec: Dict) -> sparse.csr_matrix:
+    """فتح مصفوفة CSR محفوظة للقراءة فقط عبر mmap (صفحاتها مشتركة بين العمليات)"""
+    parts = [
+        np.load(os.path.join(spec['directory'], f"{spec['name']}.{part}.npy"), mmap_mode='r')
+        for part in CSR_PARTS
+    ]
+    return sparse.csr_matrix(tuple(parts), shape=spec['shape'], copy=False)
+
+
+def _init_worker(matrix_spec: Dict, transpose_spec: Dict, block_size: int):
+    global _worker_engine
+    _worker_engine = SimilarityEngine(load_csr(matrix_spec), block_size, load_csr(transpose_spec))
+
+
+def _top_k_rows(task: Tuple[int, int, int]) -> Tuple[int, np.ndarray, np.ndarray]:
+    """أعلى k جيران لمدى صفوف؛ النتيجة الصغيرة فقط تعود عبر pickle"""
+    start, stop, k = task
+    positions, scores = _worker_engine.top_k(np.arange(start, stop), k)
+    return start, positions, scores
+
+
+def parallel_top_k(feature_matrix, k: int, workers: int = None, shard_size: int = 2048,
+                   block_size: int = 256) -> Tuple[np.ndarray, np.ndarray]:
+    """أعلى k جيران لكل الصفوف بتقسيم الصفوف على مجموعة عمليات (نفس نتائج SimilarityEngine.top_k)"""
+    workers = workers or os.cpu_count() or 1
+    feature_matrix = sparse.csr_matrix(feature_matrix, dtype=np.float64)
+    n_rows = feature_matrix.shape[0]
+    k = min(k, n_rows)
+
+    if workers <= 1:
+        return SimilarityEngine(feature_matrix, block_size).top_k(np.arange(n_rows), k)
+
+    positions = np.empty((n_rows, k), dtype=np.int64)
+    scores = np.empty((n_rows, k), dtype=np.float64)
+    tasks = [(start, min(start + shard_size, n_rows), k) for start in range(0, n_rows, shard_size)]
+
+    with tempfile.TemporaryDirectory(prefix='neighbors-') as directory:
+        # المصفوفة ومنقولها يُكتبان مرة واحدة بدل إرسالهما مع كل مهمة
+        matrix_spec = save_csr(feature_matrix, directory, 'matrix')
+        transpose_spec = save_csr(feature_matrix.T.tocsr(), directory, 'transpose')
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(matrix_spec, transpose_spec, block_size)) as pool:
+            for start, shard_positions, shard_scores in pool.map(_top_k_rows, tasks):
+                positions[start:start + len(shard_positions)] = shard_positions
+                scores[start:start + len(shard_scores)] = shard_scores
+
+    return positions, scores
+
+
+def speedup_curve(feature_matrix, k: int, max_workers: int = None, report=print) -> List[Dict]:
+    """زمن البناء ونسبة التسريع لأعداد عمليات من 1 حتى max_workers (مضاعفات 2)"""
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({min(2 ** i, max_workers) for i in range(max_workers.bit_length() + 1)})
+
+    curve = []
+    baseline = None
+    for workers in counts:
+        start = time.perf_counter()
+        parallel_top_k(feature_matrix, k, workers)
+        seconds = time.perf_counter() - start
+        baseline = baseline or seconds
+        point = {'workers': workers, 'seconds': seconds, 'speedup': baseline / seconds}
+        curve.append(point)
+        if report:
+            report(f"{workers} عملية: {seconds:.2f} ثانية (تسريع {point['speedup']:.2f}×)")
+    return curve
+
+
+if __name__ == "__main__":
+    # بناء فهرس الجيران بالتوازي مع منحنى التسريع: python parallel_build.py [مسار ملف البيانات] [أقصى عدد عمليات]
+    import sys
+    from config import CACHE_CONFIG
+    from data_manager import DataManager
+    from recommender import BookRecommender
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'programming_books_dataset.csv'
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    recommender = BookRecommender(DataManager(csv_path))
+    speedup_curve(recommender.feature_matrix, CACHE_CONFIG['neighbors_k'] + 1, max_workers)
+    index = recommender.build_neighbor_index(force=True, workers=max_workers)
+    print(f"تم بناء فهرس الجيران: {len(index)} كتاب × {index.k} جار")
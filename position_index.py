@@ -0,0 +1,44 @@
+import numpy as np
+
+
+class PositionIndex:
+    """مواقع صفوف الكتالوج حسب book_id (بنفس واجهة pd.Index.get_indexer)
+
+    المعرفات مرتبة مع مواقعها حتى يكون البحث عبر searchsorted كما في NeighborIndex، فتعديل الكتالوج
+    يدرج أو يحذف مدخلات في مكانها بدل إعادة بناء جدول التجزئة للكتالوج كله.
+    """
+
+    def __init__(self, book_ids):
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        order = np.argsort(book_ids, kind='stable')
+        self.book_ids = book_ids[order]
+        self.positions = order.astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.book_ids)
+
+    def get_indexer(self, book_ids) -> np.ndarray:
+        """موقع كل معرف في الكتالوج (-1 للمعرف غير الموجود)"""
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        if not len(self.book_ids):
+            return np.full(book_ids.shape, -1, dtype=np.int64)
+        found = np.minimum(np.searchsorted(self.book_ids, book_ids), len(self.book_ids) - 1)
+        return np.where(self.book_ids[found] == book_ids, self.positions[found], -1)
+
+    def add(self, book_ids, positions):
+        """إضافة معرفات جديدة بمواقعها (المعرفات الجديدة متزايدة عادة فتدرج في النهاية)"""
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        order = np.argsort(book_ids, kind='stable')
+        at = np.searchsorted(self.book_ids, book_ids[order], side='right')
+        self.book_ids = np.insert(self.book_ids, at, book_ids[order])
+        self.positions = np.insert(self.positions, at, np.asarray(positions, dtype=np.int64)[order])
+
+    def remove(self, positions):
+        """حذف صفوف بمواقعها قبل الحذف وإزاحة المواقع التالية لها"""
+        removed = np.unique(np.asarray(positions, dtype=np.int64))
+        dead = np.zeros(len(self.positions), dtype=bool)
+        dead[removed] = True
+        keep = ~dead[self.positions]
+        self.book_ids = self.book_ids[keep]
+        self.positions = self.positions[keep]
+        self.positions -= np.searchsorted(removed, self.positions)
@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class QueryCache:
+    """ذاكرة مؤقتة محدودة الحجم لنتائج الاستعلامات مع إخراج الأقدم استخداماً وانتهاء صلاحية زمني"""
+
+    def __init__(self, max_size: int = 256, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = None
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # المفتاح -> (القيمة، وقت الحفظ)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'invalidations': 0}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _check_version(self, version) -> bool:
+        """الإصدار متزايد: إصدار أحدث يبطل كل النتائج المحفوظة، وإصدار أقدم طلب متأخر لا يُخدم"""
+        if version is None or version == self.version:
+            return True
+        if self.version is not None and version < self.version:
+            return False
+        if self._entries:
+            self.stats['invalidations'] += 1
+            self._entries.clear()
+        self.version = version
+        return True
+
+    def get(self, key: Hashable, version=None) -> Optional[Any]:
+        """النتيجة المحفوظة للمفتاح أو None"""
+        with self._lock:
+            entry = self._entries.get(key) if self._check_version(version) else None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version=None):
+        with self._lock:
+            if not self._check_version(version):
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def report(self) -> Dict:
+        """القياسات الحالية مع نسبة الإصابة"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'size': len(self._entries),
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+        }
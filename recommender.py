@@ -1,8 +1,18 @@
+import os
+import threading
+from itertools import islice
+import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from fuzzywuzzy import fuzz
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from similarity_engine import SimilarityEngine, append_rows, drop_self, replace_rows, top_k_indices
+from neighbor_index import NeighborIndex
+from position_index import PositionIndex
+from model_cache import ModelCache
+from fuzzy_matcher import FuzzyTitleMatcher
+from query_cache import QueryCache
+from book_format import format_book_results
+from book_text import weighted_text
+from config import ANN_CONFIG, CACHE_CONFIG, RECOMMENDER_CONFIG
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -14,76 +24,485 @@ class BookRecommender:
         self.df = data_manager.df
         self.vectorizer = None
         self.feature_matrix = None
-        self.similarity_matrix = None
+        self.similarity_engine = None
+        self.neighbor_index = None
+        self.ann_index = None
+        self.fuzzy_matcher = None
+        self.model_cache = None
+        self.model_version = 0
+        self.query_cache = QueryCache(CACHE_CONFIG['query_cache_size'], CACHE_CONFIG['query_cache_ttl'])
+        self._catalog_modified = False
+        self._lock = threading.RLock()
+        self._refit_thread = None
+        self._reset_drift()
         self._prepare_recommendation_system()
     
+    @property
+    def vectorizer(self):
+        """متجه TF-IDF؛ المستعاد من التخزين المؤقت لا يُبنى إلا عند أول حاجة (استيراد sklearn مكلف)"""
+        if self._vectorizer is None and self._vectorizer_state is not None:
+            vocabulary, idf = self._vectorizer_state
+            self._vectorizer = self._new_vectorizer()
+            self._vectorizer.vocabulary_ = vocabulary
+            self._vectorizer.idf_ = idf
+        return self._vectorizer
+    
+    @vectorizer.setter
+    def vectorizer(self, value):
+        self._vectorizer = value
+        self._vectorizer_state = None
+    
+    @staticmethod
+    def _new_vectorizer():
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        return TfidfVectorizer(**RECOMMENDER_CONFIG['tfidf_params'])
+    
     def _prepare_recommendation_system(self):
         """إعداد نظام التوصية"""
-        # إنشاء ميزات مجمعة مع أوزان
-        self._create_weighted_features()
+        # إزالة القيم الفارغة
+        self._fill_missing_values()
         
-        # إنشاء متجه TF-IDF
-        self._create_tfidf_matrix()
+        # تحميل النموذج المحفوظ أو تدريبه من جديد
+        if not self._load_model_cache():
+            # إنشاء متجه TF-IDF من الميزات المجمعة الموزونة
+            self._create_tfidf_matrix()
+            self._save_model_cache()
         
-        # إنشاء مصفوفة التشابه
-        self._create_similarity_matrix()
+        # إنشاء محرك التشابه
+        self._create_similarity_engine()
+        
+        # تحميل فهرس الجيران المحفوظ
+        self._load_neighbor_index()
+        
+        # بناء فهرس المطابقة الغامضة للعناوين
+        self.fuzzy_matcher = FuzzyTitleMatcher(self.df['title'])
         
         print("تم إعداد نظام التوصية بنجاح")
     
-    def _create_weighted_features(self):
-        """إنشاء ميزات موزونة"""
-        # إزالة القيم الفارغة
+    def _fill_missing_values(self):
+        """إزالة القيم الفارغة من الأعمدة النصية"""
         self.df['title'] = self.df['title'].fillna('')
         self.df['author'] = self.df['author'].fillna('')
         self.df['category'] = self.df['category'].fillna('')
         self.df['description'] = self.df['description'].fillna('')
         self.df['tags'] = self.df['tags'].fillna('')
-        
-        # إنشاء ميزات موزونة
-        self.df['weighted_features'] = (
-            self.df['title'] * 3 + ' ' +  # وزن أعلى للعنوان
-            self.df['category'] * 2 + ' ' +  # وزن متوسط للفئة
-            self.df['tags'] * 2 + ' ' +  # وزن متوسط للعلامات
-            self.df['author'] + ' ' +  # وزن عادي للمؤلف
-            self.df['description']  # وزن عادي للوصف
-        ).str.replace('nan', '')
     
     def _create_tfidf_matrix(self):
         """إنشاء مصفوفة TF-IDF"""
-        self.vectorizer = TfidfVectorizer(
-            stop_words='english',
-            max_features=1000,
-            ngram_range=(1, 2)  # استخدام 1-2 كلمة
+        self.vectorizer = self._new_vectorizer()
+        # النص الموزون مؤقت ولا يُحفظ كعمود في الجدول
+        self.feature_matrix = self.vectorizer.fit_transform(weighted_text(self.df))
+    
+    def _load_model_cache(self) -> bool:
+        """استعادة المتجه ومصفوفة الميزات من التخزين المؤقت دون إعادة التدريب"""
+        try:
+            self.model_cache = ModelCache(
+                self._get_cache_dir(),
+                self.data_manager.get_source_hash(),
+                RECOMMENDER_CONFIG['tfidf_params']
+            )
+        except OSError:
+            self.model_cache = None
+            return False
+        
+        cached = self.model_cache.load()
+        if cached is None or cached['feature_matrix'].shape[0] != len(self.df):
+            return False
+        
+        # المتجه يحتاجه تحديث الكتالوج فقط، أما الاستعلامات فتكفيها مصفوفة الميزات
+        self.vectorizer = None
+        self._vectorizer_state = (cached['vocabulary'], cached['idf'])
+        self.feature_matrix = cached['feature_matrix']
+        return True
+    
+    def _save_model_cache(self):
+        """حفظ النموذج المدرب للتشغيلات القادمة"""
+        # الكتالوج المعدل في الذاكرة لم يعد مطابقاً لملف البيانات
+        if self.model_cache is None or self._catalog_modified:
+            return
+        try:
+            self.model_cache.save(self.vectorizer.vocabulary_, self.vectorizer.idf_, self.feature_matrix)
+        except OSError as e:
+            print(f"تعذر حفظ النموذج: {e}")
+    
+    def _create_similarity_engine(self):
+        """إنشاء محرك التشابه: دقيق فوق المصفوفة المتناثرة أو تقريبي عبر فهرس ANN للكتالوجات الكبيرة"""
+        if self._use_ann():
+            from ann_index import AnnSimilarityEngine
+            self.build_ann_index()
+            self.similarity_engine = AnnSimilarityEngine(self.feature_matrix, self.ann_index)
+        else:
+            self.similarity_engine = SimilarityEngine(self.feature_matrix)
+        self._book_id_index = PositionIndex(self.df['book_id'])
+        self._prepare_ranking_arrays()
+    
+    def _prepare_ranking_arrays(self):
+        """تجهيز أعمدة NumPy المستخدمة في الترتيب والترشيح"""
+        self._book_ids = self.df['book_id'].to_numpy()
+        # التقييم مخزن كـ float32 لذا تُستعاد قيمه العشرية قبل حساب الدرجات
+        self._ratings = np.round(self.df['rating'].to_numpy(dtype=np.float64), 6)
+        self._lower_titles = self.df['title'].str.lower()
+        
+        # رمز لكل عنوان ولكل قيمة مرشح، مع قاموس القيمة -> الرمز لترميز الصفوف المضافة أو المعدلة وحدها
+        self._title_codes, titles = pd.factorize(self.df['title'])
+        self._title_lookup = {title: code for code, title in enumerate(titles)}
+        self._filter_codes = {}
+        self._filter_uniques = {}
+        self._filter_lookup = {}
+        for field in ('category', 'language', 'difficulty'):
+            codes, uniques = pd.factorize(self.df[field].astype(str))
+            self._filter_codes[field] = codes
+            self._filter_uniques[field] = list(uniques)
+            self._filter_lookup[field] = {value: code for code, value in enumerate(self._filter_uniques[field])}
+        self._value_masks = {}
+    
+    def _update_ranking_arrays(self, changed=None, removed=None):
+        """ترقيع أعمدة الترتيب والترشيح وفهرس المعرفات للصفوف المتغيرة فقط بدل ترميز الكتالوج كله"""
+        if removed is not None and len(removed):
+            self._book_ids = np.delete(self._book_ids, removed)
+            self._ratings = np.delete(self._ratings, removed)
+            self._title_codes = np.delete(self._title_codes, removed)
+            for field in self._filter_codes:
+                self._filter_codes[field] = np.delete(self._filter_codes[field], removed)
+            self._lower_titles = self._lower_titles.drop(self._lower_titles.index[removed]).reset_index(drop=True)
+            self._book_id_index.remove(removed)
+        
+        if changed is None or not len(changed):
+            return
+        changed = np.unique(np.asarray(changed, dtype=np.int64))
+        rows = self.df.iloc[changed]
+        n_previous = len(self._book_ids)
+        # الصفوف المضافة في نهاية الكتالوج، والمعدلة في مواقعها
+        added = changed >= n_previous
+        
+        def place(array: np.ndarray, values: np.ndarray) -> np.ndarray:
+            array = np.concatenate([array.astype(np.result_type(array, values), copy=False),
+                                    np.empty(len(self.df) - n_previous, dtype=array.dtype)])
+            array[changed] = values
+            return array
+        
+        self._book_ids = place(self._book_ids, rows['book_id'].to_numpy())
+        self._ratings = place(self._ratings, np.round(rows['rating'].to_numpy(dtype=np.float64), 6))
+        self._title_codes = place(self._title_codes, self._encode(self._title_lookup, rows['title']))
+        for field in self._filter_codes:
+            uniques = self._filter_uniques[field]
+            n_uniques = len(uniques)
+            codes = self._encode(self._filter_lookup[field], rows[field].astype(str), uniques)
+            self._filter_codes[field] = place(self._filter_codes[field], codes)
+            if len(uniques) != n_uniques:
+                # أقنعة القيم محسوبة على القيم الفريدة القديمة
+                self._value_masks = {}
+        
+        lower_titles = rows['title'].str.lower()
+        if not added.all():
+            self._lower_titles.iloc[changed[~added]] = lower_titles[~added].to_numpy()
+        if added.any():
+            self._lower_titles = pd.concat([self._lower_titles, lower_titles[added]], ignore_index=True)
+            self._book_id_index.add(self._book_ids[changed[added]], changed[added])
+    
+    @staticmethod
+    def _encode(lookup: Dict, values, uniques: List = None) -> np.ndarray:
+        """رموز القيم من القاموس مع إعطاء القيم الجديدة رموزاً تالية"""
+        codes = np.empty(len(values), dtype=np.intp)
+        for i, value in enumerate(values):
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(lookup)
+                if uniques is not None:
+                    uniques.append(value)
+            codes[i] = code
+        return codes
+    
+    def _use_ann(self) -> bool:
+        backend = ANN_CONFIG['backend']
+        if backend == 'auto':
+            return self.feature_matrix.shape[0] >= ANN_CONFIG['min_rows']
+        return backend == 'ann'
+    
+    def build_ann_index(self, force: bool = False) -> 'AnnIndex':
+        """تحميل فهرس ANN المحفوظ أو تدريبه؛ تعديلات الكتالوج تُرقع فيه في _apply_catalog_change"""
+        # يُستورد عند الحاجة فقط: sklearn.cluster وdecomposition مكلفان والكتالوجات الصغيرة لا تستخدمهما
+        from ann_index import AnnIndex
+        
+        if self.ann_index is not None and not force:
+            return self.ann_index
+        
+        # الفهرس المحفوظ يطابق ملف البيانات فقط، لا الكتالوج المعدل في الذاكرة
+        use_cache = self.model_cache is not None and not self._catalog_modified
+        key = self.model_cache.key if self.model_cache else None
+        self.ann_index = None
+        if use_cache and not force:
+            self.ann_index = AnnIndex.load(self.model_cache.ann_dir, key, self.feature_matrix.shape[0])
+        
+        if self.ann_index is None:
+            self.ann_index = AnnIndex.train(self.feature_matrix, source_hash=key)
+            if use_cache:
+                try:
+                    self.ann_index.save(self.model_cache.ann_dir)
+                except OSError as e:
+                    print(f"تعذر حفظ فهرس ANN: {e}")
+        return self.ann_index
+    
+    def _get_cache_dir(self) -> str:
+        """مجلد التخزين المؤقت بجانب ملف البيانات"""
+        data_dir = os.path.dirname(os.path.abspath(self.data_manager.csv_path))
+        return os.path.join(data_dir, CACHE_CONFIG['cache_dir'])
+    
+    def _neighbors_k(self) -> int:
+        return min(CACHE_CONFIG['neighbors_k'], len(self.df) - 1)
+    
+    def _load_neighbor_index(self):
+        """تحميل فهرس الجيران أو إعادة بنائه إذا تغير ملف البيانات"""
+        if self.model_cache is None:
+            return
+        
+        self.neighbor_index = NeighborIndex.load(
+            self.model_cache.neighbors_dir, self.model_cache.key, self._neighbors_k()
         )
-        self.feature_matrix = self.vectorizer.fit_transform(self.df['weighted_features'])
+        if self.neighbor_index is None and CACHE_CONFIG['auto_build']:
+            self.build_neighbor_index()
+    
+    def build_neighbor_index(self, force: bool = False, workers: int = None) -> NeighborIndex:
+        """بناء فهرس الجيران وحفظه على القرص (بالتوازي على عدة عمليات إذا طُلب أكثر من عامل)"""
+        if self.neighbor_index is not None and not force:
+            return self.neighbor_index
+        
+        workers = workers or CACHE_CONFIG['build_workers']
+        book_ids = self.df['book_id'].to_numpy()
+        source_hash = self.model_cache.key if self.model_cache else None
+        if workers > 1:
+            # تشابه دقيق موزع على العمليات؛ k + 1 لأن الكتاب نفسه من بين النتائج
+            from parallel_build import parallel_top_k
+            positions, scores = parallel_top_k(self.feature_matrix, self._neighbors_k() + 1, workers)
+            positions, scores = drop_self(np.arange(len(book_ids)), positions, scores)
+            index = NeighborIndex.from_positions(book_ids, positions, scores, source_hash)
+        else:
+            index = NeighborIndex.build(self.similarity_engine, book_ids, self._neighbors_k(), source_hash)
+        
+        if self.model_cache is not None and not self._catalog_modified:
+            try:
+                index.save(self.model_cache.neighbors_dir)
+            except OSError as e:
+                print(f"تعذر حفظ فهرس الجيران: {e}")
+        
+        self.neighbor_index = index
+        return index
+    
+    # ========================================
+    # التحديث التدريجي للكتالوج
+    # ========================================
+    
+    def add_books(self, records) -> List[int]:
+        """إضافة كتب مع تحويل الصفوف الجديدة فقط بالمفردات الحالية"""
+        with self._lock:
+            self._sample_drift_baseline()
+            new_books = self.data_manager.add_books(records)
+            if new_books.empty:
+                return []
+            
+            self.df = self.data_manager.df
+            positions = new_books.index.to_numpy()
+            self.feature_matrix = append_rows(self.feature_matrix, self._transform_rows(new_books))
+            self.fuzzy_matcher.add_titles(new_books['title'])
+            self._apply_catalog_change(changed=positions)
+            return new_books['book_id'].tolist()
+    
+    def update_books(self, records) -> List[int]:
+        """تعديل كتب موجودة وإعادة تحويل صفوفها فقط"""
+        with self._lock:
+            self._sample_drift_baseline()
+            positions = self.data_manager.update_books(records)
+            if not len(positions):
+                return []
+            
+            self.df = self.data_manager.df
+            rows = self.df.iloc[positions]
+            
+            # استبدال الصفوف المعدلة في المصفوفة المتناثرة بنسخ المقاطع الثابتة بينها
+            self.feature_matrix = replace_rows(self.feature_matrix, positions, self._transform_rows(rows))
+            
+            self.fuzzy_matcher.update_titles(positions, rows['title'])
+            self._apply_catalog_change(changed=positions)
+            return rows['book_id'].tolist()
+    
+    def remove_books(self, book_ids) -> int:
+        """حذف كتب من النموذج والفهارس دون إعادة التدريب"""
+        with self._lock:
+            positions = self.data_manager.remove_books(book_ids)
+            if not len(positions):
+                return 0
+            
+            self.df = self.data_manager.df
+            self.feature_matrix = replace_rows(self.feature_matrix, positions)
+            self.fuzzy_matcher.remove_titles(positions)
+            self._apply_catalog_change(removed=positions)
+            return len(positions)
+    
+    def refit(self):
+        """إعادة تدريب النموذج بالكامل على الكتالوج الحالي"""
+        with self._lock:
+            self._create_tfidf_matrix()
+            # المفردات الجديدة تتطلب إسقاطاً جديداً لفهرس ANN
+            self.ann_index = None
+            self._create_similarity_engine()
+            if self.neighbor_index is not None:
+                self.build_neighbor_index(force=True)
+            self._reset_drift()
+            self.model_version += 1
+            print("تمت إعادة تدريب نظام التوصية")
+    
+    def _transform_rows(self, rows: pd.DataFrame):
+        """تحويل صفوف بالمفردات الحالية مع تسجيل انحراف المفردات"""
+        texts = weighted_text(rows)
+        self._record_drift(texts)
+        return self.vectorizer.transform(texts)
+    
+    def _apply_catalog_change(self, changed=None, removed=None):
+        """تحديث المحرك والفهارس بعد تعديل الكتالوج"""
+        self._catalog_modified = True
+        if self.ann_index is not None:
+            # ترميز الصفوف الجديدة والمعدلة فقط وإدراجها في القوائم المقلوبة بدل ترميز الكتالوج كله
+            self.ann_index = self.ann_index.update(self.feature_matrix, changed, removed)
+        previous_index = self.neighbor_index
+        if self._use_ann() != (getattr(self.similarity_engine, 'ann_index', None) is not None):
+            # الكتالوج تجاوز حد الاسترجاع التقريبي أو نزل تحته: محرك جديد من النوع المناسب
+            self._create_similarity_engine()
+        else:
+            # ترقيع المحرك وأعمدة الترتيب في مكانها بدل إعادة حساب المنقول والترميز للكتالوج كله
+            self.similarity_engine.update(self.feature_matrix, changed, removed)
+            if self.ann_index is not None and hasattr(self.similarity_engine, 'ann_index'):
+                self.similarity_engine.ann_index = self.ann_index
+            self._update_ranking_arrays(changed, removed)
+        if previous_index is not None:
+            self._patch_neighbor_index(previous_index, changed)
+        self.model_version += 1
+        
+        if self._drift_exceeded():
+            self._schedule_refit()
+    
+    def _patch_neighbor_index(self, index: NeighborIndex, changed=None):
+        """ترقيع فهرس الجيران: إعادة حساب الصفوف المتأثرة فقط"""
+        n_rows = len(self.df)
+        k = min(index.k, n_rows - 1)
+        changed = np.asarray(changed if changed is not None else [], dtype=np.int64)
+        
+        # تحويل الفهرس من معرفات الكتب إلى مواقع الصفوف الحالية (-1 للكتب المحذوفة)
+        positions = np.full((n_rows, k), -1, dtype=np.int64)
+        scores = np.zeros((n_rows, k), dtype=np.float64)
+        rows = self._book_id_index.get_indexer(index.book_ids)
+        known = rows >= 0
+        neighbor_rows = self._book_id_index.get_indexer(
+            np.asarray(index.neighbor_ids[:, :k]).ravel()
+        ).reshape(-1, k)
+        positions[rows[known]] = neighbor_rows[known]
+        scores[rows[known]] = index.scores[known, :k]
+        
+        # الصفوف الجديدة أو التي تشير إلى كتب محذوفة أو معدلة تُحسب من جديد
+        stale = (positions < 0).any(axis=1)
+        if len(changed):
+            stale[changed] = True
+            stale |= np.isin(positions, changed).any(axis=1)
+        
+        stale_rows = np.flatnonzero(stale)
+        if len(stale_rows):
+            fresh_positions, fresh_scores = drop_self(stale_rows, *self.similarity_engine.top_k(stale_rows, k + 1))
+            positions[stale_rows] = fresh_positions
+            scores[stale_rows] = fresh_scores
+        
+        # الكتب المعدلة قد تدخل قوائم صفوف أخرى إذا تجاوزت أضعف جار فيها
+        if len(changed):
+            sims = (self.feature_matrix @ self.feature_matrix[changed].T).tocoo()
+            entry_rows, entry_cols, entry_scores = sims.row, changed[sims.col], sims.data
+            enters = (~stale[entry_rows]) & (entry_rows != entry_cols) & (entry_scores > scores[entry_rows, -1])
+            
+            for row in np.unique(entry_rows[enters]).tolist():
+                mine = enters & (entry_rows == row)
+                merged_positions = np.concatenate([positions[row], entry_cols[mine]])
+                merged_scores = np.concatenate([scores[row], entry_scores[mine]])
+                top = top_k_indices(merged_scores, k)
+                positions[row] = merged_positions[top]
+                scores[row] = merged_scores[top]
+        
+        self.neighbor_index = NeighborIndex.from_positions(self._book_ids, positions, scores)
+    
+    def _reset_drift(self):
+        self._drift = {'terms': 0, 'oov': 0, 'rows': 0, 'baseline': None}
+    
+    def _oov_counts(self, texts) -> tuple:
+        """عدد المصطلحات الكلي وعدد المصطلحات خارج المفردات"""
+        analyzer = self.vectorizer.build_analyzer()
+        vocabulary = self.vectorizer.vocabulary_
+        terms = oov = 0
+        for text in texts:
+            tokens = analyzer(text)
+            terms += len(tokens)
+            oov += sum(1 for t in tokens if t not in vocabulary)
+        return terms, oov
+    
+    def _sample_drift_baseline(self):
+        """خط الأساس: نسبة المصطلحات خارج المفردات على عينة من الكتالوج الذي تدرب عليه النموذج
+        
+        تؤخذ قبل أن يضيف الكتالوج الصفوف الجديدة أو يعدلها، حتى لا تدخل العينة الصفوف نفسها التي يقاس انحرافها.
+        """
+        if self._drift['baseline'] is None and len(self.df):
+            sample = self.df.sample(min(500, len(self.df)), random_state=0)
+            terms, oov = self._oov_counts(weighted_text(sample))
+            self._drift['baseline'] = oov / terms if terms else 0.0
     
-    def _create_similarity_matrix(self):
-        """إنشاء مصفوفة التشابه"""
-        self.similarity_matrix = cosine_similarity(self.feature_matrix)
+    def _record_drift(self, texts):
+        """تسجيل نسبة المصطلحات خارج المفردات في الصفوف المضافة أو المعدلة"""
+        terms, oov = self._oov_counts(texts)
+        self._drift['terms'] += terms
+        self._drift['oov'] += oov
+        self._drift['rows'] += len(texts)
+    
+    def _drift_exceeded(self) -> bool:
+        drift = self._drift
+        if drift['rows'] < RECOMMENDER_CONFIG['refit_min_rows'] or not drift['terms']:
+            return False
+        return drift['oov'] / drift['terms'] - (drift['baseline'] or 0.0) > RECOMMENDER_CONFIG['refit_drift_threshold']
+    
+    def _schedule_refit(self):
+        """جدولة إعادة تدريب كاملة في الخلفية (مرة واحدة في كل وقت)"""
+        if self._refit_thread is not None and self._refit_thread.is_alive():
+            return
+        self._refit_thread = threading.Thread(target=self.refit, daemon=True)
+        self._refit_thread.start()
+    
+    def _get_neighbor_block(self, book_indices, count: int):
+        """أقرب الجيران لمجموعة كتب (باستثناء الكتاب نفسه) كمصفوفتي مواقع ودرجات"""
+        book_indices = np.asarray(book_indices, dtype=np.int64)
+        if self.neighbor_index is not None and count <= self.neighbor_index.k:
+            found = self.neighbor_index.lookup_many(self._book_ids[book_indices], count)
+            if found is not None:
+                neighbor_ids, scores = found
+                positions = self._book_id_index.get_indexer(neighbor_ids.ravel())
+                return positions.reshape(neighbor_ids.shape), np.asarray(scores, dtype=np.float64)
+        
+        return drop_self(book_indices, *self.similarity_engine.top_k(book_indices, count + 1))
+    
+    def _get_neighbors(self, book_idx: int, count: int) -> List[tuple]:
+        """أقرب الجيران لكتاب واحد كقائمة (موقع، درجة)"""
+        positions, scores = self._get_neighbor_block([book_idx], count)
+        return list(zip(positions[0].tolist(), scores[0].tolist()))
     
     def find_book_by_title(self, title_query: str) -> List[int]:
         """البحث عن الكتب المشابهة للعنوان"""
         if not title_query.strip():
             return []
         
-        # البحث الدقيق أولاً
-        exact_matches = self.df[self.df['title'].str.lower().str.contains(
-            title_query.lower(), case=False, na=False
-        )].index.tolist()
-        
-        if exact_matches:
-            return exact_matches
-        
-        # البحث الغامض إذا لم توجد نتائج دقيقة
-        fuzzy_matches = []
-        for idx, row in self.df.iterrows():
-            similarity = fuzz.ratio(title_query.lower(), row['title'].lower())
-            if similarity > 70:  # حد التشابه
-                fuzzy_matches.append((idx, similarity))
-        
-        # ترتيب النتائج حسب التشابه
-        fuzzy_matches.sort(key=lambda x: x[1], reverse=True)
-        return [idx for idx, _ in fuzzy_matches[:5]]
+        with self._lock:
+            # البحث الدقيق أولاً
+            exact_matches = self._lower_titles[self._lower_titles.str.contains(
+                title_query.lower(), case=False, na=False
+            )].index.tolist()
+            
+            if exact_matches:
+                return exact_matches
+            
+            # البحث الغامض إذا لم توجد نتائج دقيقة
+            positions = self.fuzzy_matcher.match(title_query, limit=5, threshold=70)
+            return self.df.index[positions].tolist()
     
     def recommend_books(self, 
                        query: str, 
@@ -92,8 +511,35 @@ class BookRecommender:
                        difficulty: str = None,
                        min_rating: float = 0.0,
                        max_results: int = 10) -> List[Dict]:
-        """توصية الكتب مع المرشحات"""
+        """توصية الكتب مع المرشحات (النتائج المتكررة من الذاكرة المؤقتة)"""
+        key = self._query_key(query, category, language, difficulty, min_rating, max_results)
+        cached = self.query_cache.get(key, self.model_version)
+        if cached is None:
+            # القفل يمنع قراءة حالة نصف محدثة أثناء الإضافة أو التعديل أو إعادة التدريب في الخلفية،
+            # والإصدار يُقرأ داخله فيطابق النموذج الذي حُسبت به النتيجة
+            with self._lock:
+                version = self.model_version
+                cached = tuple(self._recommend_books(query, category, language, difficulty, min_rating, max_results))
+            self.query_cache.put(key, cached, version)
+        # نسخ سطحية حتى لا يعدل المستدعي النتائج المحفوظة
+        return [dict(book) for book in cached]
+    
+    @staticmethod
+    def _query_key(query, category, language, difficulty, min_rating, max_results) -> tuple:
+        """مفتاح موحد للاستعلام: كل مسارات المطابقة لا تميز حالة الأحرف و'الكل' تعني بلا مرشح"""
+        def normalize_filter(value):
+            return None if not value or value == 'الكل' else value
         
+        return (
+            query.lower() if query.strip() else '',
+            normalize_filter(category),
+            normalize_filter(language),
+            normalize_filter(difficulty),
+            float(min_rating or 0.0),
+            int(max_results)
+        )
+    
+    def _recommend_books(self, query, category, language, difficulty, min_rating, max_results) -> List[Dict]:
         if not query.strip():
             # إذا لم يكن هناك استعلام، اعرض أفضل الكتب
             return self._get_top_recommended_books(max_results, min_rating)
@@ -107,119 +553,173 @@ class BookRecommender:
             if not search_results.empty:
                 # اعرض نتائج البحث مرتبة حسب التقييم
                 top_books = search_results.nlargest(max_results, 'rating')
-                return self._format_book_results(top_books)
+                return format_book_results(top_books)
             else:
                 # لم يتم العثور على شيء
                 return self._get_top_recommended_books(max_results, min_rating)
         
-        recommendations = []
-        
-        for book_idx in book_indices:
-            # الحصول على التشابهات مع هذا الكتاب
-            similarity_scores = list(enumerate(self.similarity_matrix[book_idx]))
-            
-            # ترتيب حسب التشابه
-            sorted_books = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
-            
-            for book_index, similarity_score in sorted_books[1:20]:  # فحص 20 كتاب
-                book_info = self.df.iloc[book_index]
-                
-                # تطبيق المرشحات
-                if self._passes_filters(book_info, category, language, difficulty, min_rating):
-                    recommendations.append({
-                        'book': book_info,
-                        'similarity_score': similarity_score,
-                        'query': query
-                    })
+        # تجميع جيران جميع الكتب المطابقة في مصفوفة واحدة (عدد محدود من البذور)
+        seeds = np.asarray(book_indices[:RECOMMENDER_CONFIG['max_seed_books']])
+        positions, scores = self._get_neighbor_block(seeds, RECOMMENDER_CONFIG['candidates_per_seed'])
+        top = self._rank_candidates(positions.ravel(), scores.ravel(),
+                                    category, language, difficulty, min_rating, max_results)
+        return format_book_results(self.df.iloc[top])
+    
+    def _rank_candidates(self, positions, scores, category, language, difficulty,
+                         min_rating, max_results) -> np.ndarray:
+        """مواقع النتائج: ترشيح جيران البذور وإزالة تكرار العناوين ثم الترتيب بالتشابه والتقييم"""
+        # تطبيق المرشحات على المرشحين فقط
+        keep = self._filter_mask(positions, category, language, difficulty, min_rating)
+        positions = positions[keep]
+        scores = scores[keep]
         
-        # إزالة التكرارات وترتيب النتائج
-        unique_recommendations = self._remove_duplicates(recommendations)
+        # إزالة التكرارات بالعنوان مع الإبقاء على أول ظهور
+        _, first = np.unique(self._title_codes[positions], return_index=True)
+        first.sort()
+        positions = positions[first]
+        scores = scores[first]
         
         # ترتيب نهائي (تشابه + تقييم)
-        final_recommendations = sorted(
-            unique_recommendations, 
-            key=lambda x: (x['similarity_score'] * 0.7 + x['book']['rating'] / 5.0 * 0.3), 
-            reverse=True
-        )
-        
-        return self._format_book_results(
-            pd.DataFrame([rec['book'] for rec in final_recommendations[:max_results]])
-        )
+        combined = scores * 0.7 + self._ratings[positions] / 5.0 * 0.3
+        return positions[top_k_indices(combined, max_results)]
     
-    def _passes_filters(self, book_info, category, language, difficulty, min_rating):
-        """فحص ما إذا كان الكتاب يمرر المرشحات"""
-        if category and category != 'الكل' and category not in str(book_info['category']):
-            return False
+    def _filter_mask(self, positions, category, language, difficulty, min_rating) -> np.ndarray:
+        """قناع المرشحات لمجموعة صفوف باستخدام أعمدة مرمّزة محسوبة مسبقاً"""
+        mask = ~(self._ratings[positions] < min_rating)
         
-        if language and language != 'الكل' and language not in str(book_info['language']):
-            return False
+        if category and category != 'الكل':
+            mask &= self._value_mask('category', category, exact=False)[self._filter_codes['category'][positions]]
         
-        if difficulty and difficulty != 'الكل' and book_info['difficulty'] != difficulty:
-            return False
+        if language and language != 'الكل':
+            mask &= self._value_mask('language', language, exact=False)[self._filter_codes['language'][positions]]
         
-        if book_info['rating'] < min_rating:
-            return False
+        if difficulty and difficulty != 'الكل':
+            mask &= self._value_mask('difficulty', difficulty, exact=True)[self._filter_codes['difficulty'][positions]]
         
-        return True
+        return mask
     
-    def _remove_duplicates(self, recommendations):
-        """إزالة التكرارات"""
-        seen_titles = set()
-        unique_recommendations = []
-        
-        for rec in recommendations:
-            title = rec['book']['title']
-            if title not in seen_titles:
-                seen_titles.add(title)
-                unique_recommendations.append(rec)
-        
-        return unique_recommendations
+    def _value_mask(self, field: str, value: str, exact: bool) -> np.ndarray:
+        """قناع منطقي على القيم الفريدة لعمود (يُحسب مرة واحدة لكل قيمة)"""
+        key = (field, value, exact)
+        if key not in self._value_masks:
+            uniques = self._filter_uniques[field]
+            if exact:
+                self._value_masks[key] = np.array([u == value for u in uniques], dtype=bool)
+            else:
+                self._value_masks[key] = np.array([value in u for u in uniques], dtype=bool)
+        return self._value_masks[key]
     
     def _get_top_recommended_books(self, max_results, min_rating):
         """الحصول على أفضل الكتب عندما لا يوجد استعلام"""
         top_books = self.df[self.df['rating'] >= min_rating].nlargest(max_results, 'rating')
-        return self._format_book_results(top_books)
-    
-    def _format_book_results(self, books_df):
-        """تنسيق نتائج الكتب"""
-        results = []
-        
-        for idx, row in books_df.iterrows():
-            result = {
-                'id': row['book_id'],
-                'title': row['title'],
-                'author': row['author'],
-                'category': row['category'],
-                'language': row['language'],
-                'rating': row['rating'],
-                'year': row['year'],
-                'pages': row['pages'],
-                'description': row['description'][:200] + '...' if len(str(row['description'])) > 200 else row['description'],
-                'tags': row['tags'],
-                'difficulty': row['difficulty'],
-                'rating_category': row['rating_category']
-            }
-            results.append(result)
-        
-        return results
+        return format_book_results(top_books)
+    
+    def get_book(self, book_id: int) -> Optional[Dict]:
+        """بيانات كتاب واحد بمعرفه أو None"""
+        with self._lock:
+            position = self._book_id_index.get_indexer([book_id])[0]
+            if position < 0:
+                return None
+            return format_book_results(self.df.iloc[[position]])[0]
     
     def get_similar_books(self, book_id: int, max_results: int = 5) -> List[Dict]:
         """الحصول على كتب مشابهة لكتاب معين"""
         try:
-            book_idx = self.df[self.df['book_id'] == book_id].index[0]
-            similarity_scores = list(enumerate(self.similarity_matrix[book_idx]))
-            sorted_books = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
-            
-            similar_books = []
-            for i, (book_index, score) in enumerate(sorted_books[1:max_results+1]):
-                book_info = self.df.iloc[book_index]
-                similar_books.append({
-                    'book': book_info,
-                    'similarity_score': score
-                })
+            with self._lock:
+                book_idx = self.df[self.df['book_id'] == book_id].index[0]
+                sorted_books = self._get_neighbors(book_idx, max_results)
+                
+                similar_books = []
+                for book_index, score in sorted_books:
+                    book_info = self.df.iloc[book_index]
+                    similar_books.append({
+                        'book': book_info,
+                        'similarity_score': score
+                    })
             
-            return self._format_book_results(
+            return format_book_results(
                 pd.DataFrame([rec['book'] for rec in similar_books])
             )
         except IndexError:
-            return []
\ No newline at end of file
+            return []
+    
+    # ========================================
+    # واجهات الدفعات للمعالجة غير المتصلة
+    # ========================================
+    
+    @staticmethod
+    def _blocks(items: Iterable, block_size: int) -> Iterator[list]:
+        iterator = iter(items)
+        while True:
+            block = list(islice(iterator, block_size))
+            if not block:
+                return
+            yield block
+    
+    def recommend_books_batch(self, queries: Iterable[str], filters: Dict = None, max_results: int = 10,
+                              block_size: int = 256) -> Iterator[Tuple[str, List[Dict]]]:
+        """توصيات لعدد كبير من الاستعلامات كمولد (الاستعلام، النتائج) بنفس نتائج recommend_books
+        
+        بذور كل دفعة من الاستعلامات تجمع في استدعاء جيران واحد بدل استدعاء لكل استعلام،
+        والذاكرة محدودة بحجم الدفعة لأن النتائج تُنتج تباعاً.
+        """
+        filters = filters or {}
+        options = (filters.get('category'), filters.get('language'), filters.get('difficulty'),
+                   filters.get('min_rating', 0.0))
+        per_seed = RECOMMENDER_CONFIG['candidates_per_seed']
+        
+        for block in self._blocks(queries, block_size):
+            with self._lock:
+                # الاستعلامات المطابقة لعناوين تُجمع بذورها، والباقي يسلك المسار العادي
+                seeds = []
+                for query in block:
+                    matches = self.find_book_by_title(query) if query.strip() else []
+                    seeds.append(np.asarray(matches[:RECOMMENDER_CONFIG['max_seed_books']], dtype=np.int64))
+                
+                counts = [len(s) for s in seeds]
+                if sum(counts):
+                    positions, scores = self._get_neighbor_block(np.concatenate(seeds), per_seed)
+                
+                offset = 0
+                ranked, results = [], []
+                for query, count in zip(block, counts):
+                    if count:
+                        rows = slice(offset, offset + count)
+                        ranked.append(self._rank_candidates(
+                            positions[rows].ravel(), scores[rows].ravel(), *options, max_results))
+                        results.append(None)
+                        offset += count
+                    else:
+                        results.append(self._recommend_books(query, *options, max_results))
+                
+                # تنسيق نتائج كل استعلامات الدفعة من الجدول مرة واحدة ثم تقسيمها
+                if ranked:
+                    books = format_book_results(self.df.iloc[np.concatenate(ranked)])
+                    ends = np.cumsum([len(r) for r in ranked]).tolist()
+                    pieces = iter([books[end - len(r):end] for r, end in zip(ranked, ends)])
+                    results = [next(pieces) if result is None else result for result in results]
+            
+            yield from zip(block, results)
+    
+    def get_similar_books_batch(self, book_ids: Iterable[int], k: int = 5,
+                                block_size: int = 256) -> Iterator[Tuple[int, List[Dict]]]:
+        """الكتب المشابهة لعدد كبير من الكتب كمولد (المعرف، النتائج) بنفس نتائج get_similar_books"""
+        for block in self._blocks(book_ids, block_size):
+            with self._lock:
+                positions = self._book_id_index.get_indexer(block)
+                found = positions >= 0
+                books = []
+                width = 0
+                if found.any():
+                    # استدعاء جيران واحد للدفعة وتنسيق كل صفوفها مرة واحدة
+                    neighbors, _ = self._get_neighbor_block(positions[found], k)
+                    width = neighbors.shape[1]
+                    books = format_book_results(self.df.iloc[neighbors.ravel()])
+            
+            row = 0
+            for book_id, is_found in zip(block, found.tolist()):
+                if is_found:
+                    yield book_id, books[row * width:(row + 1) * width]
+                    row += 1
+                else:
+                    yield book_id, []
\ No newline at end of file
@@ -0,0 +1,205 @@
+import re
+import numpy as np
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional
+
+TOKEN_PATTERN = re.compile(r'\w+')
+REGEX_SPECIAL = re.compile(r'[.^$*+?{}\[\]\\|()]')
+
+
+def tokenize(text: str) -> List[str]:
+    """تقسيم النص إلى كلمات بحروف صغيرة"""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class SearchIndex:
+    """فهرس مقلوب للبحث النصي في حقول الكتب مع قوائم نشر لكل حقل"""
+
+    FIELDS = ('title', 'author', 'category', 'description', 'tags')
+
+    def __init__(self, df, fields=FIELDS):
+        self.fields = tuple(fields)
+        self.size = len(df)
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+        self.vocabulary: Dict[str, List[str]] = {}
+        self._joined: Dict[str, str] = {}
+        self._offsets: Dict[str, List[int]] = {}
+
+        for field in self.fields:
+            self._index_field(field, df[field].fillna('').astype(str).tolist())
+
+    def _index_field(self, field: str, texts: List[str]):
+        """بناء قوائم النشر والمفردات المرتبة لحقل واحد"""
+        postings: Dict[str, List[int]] = {}
+        for row, text in enumerate(texts):
+            for token in set(tokenize(text)):
+                postings.setdefault(token, []).append(row)
+
+        self._set_field(field, {t: np.array(rows, dtype=np.int32) for t, rows in postings.items()})
+
+    def _set_field(self, field: str, postings: Dict[str, np.ndarray]):
+        self.postings[field] = postings
+        vocabulary = sorted(postings)
+        self.vocabulary[field] = vocabulary
+
+        # المفردات مجمعة في نص واحد للبحث عن الكلمات الجزئية عبر str.find
+        self._joined[field] = '\n' + '\n'.join(vocabulary) + '\n'
+        offsets, pos = [], 1
+        for token in vocabulary:
+            offsets.append(pos)
+            pos += len(token) + 1
+        self._offsets[field] = offsets
+
+    def add_rows(self, df, start: int):
+        """إضافة صفوف جديدة في نهاية الفهرس (المواقع تبدأ من start)"""
+        for field in self.fields:
+            self._insert_rows(field, df[field].fillna('').astype(str).tolist(), start + np.arange(len(df)))
+        self.size = max(self.size, start + len(df))
+
+    def update_rows(self, positions, old_df, new_df):
+        """إعادة فهرسة صفوف موجودة بعد تعديلها (تُلمس فقط كلمات النص القديم)"""
+        positions = np.asarray(positions)
+        drop = np.zeros(self.size, dtype=bool)
+        drop[positions] = True
+        for field in self.fields:
+            old_tokens = set()
+            for text in old_df[field].fillna('').astype(str):
+                old_tokens.update(tokenize(text))
+            self._filter_rows(field, drop, tokens=old_tokens)
+            self._insert_rows(field, new_df[field].fillna('').astype(str).tolist(), positions)
+
+    def remove_rows(self, positions):
+        """حذف صفوف وإعادة ترقيم المواقع التالية لها"""
+        drop = np.zeros(self.size, dtype=bool)
+        drop[np.asarray(positions)] = True
+        remap = np.cumsum(~drop) - 1
+        for field in self.fields:
+            self._filter_rows(field, drop, remap)
+        self.size -= int(drop.sum())
+
+    def _insert_rows(self, field: str, texts: List[str], rows):
+        postings = self.postings[field]
+        added: Dict[str, List[int]] = {}
+        for row, text in zip(rows.tolist(), texts):
+            for token in set(tokenize(text)):
+                added.setdefault(token, []).append(row)
+
+        new_tokens = False
+        for token, token_rows in added.items():
+            token_rows = np.array(token_rows, dtype=np.int32)
+            if token in postings:
+                postings[token] = np.sort(np.concatenate([postings[token], token_rows]))
+            else:
+                postings[token] = token_rows
+                new_tokens = True
+
+        if new_tokens:
+            self._set_field(field, postings)
+
+    def _filter_rows(self, field: str, drop: np.ndarray, remap: np.ndarray = None, tokens=None):
+        postings = dict(self.postings[field])
+        removed_tokens = False
+        for token in (postings.keys() & tokens if tokens is not None else list(postings)):
+            rows = postings[token]
+            kept = rows[~drop[rows]]
+            if not len(kept):
+                removed_tokens = True
+                del postings[token]
+                continue
+            postings[token] = kept if remap is None else remap[kept].astype(np.int32)
+
+        if removed_tokens:
+            self._set_field(field, postings)
+        else:
+            self.postings[field] = postings
+
+    def _tokens_containing(self, field: str, word: str) -> List[str]:
+        """كل مفردات الحقل التي تحتوي الكلمة كجزء منها"""
+        text = self._joined[field]
+        offsets = self._offsets[field]
+        vocabulary = self.vocabulary[field]
+        tokens = []
+
+        pos = text.find(word)
+        while pos != -1:
+            i = bisect_right(offsets, pos) - 1
+            tokens.append(vocabulary[i])
+            next_start = offsets[i + 1] if i + 1 < len(offsets) else len(text)
+            pos = text.find(word, next_start)
+        return tokens
+
+    def _tokens_with_prefix(self, field: str, prefix: str) -> List[str]:
+        vocabulary = self.vocabulary[field]
+        lo = bisect_left(vocabulary, prefix)
+        hi = bisect_left(vocabulary, prefix + '\U0010ffff')
+        return vocabulary[lo:hi]
+
+    def _union(self, field: str, tokens: List[str]) -> np.ndarray:
+        lists = [self.postings[field][t] for t in tokens]
+        if not lists:
+            return np.empty(0, dtype=np.int32)
+        if len(lists) == 1:
+            return lists[0]
+        return np.unique(np.concatenate(lists))
+
+    def candidates(self, query: str) -> Optional[Dict[str, np.ndarray]]:
+        """الصفوف المرشحة لكل حقل لمطابقة النص الجزئي، أو None إذا تعذر استخدام الفهرس"""
+        if REGEX_SPECIAL.search(query):
+            # الاستعلام تعبير نمطي فعلي ولا يمكن حصره بالكلمات
+            return None
+        words = tokenize(query)
+        if not words:
+            return None
+
+        result = {}
+        for field in self.fields:
+            rows = None
+            for word in set(words):
+                matched = self._union(field, self._tokens_containing(field, word))
+                rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+                if not len(rows):
+                    break
+            result[field] = rows
+        return result
+
+    def _term_rows(self, term: str, fields) -> np.ndarray:
+        """صفوف مصطلح واحد في الحقول المطلوبة (term* للبحث بالبادئة)"""
+        prefix = term.endswith('*')
+        word = term.rstrip('*')
+
+        per_field = []
+        for field in fields:
+            if prefix:
+                tokens = self._tokens_with_prefix(field, word)
+            else:
+                tokens = [word] if word in self.postings[field] else []
+            per_field.append(self._union(field, tokens))
+        return np.unique(np.concatenate(per_field)) if per_field else np.empty(0, dtype=np.int32)
+
+    def search(self, expression: str, fields=None) -> np.ndarray:
+        """بحث بالكلمات مع AND/OR والبادئات، مثل: 'python AND web OR rust*'"""
+        fields = [f for f in (fields or self.fields) if f in self.postings]
+        groups = [[]]
+
+        for term in expression.split():
+            if term == 'OR':
+                groups.append([])
+            elif term != 'AND':
+                # مصطلح مثل "machine-learning*" يتحول إلى كلمات متتالية والبادئة للأخيرة
+                words = tokenize(term)
+                if words and term.endswith('*'):
+                    words[-1] += '*'
+                groups[-1].extend(words)
+
+        result = np.empty(0, dtype=np.int32)
+        for terms in groups:
+            if not terms:
+                continue
+            rows = None
+            # البدء بالمصطلحات الأندر يقلل حجم التقاطعات
+            for term_rows in sorted((self._term_rows(t, fields) for t in terms), key=len):
+                rows = term_rows if rows is None else np.intersect1d(rows, term_rows, assume_unique=True)
+                if not len(rows):
+                    break
+            result = np.union1d(result, rows)
+        return result
@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class SearchScheduler:
+    """جدولة البحث بتأخير الكتابة وخيط عمل واحد وتجاهل الطلبات التي تجاوزها طلب أحدث"""
+
+    def __init__(self, search_fn: Callable[[Any], Any], on_result: Callable[[int, Any, Any], None],
+                 on_error: Callable[[int, Any, Exception], None] = None, debounce_ms: int = 250):
+        self.search_fn = search_fn
+        self.on_result = on_result
+        self.on_error = on_error
+        self.debounce = debounce_ms / 1000
+
+        # كل طلب جديد يرفع رقم الجيل، والنتائج تقبل فقط إذا كان جيلها هو الأحدث
+        self._generation = 0
+        self._pending: Optional[tuple] = None  # (الجيل، المعاملات، وقت التنفيذ)
+        self._condition = threading.Condition()
+        self._closed = False
+        self.stats: Dict[str, int] = {'submitted': 0, 'executed': 0, 'coalesced': 0, 'discarded': 0}
+
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self._generation
+
+    def submit(self, params, delay_ms: int = None) -> int:
+        """جدولة بحث بعد فترة التأخير؛ أي طلب لاحق خلالها يحل محله"""
+        delay = self.debounce if delay_ms is None else delay_ms / 1000
+        with self._condition:
+            self._generation += 1
+            if self._pending is not None:
+                self.stats['coalesced'] += 1
+            self._pending = (self._generation, params, time.monotonic() + delay)
+            self.stats['submitted'] += 1
+            self._condition.notify()
+            return self._generation
+
+    def cancel(self):
+        """إلغاء الطلب المنتظر وتجاهل نتيجة البحث الجاري"""
+        with self._condition:
+            self._generation += 1
+            if self._pending is not None:
+                self.stats['coalesced'] += 1
+            self._pending = None
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._pending = None
+            self._condition.notify()
+
+    def _next_request(self) -> Optional[tuple]:
+        """انتظار آخر طلب حتى تنتهي فترة تأخيره دون طلب أحدث"""
+        with self._condition:
+            while not self._closed:
+                if self._pending is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._pending[2] - time.monotonic()
+                if remaining <= 0:
+                    request, self._pending = self._pending, None
+                    return request
+                self._condition.wait(remaining)
+            return None
+
+    def _run(self):
+        while True:
+            request = self._next_request()
+            if request is None:
+                return
+            generation, params, _ = request
+
+            try:
+                self.stats['executed'] += 1
+                result = self.search_fn(params)
+            except Exception as e:
+                if self.on_error and self.is_current(generation):
+                    self.on_error(generation, params, e)
+                continue
+
+            # طلب أحدث وصل أثناء التنفيذ: النتيجة قديمة ولا تعرض
+            if not self.is_current(generation):
+                self.stats['discarded'] += 1
+                continue
+            self.on_result(generation, params, result)
@@ -0,0 +1,335 @@
+import asyncio
+import json
+import math
+import os
+import re
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+from config import SERVER_CONFIG
+from book_format import format_book_results
+
+# هذه الوحدة لا تستورد customtkinter ولا أي جزء من الواجهة الرسومية
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+# الاستعلام يطابق كتعبير منتظم: re في أعمدة الفئات وRE2 من Arrow في الأعمدة النصية
+try:
+    from pyarrow import ArrowInvalid
+    PATTERN_ERRORS = (re.error, ArrowInvalid)
+except ImportError:
+    PATTERN_ERRORS = (re.error,)
+
+
+def to_json_value(value):
+    """تحويل قيم NumPy وpandas إلى أنواع JSON (float32 وint16 وNA)"""
+    if hasattr(value, 'item') and not isinstance(value, (list, dict, str)):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    try:
+        import pandas as pd
+        if pd.isna(value):
+            return None
+    except (ImportError, TypeError, ValueError):
+        pass
+    return str(value)
+
+
+def dumps(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=to_json_value).encode('utf-8')
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class RecommendationService:
+    """نقاط النهاية فوق نموذج واحد محمل لكل عملية"""
+
+    def __init__(self, csv_path: str = 'programming_books_dataset.csv'):
+        from data_manager import DataManager
+        from recommender import BookRecommender
+
+        self.data_manager = DataManager(csv_path)
+        self.recommender = BookRecommender(self.data_manager)
+        self.routes: Dict[str, Callable[[Dict], Dict]] = {
+            '/recommend': self.recommend,
+            '/similar': self.similar,
+            '/search': self.search,
+            '/top_rated': self.top_rated,
+            '/stats': self.stats,
+            '/health': lambda params: {'status': 'ok'}
+        }
+
+    @staticmethod
+    def _limit(params: Dict, name: str = 'limit', default: int = 10) -> int:
+        try:
+            value = int(params.get(name, default))
+        except (TypeError, ValueError):
+            raise HttpError(400, f"قيمة غير صالحة للمعامل {name}")
+        return max(1, min(value, SERVER_CONFIG['max_limit']))
+
+    @staticmethod
+    def _filter(params: Dict, name: str) -> Optional[str]:
+        """قيمة مرشح نصي (None إذا لم يحدد)؛ الأرقام والقوائم في جسم JSON مرفوضة"""
+        value = params.get(name)
+        if value is None or value == '':
+            return None
+        if not isinstance(value, str):
+            raise HttpError(400, f"قيمة غير صالحة للمعامل {name}")
+        return value
+
+    @staticmethod
+    def _invalid_pattern(error: Exception) -> HttpError:
+        return HttpError(400, f"المعامل q ليس تعبيراً منتظماً صالحاً: {error}")
+
+    def recommend(self, params: Dict) -> Dict:
+        try:
+            min_rating = float(params.get('min_rating', 0.0))
+        except (TypeError, ValueError):
+            raise HttpError(400, "قيمة غير صالحة للمعامل min_rating")
+        try:
+            results = self.recommender.recommend_books(
+                str(params.get('q', '')),
+                category=self._filter(params, 'category'),
+                language=self._filter(params, 'language'),
+                difficulty=self._filter(params, 'difficulty'),
+                min_rating=min_rating,
+                max_results=self._limit(params)
+            )
+        except PATTERN_ERRORS as e:
+            raise self._invalid_pattern(e)
+        return {'results': results}
+
+    def similar(self, params: Dict) -> Dict:
+        try:
+            book_id = int(params['book_id'])
+        except (KeyError, TypeError, ValueError):
+            raise HttpError(400, "المعامل book_id مطلوب ويجب أن يكون رقماً")
+        if self.recommender.get_book(book_id) is None:
+            raise HttpError(404, f"الكتاب {book_id} غير موجود")
+        return {'results': self.recommender.get_similar_books(book_id, self._limit(params, 'k', 5))}
+
+    def search(self, params: Dict) -> Dict:
+        query = str(params.get('q', '')).strip()
+        if not query:
+            raise HttpError(400, "المعامل q مطلوب")
+        try:
+            matches = self.data_manager.search_books(query)
+        except PATTERN_ERRORS as e:
+            raise self._invalid_pattern(e)
+        if matches.empty:
+            return {'total': 0, 'results': []}
+        top = matches.nlargest(self._limit(params), 'rating')
+        return {'total': len(matches), 'results': format_book_results(top)}
+
+    def top_rated(self, params: Dict) -> Dict:
+        top = self.data_manager.get_top_rated_books(self._limit(params))
+        return {'results': format_book_results(top)}
+
+    def stats(self, params: Dict) -> Dict:
+        return {
+            'catalog': self.data_manager.get_statistics(),
+            'query_cache': self.recommender.query_cache.report(),
+            'model_version': self.recommender.model_version,
+            'pid': os.getpid()
+        }
+
+
+class RecommendationServer:
+    """خادم HTTP/JSON غير متزامن: قراءة الطلبات في حلقة الأحداث والحساب في مجموعة خيوط"""
+
+    MAX_HEADER_BYTES = 16 * 1024
+    MAX_BODY_BYTES = 1024 * 1024
+
+    def __init__(self, service: RecommendationService, threads: int = None):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=threads or SERVER_CONFIG['threads'],
+                                           thread_name_prefix='recommend')
+        self.stats = {'requests': 0, 'errors': 0}
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict, bytes]]:
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(413, "ترويسات الطلب أكبر من المسموح")
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise HttpError(400, "سطر الطلب غير صالح")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', 0) or 0)
+        except ValueError:
+            raise HttpError(400, "قيمة Content-Length غير صالحة")
+        if length > self.MAX_BODY_BYTES:
+            raise HttpError(413, "جسم الطلب أكبر من المسموح")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    def _parse_params(self, method: str, target: str, headers: Dict, body: bytes) -> Tuple[str, Dict]:
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        if method == 'POST' and body:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                raise HttpError(400, "جسم الطلب ليس JSON صالحاً")
+            if not isinstance(payload, dict):
+                raise HttpError(400, "جسم الطلب يجب أن يكون كائن JSON")
+            params.update(payload)
+        elif method not in ('GET', 'POST'):
+            raise HttpError(405, f"الطريقة {method} غير مدعومة")
+        return url.path.rstrip('/') or '/', params
+
+    async def _dispatch(self, path: str, params: Dict) -> Dict:
+        handler = self.service.routes.get(path)
+        if handler is None:
+            raise HttpError(404, f"المسار {path} غير موجود")
+        # الحساب خارج حلقة الأحداث حتى تبقى قادرة على قبول الاتصالات
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, handler, params)
+
+    @staticmethod
+    def _response(status: int, payload, keep_alive: bool) -> bytes:
+        body = dumps(payload)
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        return head.encode('latin-1') + body
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """اتصال واحد قد يحمل عدة طلبات متتالية (keep-alive)"""
+        try:
+            while True:
+                keep_alive = True
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    path, params = self._parse_params(method, target, headers, body)
+                    status, payload = 200, await self._dispatch(path, params)
+                except HttpError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+                self.stats['requests'] += 1
+                if status != 200:
+                    self.stats['errors'] += 1
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive or status == 413:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, sock: socket.socket):
+        server = await asyncio.start_server(self.handle_connection, sock=sock,
+                                            limit=self.MAX_HEADER_BYTES)
+        async with server:
+            await server.serve_forever()
+
+    def run(self, sock: socket.socket):
+        try:
+            asyncio.run(self.serve(sock))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.executor.shutdown(wait=False)
+
+
+def create_socket(host: str, port: int) -> socket.socket:
+    """مقبس استماع يُنشأ قبل التفرع حتى تتقاسمه كل العمليات"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(SERVER_CONFIG['backlog'])
+    sock.setblocking(False)
+    return sock
+
+
+def serve(csv_path: str = 'programming_books_dataset.csv', host: str = None, port: int = None,
+          workers: int = None, threads: int = None):
+    """تشغيل الخادم؛ مع workers > 1 تتفرع عمليات تتقاسم المقبس والنموذج المحمل قبل التفرع"""
+    host = host or SERVER_CONFIG['host']
+    port = port or SERVER_CONFIG['port']
+    workers = workers or SERVER_CONFIG['workers']
+
+    # النموذج يحمل مرة واحدة في العملية الأم وتشاركه العمليات الفرعية بالنسخ عند الكتابة
+    service = RecommendationService(csv_path)
+    sock = create_socket(host, port)
+    print(f"الخادم يستمع على http://{host}:{sock.getsockname()[1]} ({workers} عملية)")
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        RecommendationServer(service, threads).run(sock)
+        return
+
+    children: List[int] = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                RecommendationServer(service, threads).run(sock)
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(signum=None, frame=None):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        stop()
+        for pid in children:
+            os.waitpid(pid, 0)
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="خادم توصيات الكتب (HTTP/JSON)")
+    parser.add_argument('--data', default='programming_books_dataset.csv', help="مسار ملف البيانات")
+    parser.add_argument('--host', default=SERVER_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=SERVER_CONFIG['port'])
+    parser.add_argument('--workers', type=int, default=SERVER_CONFIG['workers'], help="عدد العمليات المتفرعة")
+    parser.add_argument('--threads', type=int, default=SERVER_CONFIG['threads'], help="خيوط الحساب لكل عملية")
+    args = parser.parse_args()
+
+    serve(args.data, args.host, args.port, args.workers, args.threads)
@@ -0,0 +1,227 @@
+import numpy as np
+from scipy import sparse
+from typing import List, Tuple
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """إرجاع مواقع أعلى k قيم مرتبة تنازلياً مع الحفاظ على ترتيب التعادل"""
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k == n:
+        return np.argsort(-scores, kind='stable')
+
+    # اختيار المرشحين بـ argpartition ثم حل التعادل عند الحد بترتيب المواقع
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    candidates = np.concatenate([above, ties])
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def sparse_top_k(columns: np.ndarray, values: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """أعلى k مواقع في صف متناثر أعمدته مرتبة تصاعدياً، بنفس نتيجة top_k_indices على الصف الكثيف
+
+    الدرجات غير سالبة (TF-IDF)، فإن قلت القيم الموجبة عن k أُكمل الصف بأصغر المواقع ذات الدرجة صفر
+    كما يفعل الترتيب المستقر على الصف الكثيف.
+    """
+    positive = values > 0
+    columns, values = columns[positive], values[positive]
+    if len(columns) >= k:
+        top = top_k_indices(values, k)
+        return columns[top], values[top]
+
+    order = np.argsort(-values, kind='stable')
+    # المواقع الحرة الأولى تقع كلها ضمن أول k موقع لأن الصف لا يشغل منها أكثر من len(columns)
+    padding = np.setdiff1d(np.arange(k), columns, assume_unique=True)[:k - len(columns)]
+    return (np.concatenate([columns[order], padding]),
+            np.concatenate([values[order], np.zeros(len(padding))]))
+
+
+def drop_self(row_indices, positions: np.ndarray, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """إزالة الصف نفسه من نتائج top_k(rows, k + 1) للحصول على k جيران
+
+    الصف ليس أول نتائجه دائماً: نسخة مطابقة منه قد تسبقه بفرق التقريب، وقد لا يظهر أصلاً إن تعادل
+    مع أكثر من k صفاً فيُسقط آخر الأعمدة بدلاً منه.
+    """
+    is_self = positions == np.asarray(row_indices)[:, None]
+    is_self[~is_self.any(axis=1), -1] = True
+    keep = ~is_self
+    n_rows, width = positions.shape
+    return positions[keep].reshape(n_rows, width - 1), scores[keep].reshape(n_rows, width - 1)
+
+
+def replace_rows(matrix, positions, rows=None) -> sparse.csr_matrix:
+    """نسخة من مصفوفة CSR تستبدل فيها الصفوف positions بصفوف rows (أو تحذفها إن لم تعط rows)
+
+    المقاطع الثابتة بين الصفوف المتغيرة تنسخ كقطع متصلة بدل فهرسة المصفوفة كلها صفاً صفاً.
+    المواقع المكررة تستبدل مرة واحدة بأول صف مقابل لها.
+    """
+    matrix = sparse.csr_matrix(matrix)
+    positions, first = np.unique(np.asarray(positions, dtype=np.int64), return_index=True)
+    lengths = np.diff(matrix.indptr)
+    if rows is not None:
+        rows = sparse.csr_matrix(rows, dtype=matrix.dtype)[first]
+        lengths[positions] = np.diff(rows.indptr)
+    else:
+        lengths = np.delete(lengths, positions)
+
+    indptr, data, indices = matrix.indptr, [], []
+    previous = 0
+    for i, position in enumerate(positions.tolist()):
+        data.append(matrix.data[indptr[previous]:indptr[position]])
+        indices.append(matrix.indices[indptr[previous]:indptr[position]])
+        if rows is not None:
+            data.append(rows.data[rows.indptr[i]:rows.indptr[i + 1]])
+            indices.append(rows.indices[rows.indptr[i]:rows.indptr[i + 1]].astype(matrix.indices.dtype))
+        previous = position + 1
+    data.append(matrix.data[indptr[previous]:])
+    indices.append(matrix.indices[indptr[previous]:])
+
+    new_indptr = np.zeros(len(lengths) + 1, dtype=indptr.dtype)
+    np.cumsum(lengths, out=new_indptr[1:])
+    return sparse.csr_matrix((np.concatenate(data), np.concatenate(indices), new_indptr),
+                             shape=(len(lengths), matrix.shape[1]))
+
+
+def append_rows(matrix, rows) -> sparse.csr_matrix:
+    """مصفوفة CSR بإضافة صفوف في نهايتها بضم مصفوفاتها الداخلية مباشرة"""
+    matrix = sparse.csr_matrix(matrix)
+    rows = sparse.csr_matrix(rows, dtype=matrix.dtype)
+    indptr = np.concatenate([matrix.indptr, rows.indptr[1:].astype(matrix.indptr.dtype) + matrix.nnz])
+    return sparse.csr_matrix((np.concatenate([matrix.data, rows.data]),
+                              np.concatenate([matrix.indices, rows.indices.astype(matrix.indices.dtype)]),
+                              indptr), shape=(matrix.shape[0] + rows.shape[0], matrix.shape[1]))
+
+
+class SimilarityEngine:
+    """محرك استرجاع أقرب الجيران فوق مصفوفة TF-IDF المتناثرة"""
+
+    # تعديلات الكتالوج تُجمع في منقول صغير منفصل، ويعاد بناء المنقول كاملاً عندما تتجاوز الصفوف
+    # المعلقة والمستبعدة هذا الحد (تكلفة إعادة البناء موزعة على هذا العدد من التعديلات)
+    MAX_PENDING_ROWS = 1024
+
+    def __init__(self, feature_matrix, block_size: int = 256, feature_matrix_t=None):
+        # صفوف TF-IDF مطبّعة مسبقاً لذا فإن الضرب النقطي يساوي تشابه جيب التمام
+        self.feature_matrix = sparse.csr_matrix(feature_matrix, dtype=np.float64)
+        # المنقول يمكن تمريره جاهزاً (مثلاً مربوطاً بالذاكرة) لتجنب إعادة حسابه
+        if feature_matrix_t is None:
+            self.feature_matrix_t = self.feature_matrix.T.tocsr()
+        else:
+            self.feature_matrix_t = sparse.csr_matrix(feature_matrix_t, dtype=np.float64)
+        self.block_size = block_size
+        self._reset_pending()
+
+    def _reset_pending(self):
+        # بعد التعديل: موقع كل عمود من المنقول في الكتالوج الحالي (-1 للصف المحذوف أو المستبدل)،
+        # والصفوف الجديدة أو المعدلة منقولة في pending_t، و sources عمود كل صف حالي في الجزأين معاً
+        self._base_positions = None
+        self._pending_t = None
+        self._pending_positions = np.empty(0, dtype=np.int64)
+        self._sources = None
+        self._retired = 0
+
+    @property
+    def n_rows(self) -> int:
+        return self.feature_matrix.shape[0]
+
+    @property
+    def pending_rows(self) -> int:
+        """عدد الصفوف المعلقة والمستبعدة منذ آخر بناء كامل للمنقول"""
+        return len(self._pending_positions) + self._retired
+
+    def update(self, feature_matrix, changed=None, removed=None):
+        """ترقيع المحرك بعد تعديل الكتالوج دون إعادة حساب المنقول كله
+
+        removed مواقع الصفوف المحذوفة قبل الحذف، و changed مواقع الصفوف الجديدة أو المعدلة في
+        feature_matrix بعده (نفس اصطلاح AnnIndex.update). النتائج مطابقة لمحرك جديد على feature_matrix.
+        """
+        feature_matrix = sparse.csr_matrix(feature_matrix, dtype=np.float64)
+        if self._sources is None:
+            self._sources = np.arange(self.n_rows, dtype=np.int64)
+            self._base_positions = np.arange(self.n_rows, dtype=np.int64)
+
+        if removed is not None and len(removed):
+            removed = np.unique(np.asarray(removed, dtype=np.int64))
+            self._retire(self._sources[removed])
+            self._sources = np.delete(self._sources, removed)
+            # المواقع بعد الصفوف المحذوفة تتقدم بعدد المحذوف قبلها
+            for positions in (self._base_positions, self._pending_positions):
+                live = positions >= 0
+                positions[live] -= np.searchsorted(removed, positions[live])
+
+        if changed is not None and len(changed):
+            changed = np.unique(np.asarray(changed, dtype=np.int64))
+            n_previous = len(self._sources)
+            self._retire(self._sources[changed[changed < n_previous]])
+            self._sources = np.concatenate([
+                self._sources, np.full(feature_matrix.shape[0] - n_previous, -1, dtype=np.int64)
+            ])
+            n_columns = self.feature_matrix_t.shape[1] + len(self._pending_positions)
+            self._sources[changed] = n_columns + np.arange(len(changed))
+            rows_t = feature_matrix[changed].T.tocsr()
+            self._pending_t = rows_t if self._pending_t is None else sparse.hstack([self._pending_t, rows_t], format='csr')
+            self._pending_positions = np.concatenate([self._pending_positions, changed])
+
+        self.feature_matrix = feature_matrix
+        # صف جديد لم يذكر في changed أو تجاوز الحد: بناء كامل للمنقول
+        if len(self._sources) != self.n_rows or (self._sources < 0).any() or self.pending_rows > self.MAX_PENDING_ROWS:
+            self.feature_matrix_t = feature_matrix.T.tocsr()
+            self._reset_pending()
+
+    def _retire(self, columns: np.ndarray):
+        """استبعاد أعمدة صفوف محذوفة أو مستبدلة من نتائج الضرب"""
+        n_base = self.feature_matrix_t.shape[1]
+        self._base_positions[columns[columns < n_base]] = -1
+        self._pending_positions[columns[columns >= n_base] - n_base] = -1
+        self._retired += len(columns)
+
+    def similarity_rows(self, row_indices) -> sparse.csr_matrix:
+        """صفوف التشابه لمجموعة صغيرة من الصفوف كمصفوفة متناثرة (الذاكرة تتبع عدد القيم غير الصفرية لا N)"""
+        rows = self.feature_matrix[np.asarray(row_indices, dtype=np.int64)]
+        product = (rows @ self.feature_matrix_t).tocsr()
+        if self._sources is not None:
+            product = self._to_positions(rows, product)
+        # ترتيب الأعمدة داخل كل صف شرط لحل التعادل بترتيب المواقع كما في المسار الكثيف
+        product.sort_indices()
+        return product
+
+    def _to_positions(self, rows, product) -> sparse.csr_matrix:
+        """تحويل أعمدة الضرب من أعمدة المنقول والجزء المعلق إلى مواقع الصفوف الحالية"""
+        parts = [(product.tocoo(), self._base_positions)]
+        if self._pending_t is not None:
+            parts.append(((rows @ self._pending_t).tocoo(), self._pending_positions))
+
+        row_ids, columns, values = [], [], []
+        for part, positions in parts:
+            mapped = positions[part.col]
+            live = mapped >= 0
+            row_ids.append(part.row[live])
+            columns.append(mapped[live])
+            values.append(part.data[live])
+        return sparse.csr_matrix((np.concatenate(values), (np.concatenate(row_ids), np.concatenate(columns))),
+                                 shape=(rows.shape[0], self.n_rows))
+
+    def top_k(self, row_indices, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """أعلى k جيران لكل صف مطلوب (المواقع والدرجات)"""
+        row_indices = np.asarray(row_indices, dtype=np.int64)
+        k = min(k, self.n_rows)
+        neighbor_ids = np.empty((len(row_indices), k), dtype=np.int64)
+        neighbor_scores = np.empty((len(row_indices), k), dtype=np.float64)
+
+        # المعالجة على دفعات حتى تبقى الذاكرة محدودة بحجم الدفعة
+        for start in range(0, len(row_indices), self.block_size):
+            block = row_indices[start:start + self.block_size]
+            block_scores = self.similarity_rows(block)
+            indptr, indices, data = block_scores.indptr, block_scores.indices, block_scores.data
+            for i in range(len(block)):
+                row = slice(indptr[i], indptr[i + 1])
+                neighbor_ids[start + i], neighbor_scores[start + i] = sparse_top_k(indices[row], data[row], k)
+
+        return neighbor_ids, neighbor_scores
+
+    def neighbors(self, row_index: int, k: int) -> List[Tuple[int, float]]:
+        """أعلى k جيران لصف واحد كقائمة (موقع، درجة)"""
+        ids, scores = self.top_k([row_index], k)
+        return list(zip(ids[0].tolist(), scores[0].tolist()))
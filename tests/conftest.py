@@ -0,0 +1,38 @@
+import contextlib
+import io
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# الوحدات في جذر المستودع وليست حزمة
+sys.path.insert(0, ROOT)
+
+
+def pytest_configure(config):
+    # fuzzywuzzy ينبه عند غياب python-Levenshtein (عند الاستيراد الأول، داخل أي اختبار)
+    config.addinivalue_line('filterwarnings', 'ignore:Using slow pure-python SequenceMatcher')
+
+
+@pytest.fixture(scope='session')
+def dataset_path():
+    return os.path.join(ROOT, 'programming_books_dataset.csv')
+
+
+@pytest.fixture
+def catalog_csv(tmp_path, dataset_path):
+    """نسخة من ملف البيانات في مجلد مؤقت حتى يُكتب التخزين المؤقت للنموذج بجانبها لا في المستودع"""
+    path = tmp_path / 'books.csv'
+    shutil.copyfile(dataset_path, path)
+    return str(path)
+
+
+@pytest.fixture
+def recommender(catalog_csv):
+    from data_manager import DataManager
+    from recommender import BookRecommender
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return BookRecommender(DataManager(catalog_csv))
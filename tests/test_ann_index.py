@@ -0,0 +1,35 @@
+import numpy as np
+from scipy import sparse
+
+from ann_index import AnnIndex
+
+PARAMS = {'n_components': 32, 'n_subvectors': 8, 'train_rows': 2000}
+
+
+def assert_same_lists(index, expected):
+    for name in AnnIndex.DATA_FILES:
+        assert np.array_equal(getattr(index, name), getattr(expected, name)), name
+
+
+def test_update_matches_full_encode():
+    matrix = sparse.random(2000, 300, density=0.03, random_state=1, format='csr')
+    index = AnnIndex.train(matrix, PARAMS)
+
+    # حذف صفوف: تزال مدخلاتها وتزاح مواقع ما بعدها
+    removed = np.array([0, 17, 1000, 1999])
+    keep = np.ones(matrix.shape[0], dtype=bool)
+    keep[removed] = False
+    matrix = matrix[keep]
+    index = index.update(matrix, removed=removed)
+    assert_same_lists(index, index.encode(matrix))
+
+    # تعديل صفوف وإضافة أخرى في النهاية
+    fresh = sparse.random(10, 300, density=0.05, random_state=2, format='csr')
+    edited = [3, 500]
+    order = np.arange(matrix.shape[0])
+    order[edited] = matrix.shape[0] + np.arange(len(edited))
+    n_old = matrix.shape[0]
+    matrix = sparse.vstack([sparse.vstack([matrix, fresh[:2]]).tocsr()[order], fresh[2:]]).tocsr()
+    index = index.update(matrix, changed=np.r_[edited, np.arange(n_old, matrix.shape[0])])
+    assert len(index) == matrix.shape[0]
+    assert_same_lists(index, index.encode(matrix))
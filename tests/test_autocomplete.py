@@ -0,0 +1,127 @@
+import contextlib
+import io
+import math
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from autocomplete import SEPARATOR_PATTERN, AutocompleteIndex, RangeMax, normalize
+from data_manager import DataManager
+
+
+@pytest.fixture
+def data_manager(catalog_csv):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataManager(catalog_csv)
+
+
+def reference_entries(df):
+    """مدخلات الإكمال محسوبة صفاً بصف: (النوع، النص، معرف الكتاب) -> الدرجة ومفاتيحها"""
+    groups = defaultdict(list)  # (النوع، المفتاح) -> [(التقييم، الموقع، النص، المعرف)]
+    for position, row in enumerate(df.to_dict('records')):
+        rating = round(float(row['rating']), 6)
+        values = [('title', row['title']), ('author', row['author']), ('category', row['category'])]
+        values += [('tag', tag.strip()) for tag in str(row['tags']).split(',')]
+        for kind, text in values:
+            key = normalize(text)
+            if key:
+                groups[kind, key].append((rating, position, str(text), row['book_id']))
+
+    entries = []
+    for (kind, key), rows in groups.items():
+        # النص المعروض ومعرف الكتاب من أعلى الكتب تقييماً (الأسبق عند التعادل)
+        best = min(rows, key=lambda r: (-r[0], r[1]))
+        score = np.mean([r[0] for r in rows]) + AutocompleteIndex.POPULARITY_WEIGHT * math.log(len(rows))
+        keys = [(key, score)]
+        keys += [(key[i + 1:], score - AutocompleteIndex.WORD_PENALTY) for i, c in enumerate(key) if c == ' ']
+        entries.append(((best[2], kind, best[3] if kind == 'title' else None), keys))
+    return entries
+
+
+def reference_complete(entries, text, limit=8, kinds=None):
+    """كل المدخلات المطابقة للبادئة مرتبة بالدرجة (بحث كامل)"""
+    prefix = normalize(text)
+    if not prefix:
+        return []
+    if SEPARATOR_PATTERN.fullmatch(text[-1]):
+        prefix += ' '
+
+    matches = []
+    for entry, keys in entries:
+        scores = [score for key, score in keys if key.startswith(prefix)]
+        if scores and (not kinds or entry[1] in kinds):
+            matches.append((max(scores), entry))
+    matches.sort(key=lambda m: -m[0])
+    return matches[:limit]
+
+
+def assert_matches_reference(index, entries, text, limit=8, kinds=None):
+    results = index.complete(text, limit=limit, kinds=kinds)
+    expected = reference_complete(entries, text, limit, kinds)
+
+    assert len(results) == len(expected), text
+    assert np.allclose([r['score'] for r in results], [score for score, _ in expected]), text
+    # المدخلات فوق درجة آخر نتيجة لا تعادل فيها فيجب أن تتطابق
+    if expected:
+        cutoff = expected[-1][0] + 1e-9
+        got = {(r['text'], r['kind'], r['book_id']) for r in results if r['score'] > cutoff}
+        assert got == {entry for score, entry in expected if score > cutoff}, text
+
+
+def sample_prefixes(df):
+    words = pd.concat([df['title'], df['author'], df['tags']]).astype(str).map(normalize).str.split().explode()
+    words = pd.unique(words.dropna())
+    rng = np.random.default_rng(0)
+    prefixes = [word[:length] for word in rng.choice(words, 60) for length in (1, 2, 4)]
+    return prefixes + ['python ', 'Machine L', 'learning', 'DATA-sc', 'zzzz', '  ', 'c++']
+
+
+def test_range_max_matches_brute_force():
+    rng = np.random.default_rng(1)
+    for size, block in [(1, 4), (7, 4), (200, 8), (1000, 64)]:
+        # قيم مكررة لاختبار التعادل
+        values = rng.integers(0, 20, size).astype(np.float64)
+        range_max = RangeMax(values, block=block)
+        for _ in range(300):
+            lo = int(rng.integers(0, size))
+            hi = int(rng.integers(lo + 1, size + 1))
+            best = range_max.argmax(lo, hi)
+            assert lo <= best < hi
+            assert values[best] == values[lo:hi].max()
+
+
+def test_complete_matches_brute_force(data_manager):
+    index = data_manager.autocomplete
+    entries = reference_entries(data_manager.df)
+    assert len(index) == len(entries)
+
+    for prefix in sample_prefixes(data_manager.df):
+        assert_matches_reference(index, entries, prefix)
+    for limit in (1, 3, 25):
+        assert_matches_reference(index, entries, 'p', limit=limit)
+    for kinds in (['tag'], ['author', 'category']):
+        assert_matches_reference(index, entries, 'd', kinds=kinds)
+
+
+def test_complete_follows_catalog_changes(data_manager):
+    before = data_manager.autocomplete
+    ids = data_manager.df['book_id'].tolist()
+
+    data_manager.add_books([{
+        'title': 'Pythonic Patterns', 'author': 'Zed Quill', 'category': 'Programming',
+        'language': 'English', 'rating': 4.95, 'year': 2024, 'pages': 300,
+        'description': 'patterns', 'tags': 'python, patterns'
+    }])
+    data_manager.update_books([{'book_id': ids[0], 'title': 'Quantum Pythonistas', 'rating': 1.5}])
+    data_manager.remove_books(ids[1:4])
+
+    index = data_manager.autocomplete
+    assert index is not before
+    entries = reference_entries(data_manager.df)
+    for prefix in sample_prefixes(data_manager.df) + ['pythonic', 'quantum', 'zed q']:
+        assert_matches_reference(index, entries, prefix)
+
+    titles = {r['text'] for r in index.complete('pythoni', limit=20, kinds=['title'])}
+    assert {'Pythonic Patterns', 'Quantum Pythonistas'} <= titles
@@ -0,0 +1,70 @@
+import io
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import cli
+
+
+def run_cli(capsys, catalog_csv, *argv):
+    cli.main(['--data', catalog_csv, *argv])
+    out = capsys.readouterr().out
+    return [json.loads(line) for line in out.splitlines()] if '--format' in argv else out
+
+
+def test_recommend(capsys, catalog_csv, recommender):
+    lines = run_cli(capsys, catalog_csv, 'recommend', 'python', 'qwxzv', '--limit', '3', '--min-rating', '4.5',
+                    '--format', 'json')
+    assert [line['query'] for line in lines] == ['python', 'qwxzv']
+    for line in lines:
+        expected = recommender.recommend_books(line['query'], min_rating=4.5, max_results=3)
+        assert [book['id'] for book in line['results']] == [book['id'] for book in expected]
+        assert len(line['results']) == 3
+
+
+def test_recommend_reads_stdin_as_text(capsys, catalog_csv, monkeypatch):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('python\n\ndata\n'))
+    out = run_cli(capsys, catalog_csv, 'recommend', '--limit', '2')
+    headers = [line for line in out.splitlines() if line.startswith('# ')]
+    assert headers == ['# python (2)', '# data (2)']
+    assert len(out.splitlines()) == 6
+
+
+def test_similar_with_unknown_id(capsys, catalog_csv, recommender):
+    lines = run_cli(capsys, catalog_csv, 'similar', '1', '999999', '-k', '4', '--format', 'json')
+    assert [line['query'] for line in lines] == [1, 999999]
+    assert [book['id'] for book in lines[0]['results']] == [book['id'] for book in recommender.get_similar_books(1, 4)]
+    assert lines[1]['results'] == []
+
+
+def test_similar_skips_invalid_id(capsys, catalog_csv):
+    cli.main(['--data', catalog_csv, 'similar', 'abc', '2'])
+    captured = capsys.readouterr()
+    assert 'abc' in captured.err
+    assert captured.out.startswith('# 2 (5)')
+
+
+def test_search(capsys, catalog_csv, recommender):
+    lines = run_cli(capsys, catalog_csv, 'search', 'C#', 'qwxzv', '--limit', '2', '--format', 'json')
+    matches = recommender.data_manager.search_books('C#').nlargest(2, 'rating')
+    assert [book['id'] for book in lines[0]['results']] == matches['book_id'].tolist()
+    assert lines[1] == {'query': 'qwxzv', 'results': []}
+
+
+def test_module_entry_point_keeps_stdout_for_results(catalog_csv):
+    root = os.path.dirname(os.path.abspath(cli.__file__))
+    completed = subprocess.run([sys.executable, '-m', 'cli', '--data', catalog_csv, 'search', 'python', '--limit', '1'],
+                               cwd=root, capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    # رسائل التحميل في stderr فقط
+    assert completed.stdout.splitlines()[0] == '# python (1)'
+    assert len(completed.stdout.splitlines()) == 2
+
+
+def test_missing_command_exits_with_usage(capsys):
+    with pytest.raises(SystemExit) as raised:
+        cli.main([])
+    assert raised.value.code == 2
@@ -0,0 +1,165 @@
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from book_text import weighted_text
+from data_manager import DataManager
+
+
+@pytest.fixture
+def data_manager(catalog_csv):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataManager(catalog_csv)
+
+
+def book(data_manager, book_id):
+    return data_manager.df[data_manager.df['book_id'] == book_id].iloc[0]
+
+
+def test_update_numeric_fields_keeps_compact_dtypes(data_manager):
+    dtypes = data_manager.df.dtypes.copy()
+    positions = data_manager.update_books([{'book_id': 5, 'pages': 700}, {'book_id': 6, 'rating': 4.9}])
+
+    assert len(positions) == 2
+    assert book(data_manager, 5)['pages'] == 700
+    assert book(data_manager, 5)['difficulty'] == 'متقدم'
+    assert round(float(book(data_manager, 6)['rating']), 6) == 4.9
+    assert book(data_manager, 6)['rating_category'] == 'ممتاز'
+    assert (data_manager.df.dtypes == dtypes).all()
+
+
+def test_update_value_outside_compact_range_widens_column(data_manager):
+    data_manager.update_books([{'book_id': 5, 'pages': 70000, 'year': 2021}])
+    assert book(data_manager, 5)['pages'] == 70000
+    assert book(data_manager, 5)['year'] == 2021
+    assert data_manager.df['year'].dtype == np.int16
+
+
+def test_update_leaves_unspecified_fields(data_manager):
+    before = book(data_manager, 7).copy()
+    data_manager.update_books([{'book_id': 7, 'title': 'Renamed', 'pages': None}])
+    after = book(data_manager, 7)
+    assert after['title'] == 'Renamed'
+    assert after['pages'] == before['pages']
+    assert after['rating'] == before['rating']
+
+
+def test_update_unknown_book_raises(data_manager):
+    with pytest.raises(KeyError):
+        data_manager.update_books([{'book_id': 10**6, 'pages': 10}])
+
+
+def load_chunked(path, chunk_size=64):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataManager(path, chunk_size=chunk_size)
+
+
+def test_chunked_load_matches_in_memory_load(data_manager, catalog_csv):
+    chunked = load_chunked(catalog_csv)
+    assert len(chunked.catalog_store.parts) == 5
+    pd.testing.assert_frame_equal(chunked.df, data_manager.df)
+    assert chunked.search_books('python').index.tolist() == data_manager.search_books('python').index.tolist()
+
+
+def test_chunked_features_match_one_pass_tfidf(data_manager, catalog_csv):
+    from sklearn.feature_extraction.text import TfidfTransformer
+
+    store = load_chunked(catalog_csv).catalog_store
+    # المرور الأول على الأجزاء يعطي تكرار المستندات نفسه الذي يحسبه TF-IDF على الكتالوج كاملاً
+    counts = store.vectorizer.transform(weighted_text(data_manager.df))
+    expected = TfidfTransformer().fit_transform(counts)
+    assert abs(store.feature_matrix() - expected).max() < 1e-12
+
+
+def test_chunked_load_reuses_store_until_source_changes(catalog_csv, monkeypatch):
+    first = load_chunked(catalog_csv).catalog_store
+
+    def fail(*args, **kwargs):
+        raise AssertionError("المخزن المطابق لا يحتاج قراءة الملف")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pd, 'read_csv', fail)
+        reused = load_chunked(catalog_csv)
+    assert reused.df is not None and len(reused.df) == first.rows
+
+    # تعديل الملف يغير بصمته فيعاد بناء المخزن
+    frame = pd.read_csv(catalog_csv)
+    frame.iloc[:100].to_csv(catalog_csv, index=False)
+    assert load_chunked(catalog_csv).catalog_store.rows == 100
+
+
+def test_recommender_runs_on_chunked_load(catalog_csv):
+    from recommender import BookRecommender
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        in_memory = BookRecommender(DataManager(catalog_csv))
+        chunked = BookRecommender(load_chunked(catalog_csv))
+    assert chunked.recommend_books('python web') == in_memory.recommend_books('python web')
+    assert chunked.get_similar_books(5) == in_memory.get_similar_books(5)
+
+
+def rowwise_difficulty(row):
+    """قاعدة الصعوبة الأصلية صفاً بصف كما كانت قبل التحويل إلى np.select"""
+    pages = row['pages']
+    tags = str(row['tags']).lower()
+    if pages < 300:
+        return 'مبتدئ' if any(w in tags for w in ['beginner', 'introduction', 'basics', 'مبتدئ']) else 'متوسط'
+    elif pages < 600:
+        return 'متقدم' if any(w in tags for w in ['advanced', 'deep', 'comprehensive', 'متقدم']) else 'متوسط'
+    return 'متقدم'
+
+
+def rowwise_rating_category(rating):
+    """قاعدة فئة التقييم الأصلية عنصراً بعنصر كما كانت قبل pd.cut"""
+    for limit, label in [(4.7, 'ممتاز'), (4.3, 'جيد جداً'), (4.0, 'جيد'), (3.5, 'متوسط')]:
+        if rating >= limit:
+            return label
+    return 'ضعيف'
+
+
+def derived_frame():
+    pages = [0, 299, 300, 301, 599, 600, 601, np.nan, 299, 599, 150, 450, np.nan, 1200]
+    tags = ['Beginner', 'python', 'DEEP learning', 'deep', 'intro', 'advanced', 'basics',
+            'beginner', np.nan, 'comprehensive guide', 'مبتدئ', 'متقدم', '', 'introduction']
+    ratings = [np.nan, 0.0, 3.4999, 3.5, 3.9999, 4.0, 4.2999, 4.3, 4.6999, 4.7, 5.0, 3.8, np.nan, 4.25]
+    return pd.DataFrame({'pages': pages, 'tags': tags, 'rating': ratings})
+
+
+def test_vectorized_derived_columns_match_rowwise_rules(data_manager):
+    df = derived_frame()
+    expected_difficulty = df.apply(rowwise_difficulty, axis=1).tolist()
+    expected_category = df['rating'].apply(rowwise_rating_category).tolist()
+
+    data_manager._add_difficulty_level(df)
+    data_manager._add_rating_category(df)
+
+    assert df['difficulty'].tolist() == expected_difficulty
+    assert df['rating_category'].tolist() == expected_category
+
+
+def test_vectorized_derived_columns_match_rowwise_rules_on_compact_dtypes(data_manager):
+    # بعد الضغط تكون الصفحات Int16 بقيم فارغة والتقييم float32
+    df = derived_frame()
+    expected_difficulty = df.apply(rowwise_difficulty, axis=1).tolist()
+    expected_category = df['rating'].apply(rowwise_rating_category).tolist()
+
+    df['pages'] = df['pages'].astype('Int16')
+    df['rating'] = df['rating'].astype(np.float32)
+    data_manager._add_difficulty_level(df)
+    data_manager._add_rating_category(df)
+
+    assert df['difficulty'].tolist() == expected_difficulty
+    assert df['rating_category'].tolist() == expected_category
+
+
+def test_vectorized_derived_columns_match_rowwise_rules_on_catalog(data_manager, catalog_csv):
+    df = pd.read_csv(catalog_csv)
+    df['tags'] = df['tags'].fillna('')
+    expected_difficulty = df.apply(rowwise_difficulty, axis=1).tolist()
+    expected_category = df['rating'].apply(rowwise_rating_category).tolist()
+
+    assert data_manager.df['difficulty'].tolist() == expected_difficulty
+    assert data_manager.df['rating_category'].tolist() == expected_category
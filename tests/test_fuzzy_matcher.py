@@ -0,0 +1,104 @@
+import warnings
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')
+    from fuzzywuzzy import fuzz
+from fuzzy_matcher import FuzzyTitleMatcher
+
+
+@pytest.fixture(scope='module')
+def titles(dataset_path):
+    return pd.read_csv(dataset_path)['title'].tolist()
+
+
+def typo_queries(titles, n=60):
+    rng = np.random.default_rng(0)
+    queries = []
+    for row in rng.choice(len(titles), size=n, replace=False):
+        chars = list(titles[row].lower())
+        for pos in rng.choice(len(chars), size=min(2, len(chars)), replace=False):
+            chars[pos] = 'x'
+        queries.append(''.join(chars))
+    return queries + ['pythn', 'clean cod', 'zzzz']
+
+
+def brute_force(titles, query, limit=5, threshold=70):
+    scored = [(row, fuzz.ratio(query.lower(), str(t).lower())) for row, t in enumerate(titles)]
+    scored = [x for x in scored if x[1] > threshold]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return [row for row, _ in scored[:limit]]
+
+
+def test_match_agrees_with_full_scan(titles):
+    matcher = FuzzyTitleMatcher(titles)
+    for query in typo_queries(titles):
+        assert matcher.match(query) == brute_force(titles, query), query
+
+
+def synthetic_catalog(titles, n_titles):
+    """كتالوج بحجم واقعي من عناوين مختلفة: كل عنوان ثلث من بداية عنوان ووسط آخر ونهاية ثالث"""
+    rng = np.random.default_rng(1)
+    parts = []
+    for title in titles:
+        words = str(title).split()
+        third = -(-len(words) // 3)
+        parts.append([' '.join(words[:third]), ' '.join(words[third:2 * third]), ' '.join(words[2 * third:])])
+    picks = rng.integers(0, len(titles), size=(n_titles, 3))
+    return [' '.join(filter(None, (parts[a][0], parts[b][1], parts[c][2]))) for a, b, c in picks.tolist()]
+
+
+def test_match_is_exact_at_catalog_scale(titles):
+    catalog = synthetic_catalog(titles, 100_000)
+    matcher = FuzzyTitleMatcher(catalog)
+    lowered = [t.lower() for t in catalog]
+    char_counts = [Counter(t) for t in lowered]
+
+    for query in typo_queries(catalog, 2) + ['pythn web']:
+        # مسح كامل يتخطى fuzz.ratio فقط حين يثبت حد quick_ratio (الحروف المشتركة) أن النسبة لا تتجاوز الحد
+        query_counts = Counter(query)
+        scored = []
+        for row, title in enumerate(lowered):
+            shared = sum((query_counts & char_counts[row]).values())
+            if round(200.0 * shared / (len(query) + len(title))) > 70:
+                similarity = fuzz.ratio(query, title)
+                if similarity > 70:
+                    scored.append((row, similarity))
+        scored.sort(key=lambda x: x[1], reverse=True)
+        assert matcher.match(query) == [row for row, _ in scored[:5]], query
+
+
+def test_match_without_shared_trigrams():
+    # النسبة 71 والكتل المتطابقة حرفان على الأكثر، فلا ثلاثية مشتركة يجدها فهرس الثلاثيات
+    query, title = 'qabxcdxefxghxijs', 'Rabcdefghijt'
+    assert fuzz.ratio(query, title.lower()) == 71
+    assert FuzzyTitleMatcher([title, 'zzz']).match(query) == [0]
+    assert FuzzyTitleMatcher([title, 'zzz'], max_candidates=50).match(query) == []
+
+
+def test_approximate_candidates_stay_available(titles):
+    matcher = FuzzyTitleMatcher(titles, max_candidates=50)
+    for query in typo_queries(titles, 20):
+        assert matcher.match(query) == brute_force(titles, query), query
+
+
+def test_incremental_updates_match_fresh_index(titles):
+    matcher = FuzzyTitleMatcher(titles[:200])
+    matcher.add_titles(titles[200:])
+    matcher.update_titles([3, 10], ['Pragmatic Python', 'Clean Code Revisited'])
+    matcher.remove_titles([0, 5, 250])
+
+    expected = list(titles)
+    expected[3], expected[10] = 'Pragmatic Python', 'Clean Code Revisited'
+    expected = [t for row, t in enumerate(expected) if row not in (0, 5, 250)]
+    fresh = FuzzyTitleMatcher(expected)
+
+    assert matcher.titles == fresh.titles
+    assert np.array_equal(matcher.char_counts, fresh.char_counts)
+    assert np.array_equal(matcher.prefixes, fresh.prefixes)
+    for query in typo_queries(expected, 20) + ['pragmatc python']:
+        assert matcher.match(query) == fresh.match(query) == brute_force(expected, query)
@@ -0,0 +1,256 @@
+import gc
+import sqlite3
+import threading
+
+import pytest
+
+from library_manager import LibraryManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'library.db')
+
+
+@pytest.fixture
+def library(db_path):
+    manager = LibraryManager(db_path)
+    yield manager
+    manager.close()
+
+
+def test_thread_connections_close_when_threads_finish(library):
+    def work(i):
+        library.add_book(f'Book {i}', 'Author')
+        library.get_all_books()
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    gc.collect()
+
+    # اتصال الخيط الرئيسي فقط
+    assert len(library._connections) == 1
+    assert len(library.get_all_books()) == 5
+
+
+def test_close_closes_every_connection(db_path):
+    library = LibraryManager(db_path)
+    conn = library._connection()
+    library.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")
+    with pytest.raises(sqlite3.ProgrammingError):
+        library.get_all_books()
+
+
+def create_legacy_database(db_path, books):
+    """قاعدة بيانات بمخطط الإصدار الأول: بلا فهارس ولا فهرس نصي ولا user_version"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE my_library (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, author TEXT NOT NULL,
+            category TEXT, description TEXT, personal_rating REAL,
+            reading_status TEXT DEFAULT 'لم أقرأ بعد', tags TEXT,
+            date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.executemany("INSERT INTO my_library (title, author, tags) VALUES (?, ?, ?)", books)
+    conn.commit()
+    conn.close()
+
+
+def schema_state(db_path):
+    """رقم إصدار المخطط وفهارس جدول المكتبة مع كونها فريدة"""
+    conn = sqlite3.connect(db_path)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        indexes = {name: bool(unique) for _, name, unique, origin, _ in conn.execute("PRAGMA index_list(my_library)")
+                   if origin == 'c'}
+    finally:
+        conn.close()
+    return version, indexes
+
+
+def titles(books):
+    return [book['title'] for book in books]
+
+
+def test_fts_index_follows_insert_update_delete(library):
+    first = library.add_book('Fluent Python', 'Luciano Ramalho', tags='python,advanced')
+    second = library.add_book('Rust in Action', 'Tim McNamara', tags='rust,systems')
+
+    assert titles(library.search_books('flu')) == ['Fluent Python']
+    assert titles(library.search_books('mcnam')) == ['Rust in Action']
+
+    library.update_book(first, title='Effective Python', tags='python')
+    assert library.search_books('fluent') == []
+    assert titles(library.search_books('effect')) == ['Effective Python']
+
+    # تعديل حقل خارج الفهرس لا يفسد المزامنة
+    library.update_book(second, personal_rating=4.5)
+    assert titles(library.search_books('rust')) == ['Rust in Action']
+
+    library.delete_book(second)
+    assert library.search_books('rust') == []
+    library.reset_database()
+    assert library.search_books('python') == []
+
+
+def test_fts_ranks_title_matches_above_tags(library):
+    library.add_book('Cooking for Engineers', 'Someone', tags='python')
+    library.add_book('Python Tricks', 'Dan Bader', tags='tips')
+    assert titles(library.search_books('python')) == ['Python Tricks', 'Cooking for Engineers']
+
+
+def test_fts_index_built_for_existing_database(db_path):
+    # قاعدة بيانات من إصدار سابق بلا فهرس نصي
+    create_legacy_database(db_path, [('Clean Code', 'Robert Martin', 'craft')])
+
+    library = LibraryManager(db_path)
+    try:
+        assert library.fts_enabled
+        assert titles(library.search_books('robert mar')) == ['Clean Code']
+    finally:
+        library.close()
+
+
+def test_bulk_counts_each_row_once(library):
+    library.add_book('Clean Code', 'Robert Martin')
+    counts = library.add_books_bulk([
+        {'title': 'Refactoring', 'author': 'Martin Fowler'},
+        {'title': 'refactoring ', 'author': 'martin fowler', 'tags': 'classic'},
+        {'title': 'Clean Code', 'author': 'Robert Martin', 'personal_rating': 5},
+        {'title': 'CLEAN CODE', 'author': 'Robert Martin', 'tags': 'craft'},
+    ])
+    assert counts == {'inserted': 1, 'updated': 1, 'skipped': 0, 'duplicates': 2}
+    assert len(library.get_all_books()) == 2
+    clean_code = library.search_books('clean')[0]
+    assert clean_code['personal_rating'] == 5 and clean_code['tags'] == 'craft'
+    assert library.search_books('refactoring')[0]['tags'] == 'classic'
+
+
+def test_bulk_skip_policy_and_duplicates_across_batches(library):
+    library.add_book('Clean Code', 'Robert Martin')
+    books = [{'title': 'Clean Code', 'author': 'Robert Martin'},
+             {'title': 'SICP', 'author': 'Abelson'},
+             {'title': 'SICP', 'author': 'Abelson'}]
+    counts = library.add_books_bulk(books, on_conflict='skip', batch_size=1)
+    assert counts == {'inserted': 1, 'updated': 0, 'skipped': 1, 'duplicates': 1}
+    assert len(library.get_all_books()) == 2
+
+
+def test_bulk_matches_keys_stored_with_untrimmed_case(library):
+    # المطابقة مع lower(trim()) في SQL كما في الفهرس، لا مع تطبيع بايثون
+    library.add_book('  Clean Code ', 'ROBERT Martin')
+    counts = library.add_books_bulk([{'title': 'clean code', 'author': 'robert martin', 'tags': 'x'}])
+    assert counts['updated'] == 1 and counts['inserted'] == 0
+
+
+def test_import_skips_rows_with_invalid_rating(library, tmp_path, capsys):
+    path = tmp_path / 'books.jsonl'
+    path.write_text('\n'.join([
+        '{"title": "Good", "author": "A", "personal_rating": "4.5"}',
+        '{"title": "Bad", "author": "B", "personal_rating": "excellent"}',
+        'not json',
+        '{"title": "Out of range", "author": "C", "personal_rating": 9}',
+        '{"title": "Default", "author": "D"}',
+    ]), encoding='utf-8')
+    counts = library.import_library(str(path))
+    assert counts['inserted'] == 2 and counts['invalid'] == 3
+    assert sorted(titles(library.get_all_books())) == ['Default', 'Good']
+    output = capsys.readouterr().out
+    assert 'السطر 2' in output and 'السطر 3' in output and 'السطر 4' in output
+
+
+def test_migration_upgrades_existing_database(db_path):
+    create_legacy_database(db_path, [('Clean Code', 'Robert Martin', 'craft')])
+    assert schema_state(db_path) == (0, {})
+
+    LibraryManager(db_path).close()
+    version, indexes = schema_state(db_path)
+    assert version == len(LibraryManager.MIGRATIONS)
+    assert indexes['idx_my_library_title_author'] is True
+    assert {'idx_my_library_date_added', 'idx_my_library_reading_status',
+            'idx_my_library_category', 'idx_my_library_personal_rating'} <= set(indexes)
+
+    # الكتب السابقة باقية ومحمية الآن من التكرار
+    library = LibraryManager(db_path)
+    try:
+        assert titles(library.get_all_books()) == ['Clean Code']
+        assert library.add_books_bulk([{'title': 'clean code', 'author': 'robert martin'}])['updated'] == 1
+        with pytest.raises(ValueError):
+            library.add_book('Clean Code ', 'Robert Martin')
+    finally:
+        library.close()
+
+
+def test_migration_falls_back_to_plain_index_for_duplicates(db_path, capsys):
+    create_legacy_database(db_path, [('Clean Code', 'Robert Martin', None),
+                                     ('clean code', 'Robert Martin ', None)])
+    library = LibraryManager(db_path)
+    try:
+        assert 'مكررة' in capsys.readouterr().out
+        version, indexes = schema_state(db_path)
+        assert version == len(LibraryManager.MIGRATIONS)
+        assert indexes['idx_my_library_title_author'] is False
+        assert len(library.get_all_books()) == 2
+    finally:
+        library.close()
+
+
+def test_migration_runs_once(db_path, capsys):
+    create_legacy_database(db_path, [('Clean Code', 'Robert Martin', None),
+                                     ('clean code', 'Robert Martin', None)])
+    LibraryManager(db_path).close()
+    first = schema_state(db_path)
+    capsys.readouterr()
+
+    # إعادة الفتح لا تعيد تطبيق الترحيل ولا تغير المخطط
+    LibraryManager(db_path).close()
+    assert schema_state(db_path) == first
+    assert 'مكررة' not in capsys.readouterr().out
+
+
+def test_search_pages_follow_relevance_order(library):
+    library.add_books_bulk([{'title': f'Cooking {i}', 'author': 'Chef', 'tags': 'python'} for i in range(7)]
+                           + [{'title': f'Python {i}', 'author': 'Guido'} for i in range(7)])
+    filters = {'query': 'python'}
+    expected = library.search_books('python')
+
+    pages, after = [], None
+    while True:
+        page = library.get_books_page(after, 4, filters)
+        if not page:
+            break
+        pages.extend(page)
+        after = library.page_cursor(page[-1])
+
+    assert [book['id'] for book in pages] == [book['id'] for book in expected]
+    assert titles(pages[:7]) == [f'Python {i}' for i in range(7)]
+    assert library.count_books(filters) == len(pages) == 14
+
+
+def test_search_pages_combine_query_with_filters(library):
+    library.add_book('Python Basics', 'A', category='lang', personal_rating=2)
+    library.add_book('Python Pro', 'B', category='lang', personal_rating=5)
+    library.add_book('Python Web', 'C', category='web', personal_rating=5)
+    page = library.get_books_page(None, 10, {'query': 'pyth', 'category': 'lang', 'min_rating': 4})
+    assert titles(page) == ['Python Pro']
+
+
+@pytest.mark.parametrize('name, content', [
+    ('books.jsonl', '{"title": "Clean Code", "author": "Robert Martin", "tags": "craft"}\n'),
+    ('books.csv', 'title,author,personal_rating,tags\nClean Code,Robert Martin,,craft\n'),
+])
+def test_import_without_rating_keeps_stored_rating(library, tmp_path, name, content):
+    library.add_book('Clean Code', 'Robert Martin', personal_rating=5)
+    path = tmp_path / name
+    path.write_text(content, encoding='utf-8')
+
+    counts = library.import_library(str(path))
+    assert counts['updated'] == 1 and counts['invalid'] == 0
+    book = library.get_all_books()[0]
+    assert book['personal_rating'] == 5 and book['tags'] == 'craft'
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+from model_cache import ModelCache
+
+PARAMS = {'max_features': 1000, 'ngram_range': (1, 2)}
+
+
+@pytest.fixture
+def saved(tmp_path):
+    cache = ModelCache(str(tmp_path), 'a' * 64, PARAMS)
+    matrix = sparse.random(20, 5, density=0.4, random_state=0, format='csr')
+    cache.save({f'term{i}': i for i in range(5)}, np.arange(5, dtype=np.float64), matrix)
+    return cache, matrix
+
+
+def test_key_follows_source_and_config(tmp_path):
+    key = ModelCache(str(tmp_path), 'a' * 64, PARAMS).key
+    assert ModelCache(str(tmp_path), 'a' * 64, dict(PARAMS)).key == key
+    assert ModelCache(str(tmp_path), 'b' * 64, PARAMS).key != key
+    assert ModelCache(str(tmp_path), 'a' * 64, {**PARAMS, 'max_features': 2000}).key != key
+    assert ModelCache(str(tmp_path), 'a' * 64, {**PARAMS, 'ngram_range': (1, 1)}).key != key
+
+
+def test_round_trip_and_other_key_misses(saved, tmp_path):
+    cache, matrix = saved
+    loaded = cache.load()
+    assert loaded['vocabulary'] == {f'term{i}': i for i in range(5)}
+    assert abs(loaded['feature_matrix'] - matrix).max() == 0
+    assert ModelCache(str(tmp_path), 'b' * 64, PARAMS).load() is None
+
+
+def test_saving_new_key_prunes_old_models(saved, tmp_path):
+    cache, matrix = saved
+    other = ModelCache(str(tmp_path), 'b' * 64, PARAMS)
+    other.save({f'term{i}': i for i in range(5)}, np.arange(5, dtype=np.float64), matrix)
+    assert not os.path.exists(cache.directory)
+    assert other.load() is not None
+
+
+@pytest.mark.parametrize('damage', ['garbage', 'truncated', 'empty'])
+def test_corrupt_model_file_is_a_miss(saved, damage):
+    cache, _ = saved
+    with open(cache.model_path, 'rb') as f:
+        content = f.read()
+    content = {'garbage': b'not a pickle', 'truncated': content[:len(content) // 2], 'empty': b''}[damage]
+    with open(cache.model_path, 'wb') as f:
+        f.write(content)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert cache.load() is None
+
+
+def load_recommender(path):
+    from data_manager import DataManager
+    from recommender import BookRecommender
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return BookRecommender(DataManager(path))
+
+
+def test_recommender_rebuilds_after_corruption_or_source_change(catalog_csv):
+    first = load_recommender(catalog_csv)
+    expected = first.recommend_books('python web')
+    with open(first.model_cache.model_path, 'r+b') as f:
+        f.truncate(100)
+
+    rebuilt = load_recommender(catalog_csv)
+    assert rebuilt.recommend_books('python web') == expected
+    # إعادة البناء تحفظ نموذجاً سليماً من جديد
+    assert rebuilt.model_cache.load() is not None
+
+    pd.read_csv(catalog_csv).iloc[:150].to_csv(catalog_csv, index=False)
+    changed = load_recommender(catalog_csv)
+    assert changed.model_cache.key != first.model_cache.key
+    assert changed.feature_matrix.shape[0] == 150
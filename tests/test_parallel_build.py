@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from parallel_build import CSR_PARTS, load_csr, parallel_top_k, save_csr
+from similarity_engine import SimilarityEngine
+
+
+def tied_matrix(n_rows=500, n_columns=150, density=0.03):
+    matrix = sparse.random(n_rows, n_columns, density=density, format='csr', random_state=7)
+    # قيم مقربة لتوليد تعادلات كثيرة، وصفوف فارغة بلا أي تشابه
+    matrix.data = np.round(matrix.data * 4) / 4
+    keep = np.ones(n_rows)
+    keep[::50] = 0
+    matrix = sparse.diags(keep) @ matrix
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def test_csr_round_trip_through_mmap(tmp_path):
+    matrix = tied_matrix()
+    loaded = load_csr(save_csr(matrix, str(tmp_path), 'matrix'))
+    # مكونات المصفوفة عروض للقراءة فقط على الملفات المربوطة لا نسخ في الذاكرة
+    for part in CSR_PARTS:
+        array = getattr(loaded, part)
+        assert not array.flags.owndata and not array.flags.writeable
+    assert (loaded != matrix).nnz == 0
+
+
+@pytest.mark.parametrize('workers, shard_size', [(2, 64), (3, 150), (2, 4096)])
+@pytest.mark.parametrize('k', [1, 11, 500])
+def test_parallel_top_k_matches_serial(workers, shard_size, k):
+    matrix = tied_matrix()
+    expected_positions, expected_scores = SimilarityEngine(matrix, 64).top_k(np.arange(matrix.shape[0]), k)
+    positions, scores = parallel_top_k(matrix, k, workers=workers, shard_size=shard_size, block_size=64)
+
+    assert np.array_equal(positions, expected_positions)
+    assert np.array_equal(scores, expected_scores)
+
+
+def test_parallel_neighbor_index_matches_serial(recommender):
+    serial = recommender.build_neighbor_index(force=True, workers=1)
+    parallel = recommender.build_neighbor_index(force=True, workers=2)
+
+    assert len(parallel) == len(serial) and parallel.k == serial.k
+    for book_id in recommender._book_ids.tolist():
+        serial_ids, serial_scores = serial.lookup(book_id)
+        parallel_ids, parallel_scores = parallel.lookup(book_id)
+        assert np.array_equal(parallel_ids, serial_ids), book_id
+        assert np.array_equal(parallel_scores, serial_scores), book_id
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from position_index import PositionIndex
+
+
+def test_get_indexer_matches_pandas_through_edits():
+    rng = np.random.default_rng(0)
+    book_ids = rng.permutation(np.arange(1, 400) * 3)
+    index = PositionIndex(book_ids)
+    probes = np.arange(0, 1500)
+
+    for step in range(10):
+        if step % 2:
+            removed = rng.choice(len(book_ids), 25, replace=False)
+            book_ids = np.delete(book_ids, removed)
+            index.remove(removed)
+        else:
+            new_ids = np.arange(5000 + step * 10, 5010 + step * 10)
+            # معرف جديد بين المعرفات الموجودة أيضاً
+            new_ids[0] = 1 + 3 * step
+            index.add(new_ids, len(book_ids) + np.arange(len(new_ids)))
+            book_ids = np.concatenate([book_ids, new_ids])
+
+        expected = pd.Index(book_ids).get_indexer(np.concatenate([probes, book_ids]))
+        assert index.get_indexer(np.concatenate([probes, book_ids])).tolist() == expected.tolist()
+        assert len(index) == len(book_ids)
+
+
+def test_empty_index_and_list_input():
+    index = PositionIndex(np.empty(0, dtype=np.int32))
+    assert index.get_indexer([1, 2]).tolist() == [-1, -1]
+    index.add([7], [0])
+    assert index.get_indexer([7, 8]).tolist() == [0, -1]
+    index.remove([0])
+    assert index.get_indexer([7]).tolist() == [-1]
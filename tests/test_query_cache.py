@@ -0,0 +1,148 @@
+import pytest
+
+import query_cache
+from query_cache import QueryCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(query_cache.time, 'monotonic', fake)
+    return fake
+
+
+def test_evicts_least_recently_used():
+    cache = QueryCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # يصبح a الأحدث استخداماً
+    cache.put('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert len(cache) == 2
+    assert cache.stats['evictions'] == 1
+
+
+def test_put_existing_key_refreshes_recency():
+    cache = QueryCache(max_size=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.put('a', 10)
+    cache.put('c', 3)
+
+    assert cache.get('a') == 10
+    assert cache.get('b') is None
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = QueryCache(max_size=4, ttl=10)
+    cache.put('a', 1)
+    clock.now += 10
+    assert cache.get('a') == 1
+
+    clock.now += 0.5
+    assert cache.get('a') is None
+    assert cache.stats['expired'] == 1
+    assert len(cache) == 0
+
+
+def test_ttl_counts_from_last_put(clock):
+    cache = QueryCache(max_size=4, ttl=10)
+    cache.put('a', 1)
+    clock.now += 8
+    cache.put('a', 2)
+    clock.now += 8
+    assert cache.get('a') == 2
+
+
+def test_newer_version_invalidates_and_older_is_not_served():
+    cache = QueryCache(max_size=4)
+    cache.put('a', 1, version=1)
+    assert cache.get('a', version=1) == 1
+
+    assert cache.get('a', version=2) is None
+    assert cache.stats['invalidations'] == 1
+
+    # نتيجة حُسبت بنموذج أقدم لا تحفظ ولا تخدم
+    cache.put('a', 'stale', version=1)
+    assert cache.get('a', version=2) is None
+    assert cache.get('a', version=1) is None
+
+
+def test_report_hit_rate():
+    cache = QueryCache(max_size=4)
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('b')
+    report = cache.report()
+    assert report['hits'] == 1 and report['misses'] == 1
+    assert report['size'] == 1
+    assert report['hit_rate'] == 0.5
+
+
+QUERIES = [('', {}), ('python', {}), ('python', {'min_rating': 4.5}), ('learning', {'language': 'English'})]
+
+
+def assert_cached_results_are_fresh(recommender):
+    """كل استعلام من الذاكرة المؤقتة يطابق حساباً مباشراً بالنموذج الحالي"""
+    for query, filters in QUERIES:
+        expected = recommender._recommend_books(query, filters.get('category'), filters.get('language'),
+                                                None, filters.get('min_rating', 0.0), 10)
+        assert recommender.recommend_books(query, **filters) == expected, (query, filters)
+
+
+def warm(recommender):
+    for query, filters in QUERIES:
+        recommender.recommend_books(query, **filters)
+    hits = recommender.query_cache.stats['hits']
+    for query, filters in QUERIES:
+        recommender.recommend_books(query, **filters)
+    assert recommender.query_cache.stats['hits'] == hits + len(QUERIES)
+
+
+def test_recommend_books_invalidated_by_add(recommender):
+    warm(recommender)
+    version = recommender.model_version
+    added = recommender.add_books([{
+        'title': 'Python Mastery Handbook', 'author': 'A. Writer', 'category': 'Programming',
+        'language': 'English', 'rating': 5.0, 'year': 2024, 'pages': 420,
+        'description': 'python programming', 'tags': 'python'
+    }])
+
+    assert recommender.model_version > version
+    assert added[0] in [book['id'] for book in recommender.recommend_books('')]
+    assert_cached_results_are_fresh(recommender)
+
+
+def test_recommend_books_invalidated_by_update(recommender):
+    warm(recommender)
+    top = recommender.recommend_books('')[0]['id']
+    recommender.update_books([{'book_id': top, 'rating': 1.0}])
+
+    assert top not in [book['id'] for book in recommender.recommend_books('')]
+    assert_cached_results_are_fresh(recommender)
+
+
+def test_recommend_books_invalidated_by_remove(recommender):
+    warm(recommender)
+    removed = [book['id'] for book in recommender.recommend_books('python')[:3]]
+    recommender.remove_books(removed)
+
+    assert not set(removed) & {book['id'] for book in recommender.recommend_books('python')}
+    assert_cached_results_are_fresh(recommender)
+
+
+def test_recommend_books_returns_copies(recommender):
+    first = recommender.recommend_books('python')
+    first[0]['title'] = 'changed'
+    assert recommender.recommend_books('python')[0]['title'] != 'changed'
@@ -0,0 +1,227 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from book_text import weighted_text
+from similarity_engine import SimilarityEngine
+
+
+def assert_neighbors_match_full_scan(recommender):
+    """فهرس الجيران المرقع يطابق حساباً كاملاً (مع السماح بترتيب مختلف للجيران المتعادلين)"""
+    index = recommender.neighbor_index
+    n_rows = len(recommender.df)
+    positions, scores = recommender.similarity_engine.top_k(np.arange(n_rows), index.k + 1)
+    book_ids = recommender._book_ids
+
+    assert len(index) == n_rows
+    for row, book_id in enumerate(book_ids.tolist()):
+        neighbor_ids, neighbor_scores = index.lookup(book_id)
+        neighbor_ids, neighbor_scores = np.asarray(neighbor_ids), np.asarray(neighbor_scores)
+        # الكتاب نفسه ليس أول النتائج دائماً إذا كان له نسخة مطابقة تماماً (تعادل بفرق التقريب)
+        others = positions[row] != row
+        if others.all():
+            others[-1] = False
+        expected_positions, expected_scores = positions[row][others], scores[row][others]
+        assert np.allclose(neighbor_scores, expected_scores, atol=1e-6), book_id
+
+        # الجيران فوق درجة الحد لا تعادل فيها فيجب أن تتطابق مجموعاتهم
+        strict = expected_scores > expected_scores[-1] + 1e-6
+        expected = set(book_ids[expected_positions[strict]].tolist())
+        assert set(neighbor_ids[neighbor_scores > expected_scores[-1] + 1e-6].tolist()) == expected, book_id
+
+
+def new_records(dataset_path, n=12):
+    rows = pd.read_csv(dataset_path).sample(n, random_state=1).drop(columns=['book_id'])
+    rows['title'] = rows['title'] + ' Second Edition'
+    return rows.to_dict('records')
+
+
+def test_add_books_patches_neighbor_index(recommender, dataset_path):
+    added = recommender.add_books(new_records(dataset_path))
+    assert len(added) == 12
+    assert set(added) <= set(recommender._book_ids.tolist())
+    assert_neighbors_match_full_scan(recommender)
+
+
+def test_update_books_patches_neighbor_index(recommender):
+    recommender.update_books([
+        {'book_id': 5, 'title': 'Quantum Rust Cookbook', 'tags': 'rust,quantum,beginner'},
+        {'book_id': 40, 'description': 'a book about gardening and cooking'}
+    ])
+    assert_neighbors_match_full_scan(recommender)
+    titles = [book['title'] for book in recommender.recommend_books('Quantum Rust Cookbook')]
+    assert 'Quantum Rust Cookbook' not in titles
+
+
+def test_remove_books_patches_neighbor_index(recommender):
+    removed_ids = [3, 10, 77, 150, 299]
+    assert recommender.remove_books(removed_ids + [10**6]) == 5
+    assert_neighbors_match_full_scan(recommender)
+    for book_id in recommender._book_ids[:50].tolist():
+        neighbors = [book['id'] for book in recommender.get_similar_books(book_id, 10)]
+        assert not set(neighbors) & set(removed_ids)
+
+
+def assert_ranking_arrays_match_catalog(recommender):
+    """أعمدة الترتيب المرقعة تطابق تجهيزها من الجدول (الرموز قد تختلف في ترقيمها لا في تقسيمها)"""
+    df = recommender.df
+    assert np.array_equal(recommender._book_ids, df['book_id'].to_numpy())
+    assert np.array_equal(recommender._ratings, np.round(df['rating'].to_numpy(dtype=np.float64), 6))
+    assert recommender._lower_titles.tolist() == df['title'].str.lower().tolist()
+    assert recommender._lower_titles.index.equals(pd.RangeIndex(len(df)))
+    assert np.array_equal(pd.factorize(recommender._title_codes)[0], pd.factorize(df['title'])[0])
+    for field, codes in recommender._filter_codes.items():
+        values = np.array(recommender._filter_uniques[field], dtype=object)[codes]
+        assert values.tolist() == df[field].astype(str).tolist(), field
+    positions = recommender._book_id_index.get_indexer(df['book_id'])
+    assert np.array_equal(positions, np.arange(len(df)))
+
+
+def assert_engine_matches_rebuild(recommender):
+    rows = np.arange(len(recommender.df))
+    expected = SimilarityEngine(recommender.feature_matrix).top_k(rows, 20)
+    actual = recommender.similarity_engine.top_k(rows, 20)
+    assert np.array_equal(actual[0], expected[0])
+    assert np.array_equal(actual[1], expected[1])
+
+
+def test_catalog_changes_patch_engine_and_ranking_arrays_in_place(recommender, dataset_path):
+    engine = recommender.similarity_engine
+    transpose = engine.feature_matrix_t
+    # قناع القيمة محسوب قبل ظهور الفئة الجديدة
+    assert not recommender._filter_mask(np.arange(5), 'Zymurgy', None, None, 0.0).any()
+
+    added = recommender.add_books(new_records(dataset_path, 6))
+    assert_ranking_arrays_match_catalog(recommender)
+    assert_engine_matches_rebuild(recommender)
+
+    existing_title = recommender.df['title'].iloc[0]
+    recommender.update_books([
+        {'book_id': 5, 'category': 'Zymurgy', 'rating': 1.5},
+        {'book_id': added[0], 'title': existing_title},
+    ])
+    assert_ranking_arrays_match_catalog(recommender)
+    assert_engine_matches_rebuild(recommender)
+    position = recommender._book_id_index.get_indexer([5])
+    assert recommender._filter_mask(position, 'Zymurgy', None, None, 0.0).all()
+
+    recommender.remove_books([3, 10, added[1], 150])
+    assert_ranking_arrays_match_catalog(recommender)
+    assert_engine_matches_rebuild(recommender)
+    assert_neighbors_match_full_scan(recommender)
+
+    # ترقيع في المكان: لا محرك جديد ولا إعادة حساب للمنقول
+    assert recommender.similarity_engine is engine
+    assert engine.feature_matrix_t is transpose
+
+
+def test_drift_baseline_sampled_before_new_rows(recommender, dataset_path):
+    df = recommender.df
+    sample = df.sample(min(500, len(df)), random_state=0)
+    terms, oov = recommender._oov_counts(weighted_text(sample))
+
+    recommender.add_books(new_records(dataset_path, 5))
+    assert recommender._drift['baseline'] == oov / terms
+    assert recommender._drift['rows'] == 5
+
+
+def test_catalog_changes_splice_ann_index(recommender, dataset_path, monkeypatch):
+    from ann_index import AnnIndex
+    from config import ANN_CONFIG
+
+    monkeypatch.setitem(ANN_CONFIG, 'backend', 'ann')
+    monkeypatch.setitem(ANN_CONFIG, 'n_components', 32)
+    monkeypatch.setitem(ANN_CONFIG, 'n_subvectors', 8)
+    recommender.build_ann_index(force=True)
+    encode_calls = []
+    monkeypatch.setattr(AnnIndex, 'encode', lambda index, matrix: encode_calls.append(matrix) or None)
+
+    recommender.remove_books([3, 10, 77])
+    recommender.add_books(new_records(dataset_path, 5))
+    recommender.update_books([{'book_id': 5, 'title': 'Quantum Rust Cookbook'}])
+
+    # لا إعادة ترميز للكتالوج كاملاً، والنتيجة مطابقة لها
+    assert encode_calls == []
+    monkeypatch.undo()
+    index = recommender.ann_index
+    expected = index.encode(recommender.feature_matrix)
+    for name in AnnIndex.DATA_FILES:
+        assert np.array_equal(getattr(index, name), getattr(expected, name)), name
+    assert recommender.get_similar_books(5, 3)
+
+
+def test_queries_during_catalog_changes(recommender, dataset_path):
+    """استعلامات متزامنة مع الإضافة والحذف لا ترى حالة نصف محدثة"""
+    errors = []
+    stop = threading.Event()
+
+    def query_loop():
+        queries = ['python', 'data', 'learning', 'rust', 'design patterns']
+        i = 0
+        while not stop.is_set():
+            try:
+                recommender.query_cache.clear()
+                recommender.recommend_books(queries[i % len(queries)])
+                recommender.get_similar_books(int(recommender._book_ids[i % 100]), 5)
+            except Exception as e:
+                errors.append(e)
+                return
+            i += 1
+
+    threads = [threading.Thread(target=query_loop) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    try:
+        records = new_records(dataset_path, 30)
+        for start in range(0, 30, 5):
+            added = recommender.add_books(records[start:start + 5])
+            recommender.update_books([{'book_id': added[0], 'title': f'Edited Title {start}'}])
+            recommender.remove_books(added[1:3])
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert not errors
+    assert_neighbors_match_full_scan(recommender)
+
+
+BATCH_QUERIES = ['python', '', 'Machine Learning', 'deep learning', 'qwxzv', 'Clean Code', 'data', 'PYTHON', '   ']
+
+
+def assert_batches_match_single_calls(recommender):
+    for filters in ({}, {'min_rating': 4.5}, {'category': 'AI/ML', 'difficulty': 'متوسط'}):
+        batch = list(recommender.recommend_books_batch(BATCH_QUERIES, filters, max_results=7, block_size=4))
+        assert [query for query, _ in batch] == BATCH_QUERIES
+        for query, results in batch:
+            assert results == recommender.recommend_books(query, **filters, max_results=7), (query, filters)
+
+    book_ids = recommender._book_ids[::7].tolist() + [10**6] + recommender._book_ids[:3].tolist()
+    batch = list(recommender.get_similar_books_batch(book_ids, k=6, block_size=5))
+    assert [book_id for book_id, _ in batch] == book_ids
+    for book_id, results in batch:
+        assert results == recommender.get_similar_books(book_id, 6), book_id
+
+
+def test_batch_apis_match_single_calls(recommender):
+    # فهرس الجيران المحفوظ يُبنى تلقائياً مع النموذج
+    assert recommender.neighbor_index is not None
+    assert_batches_match_single_calls(recommender)
+
+
+def test_batch_apis_match_single_calls_without_neighbor_index(recommender):
+    # بلا فهرس الجيران تحسب الدفعة كلها من المحرك مباشرة
+    recommender.neighbor_index = None
+    assert_batches_match_single_calls(recommender)
+
+
+def test_batch_apis_are_lazy(recommender):
+    def queries():
+        yield 'python'
+        yield 'data'
+        raise AssertionError('الدفعة الثانية لا تقرأ قبل طلبها')
+
+    batch = recommender.recommend_books_batch(queries(), block_size=2)
+    assert [query for query, _ in (next(batch), next(batch))] == ['python', 'data']
+    assert recommender.get_similar_books_batch([10**6]).__next__() == (10**6, [])
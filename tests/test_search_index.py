@@ -0,0 +1,82 @@
+import contextlib
+import io
+import random
+import re
+
+import numpy as np
+import pytest
+
+from data_manager import DataManager
+from search_index import SearchIndex
+
+FIELDS = ['title', 'author', 'category', 'description', 'tags']
+
+
+@pytest.fixture
+def data_manager(catalog_csv):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DataManager(catalog_csv)
+
+
+def substring_queries(df, n=150, seed=0):
+    """أجزاء عشوائية من نصوص الحقول، تبدأ وتنتهي في منتصف الكلمات أحياناً"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        text = str(df[rng.choice(FIELDS)].iloc[rng.randrange(len(df))])
+        start = rng.randrange(len(text))
+        queries.append(text[start:start + rng.randint(1, 15)])
+    return queries + ['python', 'PYTHON web', 'learn', 'zzzz', 'a b', ' ', 'غير موجود']
+
+
+def assert_matches_full_scan(data_manager, queries):
+    for query in queries:
+        expected = data_manager._scan_books(query).index.tolist()
+        assert data_manager.search_books(query).index.tolist() == expected, query
+
+
+def assert_same_postings(index, fresh):
+    assert index.size == fresh.size
+    for field in index.fields:
+        assert index.vocabulary[field] == fresh.vocabulary[field], field
+        assert all(np.array_equal(index.postings[field][t], fresh.postings[field][t]) for t in fresh.postings[field])
+
+
+def test_candidates_filtered_match_full_scan(data_manager):
+    assert_matches_full_scan(data_manager, substring_queries(data_manager.df))
+
+
+def test_regex_queries_fall_back_to_full_scan(data_manager):
+    index = data_manager.search_index
+    for query in ['py.hon', '^python', 'java|rust', 'c(++)?', 'node.js', '[pP]ython']:
+        assert index.candidates(query) is None
+    assert_matches_full_scan(data_manager, ['py.hon', '^python', 'java|rust', 'node.js', '[pP]ython', 'c#'])
+
+    # نمط غير صالح يفشل كما في المسح الكامل (re.error، أو ValueError من محرك Arrow للأعمدة النصية)
+    for query in ['c++', '(python']:
+        with pytest.raises((re.error, ValueError)):
+            data_manager._scan_books(query)
+        with pytest.raises((re.error, ValueError)):
+            data_manager.search_books(query)
+
+
+def test_incremental_changes_match_fresh_index(data_manager):
+    df = data_manager.df
+    data_manager.add_books([
+        {'title': 'Quantum Rust Cookbook', 'author': 'New Author', 'category': 'Systems',
+         'description': 'hands-on quantum recipes', 'tags': 'rust,quantum', 'rating': 4.2,
+         'pages': 250, 'year': 2024, 'language': 'Rust'},
+        {'title': 'Gardening for Programmers', 'author': 'Green Thumb', 'category': 'Hobby',
+         'description': 'soil and seeds', 'tags': 'garden', 'rating': 3.9,
+         'pages': 150, 'year': 2023, 'language': 'English'},
+    ])
+    data_manager.update_books([
+        {'book_id': int(df['book_id'].iloc[5]), 'title': 'Renamed Zebra Handbook', 'tags': 'zebra'},
+        {'book_id': int(df['book_id'].iloc[40]), 'description': 'entirely new words about compilers'},
+    ])
+    data_manager.remove_books(data_manager.df['book_id'].iloc[[0, 7, 120]].tolist())
+
+    assert_same_postings(data_manager.search_index, SearchIndex(data_manager.df))
+    assert_matches_full_scan(data_manager, substring_queries(data_manager.df, seed=1) +
+                             ['quantum', 'zebra', 'garden', 'compil', 'rust'])
+    assert data_manager.search_books('zebra')['title'].tolist() == ['Renamed Zebra Handbook']
@@ -0,0 +1,126 @@
+import threading
+
+import pytest
+
+from search_scheduler import SearchScheduler
+
+TIMEOUT = 5
+
+
+class Recorder:
+    """يجمع الاستدعاءات من خيط العمل ويتيح انتظارها"""
+
+    def __init__(self):
+        self.calls = []
+        self._condition = threading.Condition()
+
+    def __call__(self, *args):
+        with self._condition:
+            self.calls.append(args)
+            self._condition.notify_all()
+
+    def wait_for(self, count: int):
+        with self._condition:
+            assert self._condition.wait_for(lambda: len(self.calls) >= count, TIMEOUT)
+        return self.calls
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(search_fn, on_result, on_error=None, debounce_ms=50):
+        scheduler = SearchScheduler(search_fn, on_result, on_error, debounce_ms)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.close()
+        scheduler._worker.join(TIMEOUT)
+
+
+def test_debounce_runs_only_the_last_request(make_scheduler):
+    searched = Recorder()
+    results = Recorder()
+
+    def search(params):
+        searched(params)
+        return params.upper()
+
+    scheduler = make_scheduler(search, results)
+    for text in ('p', 'py', 'pyt', 'pyth'):
+        generation = scheduler.submit(text)
+
+    assert results.wait_for(1) == [(generation, 'pyth', 'PYTH')]
+    assert searched.calls == [('pyth',)]
+    assert scheduler.stats['submitted'] == 4
+    assert scheduler.stats['coalesced'] == 3
+    assert scheduler.stats['executed'] == 1
+
+
+def test_result_superseded_during_search_is_dropped(make_scheduler):
+    started = threading.Event()
+    release = threading.Event()
+    results = Recorder()
+
+    def search(params):
+        if params == 'slow':
+            started.set()
+            assert release.wait(TIMEOUT)
+        return params
+
+    scheduler = make_scheduler(search, results)
+    stale = scheduler.submit('slow', delay_ms=0)
+    assert started.wait(TIMEOUT)
+    current = scheduler.submit('fast', delay_ms=0)
+    assert not scheduler.is_current(stale)
+    release.set()
+
+    assert results.wait_for(1) == [(current, 'fast', 'fast')]
+    assert scheduler.stats['discarded'] == 1
+    assert scheduler.stats['executed'] == 2
+
+
+def test_errors_reported_only_for_current_generation(make_scheduler):
+    started = threading.Event()
+    release = threading.Event()
+    results, errors = Recorder(), Recorder()
+
+    def search(params):
+        if params == 'stale':
+            started.set()
+            assert release.wait(TIMEOUT)
+        raise ValueError(params)
+
+    scheduler = make_scheduler(search, results, errors)
+    scheduler.submit('stale', delay_ms=0)
+    assert started.wait(TIMEOUT)
+    current = scheduler.submit('current', delay_ms=0)
+    release.set()
+
+    generation, params, error = errors.wait_for(1)[0]
+    assert (generation, params, str(error)) == (current, 'current', 'current')
+    assert len(errors.calls) == 1 and not results.calls
+
+
+def test_cancel_drops_pending_request(make_scheduler):
+    results = Recorder()
+    scheduler = make_scheduler(lambda params: params, results, debounce_ms=100)
+    cancelled = scheduler.submit('cancelled')
+    scheduler.cancel()
+    assert not scheduler.is_current(cancelled)
+
+    # الطلب التالي ينفذ وحده: الملغى لم يصل إلى البحث
+    current = scheduler.submit('next', delay_ms=0)
+    assert results.wait_for(1) == [(current, 'next', 'next')]
+    assert scheduler.stats['executed'] == 1
+
+
+def test_close_stops_worker(make_scheduler):
+    scheduler = make_scheduler(lambda params: params, Recorder(), debounce_ms=10000)
+    scheduler.submit('never')
+    scheduler.close()
+    scheduler._worker.join(TIMEOUT)
+    assert not scheduler._worker.is_alive()
+    assert scheduler.stats['executed'] == 0
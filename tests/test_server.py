@@ -0,0 +1,150 @@
+import asyncio
+import contextlib
+import io
+import json
+import shutil
+from urllib.parse import quote
+
+import pytest
+
+from server import RecommendationServer, RecommendationService, dumps
+
+
+@pytest.fixture(scope='module')
+def service(tmp_path_factory, dataset_path):
+    path = tmp_path_factory.mktemp('server') / 'books.csv'
+    shutil.copyfile(dataset_path, path)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return RecommendationService(str(path))
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ')[1])
+    headers = dict(line.lower().split(': ', 1) for line in lines[1:] if line)
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, headers, json.loads(body)
+
+
+def raw_request(target, method='GET', body=None, close=False):
+    lines = [f"{method} {target} HTTP/1.1", "Host: test"]
+    payload = b''
+    if body is not None:
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        lines += ["Content-Type: application/json", f"Content-Length: {len(payload)}"]
+    if close:
+        lines.append("Connection: close")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+
+def exchange(service, requests):
+    """إرسال عدة طلبات على اتصال واحد بمقبس حقيقي وإرجاع (الحالة، الترويسات، JSON) لكل منها"""
+    async def run():
+        server = RecommendationServer(service, threads=2)
+        listener = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            responses = []
+            for request in requests:
+                writer.write(request)
+                await writer.drain()
+                responses.append(await read_response(reader))
+            # بعد Connection: close يغلق الخادم الاتصال
+            closed = await asyncio.wait_for(reader.read(), 5) == b'' if responses[-1][1]['connection'] == 'close' else None
+            writer.close()
+            return responses, closed, server.stats
+        finally:
+            listener.close()
+            await listener.wait_closed()
+            server.executor.shutdown(wait=True)
+
+    return asyncio.run(run())
+
+
+def get(service, target, method='GET', body=None):
+    (response,), _, _ = exchange(service, [raw_request(target, method, body)])
+    return response[0], response[2]
+
+
+def as_json(value):
+    return json.loads(dumps(value))
+
+
+def test_recommend_matches_recommender(service):
+    status, payload = get(service, '/recommend?q=python&limit=3&min_rating=4.5')
+    assert status == 200
+    assert payload['results'] == as_json(service.recommender.recommend_books('python', min_rating=4.5, max_results=3))
+    assert len(payload['results']) == 3
+
+
+def test_recommend_filters_from_query_string_and_json(service):
+    status, payload = get(service, '/recommend?q=learning&category=' + quote('AI/ML'))
+    assert status == 200 and payload['results']
+    assert {book['category'] for book in payload['results']} == {'AI/ML'}
+
+    status, payload = get(service, '/recommend', 'POST', {'q': 'learning', 'category': 'AI/ML', 'language': ''})
+    assert status == 200 and {book['category'] for book in payload['results']} == {'AI/ML'}
+
+
+@pytest.mark.parametrize('body', [
+    {'q': 'python', 'category': 5},
+    {'q': 'python', 'language': ['English']},
+    {'q': 'python', 'difficulty': {'level': 1}},
+    {'q': 'python', 'min_rating': 'high'},
+    {'q': 'python', 'limit': 'many'},
+])
+def test_recommend_rejects_invalid_parameters(service, body):
+    status, payload = get(service, '/recommend', 'POST', body)
+    assert status == 400
+    assert 'error' in payload
+
+
+@pytest.mark.parametrize('path', ['/search', '/recommend'])
+@pytest.mark.parametrize('query', ['c++', '(python', '*'])
+def test_invalid_pattern_is_client_error(service, path, query):
+    status, payload = get(service, f'{path}?q={quote(query)}')
+    assert status == 400
+    assert 'q' in payload['error']
+
+
+def test_search(service):
+    status, payload = get(service, '/search?q=' + quote('C#') + '&limit=2')
+    assert status == 200
+    assert payload['total'] == len(service.data_manager.search_books('C#'))
+    assert len(payload['results']) == 2
+
+    assert get(service, '/search?q=qwxzv') == (200, {'total': 0, 'results': []})
+    assert get(service, '/search')[0] == 400
+
+
+def test_similar(service):
+    book_id = int(service.data_manager.df['book_id'].iloc[0])
+    status, payload = get(service, f'/similar?book_id={book_id}&k=3')
+    assert status == 200
+    assert payload['results'] == as_json(service.recommender.get_similar_books(book_id, 3))
+
+    assert get(service, '/similar?book_id=999999')[0] == 404
+    assert get(service, '/similar?book_id=abc')[0] == 400
+    assert get(service, '/similar')[0] == 400
+
+
+def test_other_routes_and_errors(service):
+    assert get(service, '/health') == (200, {'status': 'ok'})
+    assert len(get(service, '/top_rated?limit=4')[1]['results']) == 4
+    assert get(service, '/stats')[1]['catalog']['total_books'] == len(service.data_manager.df)
+    assert get(service, '/missing')[0] == 404
+    assert get(service, '/health', 'PUT')[0] == 405
+    assert get(service, '/recommend', 'POST', b'{not json')[0] == 400
+    assert get(service, '/recommend', 'POST', [1, 2])[0] == 400
+
+
+def test_keep_alive_and_close(service):
+    requests = [raw_request('/health'), raw_request('/search?q=c%2B%2B'), raw_request('/health', close=True)]
+    responses, closed, stats = exchange(service, requests)
+
+    assert [status for status, _, _ in responses] == [200, 400, 200]
+    assert [headers['connection'] for _, headers, _ in responses] == ['keep-alive', 'keep-alive', 'close']
+    assert closed
+    assert stats == {'requests': 3, 'errors': 1}
@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from similarity_engine import SimilarityEngine, append_rows, drop_self, replace_rows, sparse_top_k, top_k_indices
+
+
+def dense_top_k(matrix, k):
+    scores = (matrix @ matrix.T).toarray()
+    return [(top_k_indices(row, k), row) for row in scores]
+
+
+@pytest.mark.parametrize('density', [0.002, 0.02, 0.2])
+@pytest.mark.parametrize('k', [1, 7, 60, 300])
+def test_top_k_matches_dense_ranking(density, k):
+    matrix = sparse.random(300, 120, density=density, format='csr', random_state=3)
+    # قيم مقربة لتوليد تعادلات كثيرة
+    matrix.data = np.round(matrix.data * 4) / 4
+    matrix.eliminate_zeros()
+
+    ids, scores = SimilarityEngine(matrix, block_size=32).top_k(np.arange(300), k)
+    for row, (expected, dense) in enumerate(dense_top_k(matrix, k)):
+        assert ids[row].tolist() == expected.tolist()
+        assert np.allclose(scores[row], dense[expected])
+
+
+def test_sparse_top_k_pads_with_lowest_zero_positions():
+    columns = np.array([1, 4, 6])
+    values = np.array([0.5, 0.0, 0.9])
+    ids, scores = sparse_top_k(columns, values, 5)
+    assert ids.tolist() == [6, 1, 0, 2, 3]
+    assert scores.tolist() == [0.9, 0.5, 0.0, 0.0, 0.0]
+
+
+def test_similarity_rows_stays_sparse():
+    matrix = sparse.random(50, 20, density=0.1, format='csr', random_state=0)
+    assert sparse.issparse(SimilarityEngine(matrix).similarity_rows([0, 1]))
+
+
+def test_drop_self_handles_duplicates_ranked_first():
+    rows = np.array([0, 1, 2])
+    positions = np.array([[0, 3, 4], [3, 1, 4], [3, 4, 5]])
+    scores = np.array([[1.0, 0.5, 0.2], [1.0, 1.0, 0.3], [0.9, 0.8, 0.7]])
+    kept_positions, kept_scores = drop_self(rows, positions, scores)
+    assert kept_positions.tolist() == [[3, 4], [3, 4], [3, 4]]
+    assert kept_scores.tolist() == [[0.5, 0.2], [1.0, 0.3], [0.9, 0.8]]
+
+
+def random_rows(n_rows, seed, n_columns=120):
+    matrix = sparse.random(n_rows, n_columns, density=0.05, format='csr', random_state=seed)
+    matrix.data = np.round(matrix.data * 4) / 4
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def test_replace_and_append_rows_match_scipy():
+    matrix = random_rows(50, 1)
+    rows = random_rows(3, 2)
+
+    replaced = replace_rows(matrix, [40, 0, 7], rows)
+    expected = matrix.tolil()
+    expected[[40, 0, 7]] = rows.toarray()
+    assert (replaced != expected.tocsr()).nnz == 0
+    assert replace_rows(matrix, [49], rows[:1]).shape == matrix.shape
+
+    keep = np.ones(50, dtype=bool)
+    keep[[0, 7, 7, 49]] = False
+    assert (replace_rows(matrix, [7, 0, 49, 7]) != matrix[keep]).nnz == 0
+
+    appended = append_rows(matrix, rows)
+    assert (appended != sparse.vstack([matrix, rows]).tocsr()).nnz == 0
+
+
+@pytest.mark.parametrize('max_pending', [1, 8, 10_000])
+def test_update_matches_fresh_engine(monkeypatch, max_pending):
+    monkeypatch.setattr(SimilarityEngine, 'MAX_PENDING_ROWS', max_pending)
+    rng = np.random.default_rng(4)
+    matrix = random_rows(200, 3)
+    engine = SimilarityEngine(matrix, block_size=32)
+
+    for step in range(12):
+        operation = step % 3
+        n_rows = matrix.shape[0]
+        if operation == 0:
+            new_rows = random_rows(int(rng.integers(1, 6)), 10 + step)
+            matrix = append_rows(matrix, new_rows)
+            engine.update(matrix, changed=np.arange(n_rows, matrix.shape[0]))
+        elif operation == 1:
+            positions = rng.choice(n_rows, 4, replace=False)
+            matrix = replace_rows(matrix, positions, random_rows(4, 30 + step))
+            engine.update(matrix, changed=positions)
+        else:
+            positions = rng.choice(n_rows, 3, replace=False)
+            matrix = replace_rows(matrix, positions)
+            engine.update(matrix, removed=positions)
+
+        assert engine.pending_rows <= max_pending
+        rows = np.arange(matrix.shape[0])
+        expected_ids, expected_scores = SimilarityEngine(matrix, block_size=32).top_k(rows, 15)
+        ids, scores = engine.top_k(rows, 15)
+        assert np.array_equal(ids, expected_ids), step
+        assert np.array_equal(scores, expected_scores), step
+
+
+def test_update_without_listing_new_rows_rebuilds_transpose():
+    matrix = random_rows(30, 5)
+    engine = SimilarityEngine(matrix)
+    matrix = append_rows(matrix, random_rows(2, 6))
+    engine.update(matrix)
+    assert engine.pending_rows == 0
+    assert engine.feature_matrix_t.shape == (120, 32)
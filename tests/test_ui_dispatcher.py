@@ -0,0 +1,160 @@
+import threading
+
+import pytest
+
+from search_scheduler import SearchScheduler
+from ui_dispatcher import UiDispatcher
+
+
+class FakeRoot:
+    """بديل للنافذة: after يحفظ الاستدعاء والاختبار ينفذه بدل حلقة Tk"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay_ms, callback):
+        self.scheduled.append((delay_ms, callback))
+
+    def tick(self):
+        """تنفيذ الاستدعاءات المجدولة حالياً مرة واحدة (دورة واحدة للحلقة الرئيسية)"""
+        scheduled, self.scheduled = self.scheduled, []
+        for _, callback in scheduled:
+            callback()
+
+
+@pytest.fixture
+def root():
+    return FakeRoot()
+
+
+def test_drain_is_rescheduled_on_interval(root):
+    UiDispatcher(root, interval_ms=20)
+    assert [delay for delay, _ in root.scheduled] == [20]
+    root.tick()
+    assert [delay for delay, _ in root.scheduled] == [20]
+
+
+def test_coalesced_kind_keeps_last_message_per_drain(root):
+    dispatcher = UiDispatcher(root)
+    loading, results = [], []
+    dispatcher.register('loading', loading.append, coalesce=True)
+    dispatcher.register('results', results.append)
+
+    for message in (('loading', True), ('results', 1), ('loading', False), ('results', 2), ('loading', True)):
+        dispatcher.post(*message)
+    root.tick()
+
+    assert loading == [True]
+    assert results == [1, 2]
+    report = dispatcher.report()
+    assert report['posted'] == 5 and report['handled'] == 3 and report['coalesced'] == 2
+    assert report['drains'] == 1 and report['depth'] == 0
+    assert report['handlers']['loading']['calls'] == 1
+
+    # الدمج داخل الدفعة الواحدة فقط: رسالة في الدفعة التالية تعالج وحدها
+    dispatcher.post('loading', False)
+    root.tick()
+    assert loading == [True, False]
+
+
+def test_drain_handles_at_most_max_batch(root):
+    dispatcher = UiDispatcher(root, max_batch=4)
+    handled = []
+    dispatcher.register('item', handled.append)
+    for i in range(10):
+        dispatcher.post('item', i)
+
+    root.tick()
+    assert handled == [0, 1, 2, 3]
+    assert dispatcher.report()['max_depth'] == 10
+    root.tick()
+    root.tick()
+    assert handled == list(range(10))
+
+
+def test_handler_error_does_not_stop_batch(root, capsys):
+    dispatcher = UiDispatcher(root)
+    handled = []
+
+    def fail(payload):
+        raise RuntimeError('boom')
+
+    dispatcher.register('fail', fail)
+    dispatcher.register('ok', handled.append)
+    dispatcher.post('fail')
+    dispatcher.post('ok', 1)
+    root.tick()
+
+    assert handled == [1]
+    assert 'boom' in capsys.readouterr().out
+    assert dispatcher.report()['handled'] == 2
+
+
+def test_handler_may_post_during_drain(root):
+    dispatcher = UiDispatcher(root)
+    handled = []
+    dispatcher.register('second', handled.append)
+    dispatcher.register('first', lambda payload: dispatcher.post('second', payload + 1))
+    dispatcher.post('first', 1)
+
+    root.tick()
+    root.tick()
+    assert handled == [2]
+
+
+def test_unregistered_kind_and_close(root):
+    dispatcher = UiDispatcher(root)
+    with pytest.raises(KeyError):
+        dispatcher.post('missing')
+
+    dispatcher.close()
+    root.tick()
+    assert root.scheduled == []
+
+
+def test_posts_from_worker_threads_are_all_counted(root):
+    dispatcher = UiDispatcher(root, max_batch=10**6)
+    received = []
+    dispatcher.register('item', received.append)
+    threads, per_thread = 8, 2000
+
+    def worker(offset):
+        for i in range(per_thread):
+            dispatcher.post('item', offset + i)
+
+    workers = [threading.Thread(target=worker, args=(n * per_thread,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    # تصريف متزامن مع الإرسال كما في الحلقة الرئيسية
+    while any(thread.is_alive() for thread in workers):
+        root.tick()
+    for thread in workers:
+        thread.join()
+    root.tick()
+
+    assert sorted(received) == list(range(threads * per_thread))
+    report = dispatcher.report()
+    assert report['posted'] == report['handled'] == threads * per_thread
+
+
+def test_scheduler_results_reach_handler_through_dispatcher(root):
+    dispatcher = UiDispatcher(root)
+    shown = []
+    dispatcher.register('search_results', shown.append)
+    arrived = threading.Event()
+
+    def on_result(generation, params, result):
+        dispatcher.post('search_results', (generation, result))
+        arrived.set()
+
+    scheduler = SearchScheduler(str.upper, on_result, debounce_ms=20)
+    try:
+        for text in ('d', 'da', 'data'):
+            generation = scheduler.submit(text)
+        assert arrived.wait(5)
+        # لا شيء يصل إلى المعالج قبل دورة الحلقة الرئيسية
+        assert shown == []
+        root.tick()
+        assert shown == [(generation, 'DATA')]
+    finally:
+        scheduler.close()
@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, NamedTuple
+
+
+class UiMessage(NamedTuple):
+    """رسالة غير قابلة للتعديل من خيط عمل إلى الواجهة"""
+    kind: str
+    payload: Any
+    posted_at: float
+
+
+class UiDispatcher:
+    """قناة آمنة لتحديث الواجهة: الخيوط ترسل رسائل والحلقة الرئيسية تعالجها على دفعات"""
+
+    def __init__(self, root, interval_ms: int = 16, max_batch: int = 50):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.max_batch = max_batch
+        self._queue: 'queue.SimpleQueue[UiMessage]' = queue.SimpleQueue()
+        self._handlers: Dict[str, Callable] = {}
+        self._coalesce = set()
+        self._closed = False
+
+        # قياسات الأداء: عمق الطابور وزمن الانتظار وزمن كل معالج
+        # (خيوط العمل تزيد عداد الإرسال، فكل تعديل أو قراءة للقياسات يتم تحت القفل)
+        self._stats_lock = threading.Lock()
+        self.stats = {'posted': 0, 'handled': 0, 'coalesced': 0, 'drains': 0,
+                      'max_depth': 0, 'max_wait_ms': 0.0}
+        self.handler_times: Dict[str, Dict[str, float]] = {}
+
+        self.root.after(self.interval_ms, self._drain)
+
+    def register(self, kind: str, handler: Callable, coalesce: bool = False):
+        """ربط نوع رسالة بمعالج؛ مع coalesce تعالج آخر رسالة من النوع في كل دفعة فقط"""
+        self._handlers[kind] = handler
+        with self._stats_lock:
+            self.handler_times[kind] = {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        if coalesce:
+            self._coalesce.add(kind)
+
+    def post(self, kind: str, payload: Any = None):
+        """إرسال رسالة من أي خيط دون انتظار الواجهة"""
+        if kind not in self._handlers:
+            raise KeyError(f"نوع رسالة غير مسجل: {kind}")
+        self._queue.put(UiMessage(kind, payload, time.perf_counter()))
+        with self._stats_lock:
+            self.stats['posted'] += 1
+
+    def close(self):
+        self._closed = True
+
+    def _drain(self):
+        """معالجة دفعة من الرسائل في الخيط الرئيسي ثم إعادة الجدولة"""
+        if self._closed:
+            return
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self.stats['max_depth'] = max(self.stats['max_depth'], depth)
+
+        batch = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        if batch:
+            # الرسائل القابلة للدمج: تبقى آخر رسالة من كل نوع فقط
+            last_index = {m.kind: i for i, m in enumerate(batch) if m.kind in self._coalesce}
+            now = time.perf_counter()
+            handled = [m for i, m in enumerate(batch) if last_index.get(m.kind, i) == i]
+
+            with self._stats_lock:
+                self.stats['drains'] += 1
+                self.stats['coalesced'] += len(batch) - len(handled)
+                if handled:
+                    oldest = min(m.posted_at for m in handled)
+                    self.stats['max_wait_ms'] = max(self.stats['max_wait_ms'], (now - oldest) * 1000)
+
+            # المعالجات تعمل خارج القفل لأنها قد ترسل رسائل جديدة
+            for message in handled:
+                self._handle(message)
+
+        self.root.after(self.interval_ms, self._drain)
+
+    def _handle(self, message: UiMessage):
+        start = time.perf_counter()
+        try:
+            self._handlers[message.kind](message.payload)
+        except Exception as e:
+            print(f"خطأ في معالجة رسالة الواجهة {message.kind}: {e}")
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                timing = self.handler_times[message.kind]
+                timing['calls'] += 1
+                timing['total_ms'] += elapsed
+                timing['max_ms'] = max(timing['max_ms'], elapsed)
+                self.stats['handled'] += 1
+
+    def report(self) -> Dict:
+        """لقطة من القياسات الحالية مع عمق الطابور"""
+        with self._stats_lock:
+            return {
+                **self.stats,
+                'depth': self._queue.qsize(),
+                'handlers': {kind: dict(timing) for kind, timing in self.handler_times.items()}
+            }
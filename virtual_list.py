@@ -0,0 +1,161 @@
+import sys
+import tkinter as tk
+import customtkinter as ctk
+from typing import Callable, Dict, List, Sequence
+
+
+class VirtualList(ctk.CTkFrame):
+    """قائمة تمرير افتراضية تنشئ البطاقات الظاهرة فقط وتعيد استخدامها بتحديث محتواها"""
+
+    WHEEL_SEQUENCES = ("<Button-4>", "<Button-5>") if sys.platform.startswith("linux") else ("<MouseWheel>",)
+
+    def __init__(self, parent, create_row: Callable, update_row: Callable, row_height: int,
+                 row_padding: int = 10, overscan: int = 2, on_end_reached: Callable = None, **kwargs):
+        super().__init__(parent, **kwargs)
+
+        # create_row(parent) تنشئ بطاقة فارغة، و update_row(card, item) تعرض عنصراً فيها
+        self.create_row = create_row
+        self.update_row = update_row
+        self.row_height = row_height
+        self.row_padding = row_padding
+        self.overscan = overscan
+        self.on_end_reached = on_end_reached
+
+        self.items: List = []
+        self._visible: Dict[int, tuple] = {}  # موقع العنصر -> (البطاقة، عنصر النافذة في اللوحة)
+        self._pool: List[tuple] = []  # بطاقات مخفية جاهزة لإعادة الاستخدام
+        self._render_pending = False
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.canvas = tk.Canvas(
+            self,
+            highlightthickness=0,
+            bd=0,
+            yscrollincrement=max(row_height // 4, 1),
+            bg=self._apply_appearance_mode(self.cget('fg_color'))
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.canvas.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.canvas.configure(yscrollcommand=self._on_canvas_scroll)
+
+        self.canvas.bind("<Configure>", self._on_resize)
+
+        # العجلة مربوطة بوسم خاص بهذه القائمة يضاف إلى اللوحة وإلى كل بطاقة، لا بـ bind_all،
+        # فلا تصل أحداث النوافذ الأخرى إليها ويزال الربط مع القائمة في destroy
+        self._wheel_tag = f"VirtualListWheel{self}"
+        for sequence in self.WHEEL_SEQUENCES:
+            self.bind_class(self._wheel_tag, sequence, self._on_mouse_wheel)
+        self._add_wheel_tag(self.canvas)
+
+    def destroy(self):
+        for sequence in self.WHEEL_SEQUENCES:
+            self.unbind_class(self._wheel_tag, sequence)
+        super().destroy()
+
+    @property
+    def stride(self) -> int:
+        return self.row_height + self.row_padding
+
+    def set_items(self, items: Sequence):
+        """استبدال العناصر والعودة إلى الأعلى مع إعادة استخدام البطاقات الحالية"""
+        self.items = list(items)
+        for index in list(self._visible):
+            self._hide(index)
+        self._update_scroll_region()
+        self.canvas.yview_moveto(0)
+        self._render()
+
+    def append_items(self, items: Sequence):
+        """إضافة عناصر في النهاية دون تغيير موضع التمرير"""
+        self.items.extend(items)
+        self._update_scroll_region()
+        self._schedule_render()
+
+    def refresh(self):
+        """إعادة عرض العناصر الظاهرة بعد تعديل بياناتها"""
+        for index, (card, _) in self._visible.items():
+            self.update_row(card, self.items[index])
+
+    def _update_scroll_region(self):
+        height = max(len(self.items) * self.stride, 1)
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), height))
+
+    def _hide(self, index: int):
+        card, window = self._visible.pop(index)
+        self.canvas.itemconfigure(window, state="hidden")
+        self._pool.append((card, window))
+
+    def _schedule_render(self):
+        # تجميع أحداث التمرير المتتالية في إعادة رسم واحدة
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self):
+        """عرض العناصر الواقعة في نافذة التمرير فقط"""
+        self._render_pending = False
+        if not self.winfo_exists():
+            return
+
+        top = self.canvas.canvasy(0)
+        height = self.canvas.winfo_height()
+        width = self.canvas.winfo_width()
+        first = max(0, int(top // self.stride) - self.overscan)
+        last = min(len(self.items), int((top + height) // self.stride) + 1 + self.overscan)
+
+        for index in [i for i in self._visible if not first <= i < last]:
+            self._hide(index)
+
+        for index in range(first, last):
+            if index in self._visible:
+                continue
+            if self._pool:
+                card, window = self._pool.pop()
+                self.canvas.coords(window, 0, index * self.stride)
+                self.canvas.itemconfigure(window, state="normal", width=width)
+            else:
+                card = self.create_row(self.canvas)
+                self._add_wheel_tag(card)
+                window = self.canvas.create_window(
+                    0, index * self.stride, anchor="nw", window=card,
+                    width=width, height=self.row_height
+                )
+            self.update_row(card, self.items[index])
+            self._visible[index] = (card, window)
+
+        if self.on_end_reached and self.items and last >= len(self.items):
+            self.on_end_reached()
+
+    def _on_canvas_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_render()
+
+    def _on_resize(self, event):
+        for card, window in list(self._visible.values()) + self._pool:
+            self.canvas.itemconfigure(window, width=event.width)
+        self._update_scroll_region()
+        self._schedule_render()
+
+    def _add_wheel_tag(self, widget):
+        """إضافة وسم العجلة إلى العنصر وكل عناصره الداخلية (عناصر customtkinter مركبة من عدة عناصر tk)"""
+        tags = widget.bindtags()
+        if self._wheel_tag not in tags:
+            widget.bindtags(tags[:1] + (self._wheel_tag,) + tags[1:])
+        for child in widget.winfo_children():
+            self._add_wheel_tag(child)
+
+    def _on_mouse_wheel(self, event):
+        if not self.items:
+            return
+
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.canvas.yview_scroll(delta, "units")